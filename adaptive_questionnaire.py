@@ -6,6 +6,13 @@ Adaptive questionnaire system - replaces the old static questionnaire
 מערכת שאלון אדפטיבית - מחליפה את השאלון הסטטי הישן
 """
 
+import json
+import hashlib
+
+from conditions import CompiledConditions
+
+GREETING = "שלום! אני כאן לעזור לך למצוא את כל הזכויות שמגיעות לך.\nבואו נתחיל עם השאלה הראשונה: מה גילך?"
+
 def has_children_under_18(profile):
     """Check if user has children under 18"""
     children_ages = profile.get('children_ages', '')
@@ -29,14 +36,15 @@ MINIMAL_CORE_QUESTIONS = [
         "key": "age",
         "question": "מהו גילך?",
         "type": "number",
-        "validation": lambda x: x.isdigit() and 0 <= int(x) <= 120,
+        "min": 0,
+        "max": 120,
         "priority": 1
     },
     {
         "key": "num_children",
         "question": "כמה ילדים יש לך?",
         "type": "number",
-        "validation": lambda x: x.isdigit() and int(x) >= 0,
+        "min": 0,
         "priority": 2
     },
     {
@@ -66,7 +74,7 @@ MINIMAL_CORE_QUESTIONS = [
 ADAPTIVE_FOLLOW_UPS = [
     # Children details
     {
-        "condition": lambda p: p.get("num_children") and int(p.get("num_children", "0")) > 0,
+        "condition": {"field": "num_children", "read": "int", "op": "gt", "value": 0},
         "questions": [
             {
                 "key": "marital_status",
@@ -79,7 +87,7 @@ ADAPTIVE_FOLLOW_UPS = [
     
     # Employment details - only for workers
     {
-        "condition": lambda p: p.get("employment_status") in ["שכיר", "עצמאי"],
+        "condition": {"field": "employment_status", "op": "in", "value": ["שכיר", "עצמאי"]},
         "questions": [
             {
                 "key": "avg_monthly_income",
@@ -98,7 +106,7 @@ ADAPTIVE_FOLLOW_UPS = [
     
     # Disability details
     {
-        "condition": lambda p: p.get("recognized_disability") == "כן",
+        "condition": {"field": "recognized_disability", "op": "eq", "value": "כן"},
         "questions": [
             {
                 "key": "disability_percentage",
@@ -117,7 +125,7 @@ ADAPTIVE_FOLLOW_UPS = [
     
     # Military service details - only for veterans
     {
-        "condition": lambda p: p.get("military_or_national_service") == "שירות צבאי (צה\"ל)",
+        "condition": {"field": "military_or_national_service", "op": "eq", "value": "שירות צבאי (צה\"ל)"},
         "questions": [
             {
                 "key": "service_length_years",
@@ -136,7 +144,7 @@ ADAPTIVE_FOLLOW_UPS = [
     
     # Low income specific questions
     {
-        "condition": lambda p: p.get("avg_monthly_income") in ["עד 4,000", "4,000-8,000"],
+        "condition": {"field": "avg_monthly_income", "op": "in", "value": ["עד 4,000", "4,000-8,000"]},
         "questions": [
             {
                 "key": "housing_status",
@@ -155,7 +163,7 @@ ADAPTIVE_FOLLOW_UPS = [
     
     # High disability specific questions
     {
-        "condition": lambda p: p.get("disability_percentage") in ["50-75%", "מעל 75%"],
+        "condition": {"field": "disability_percentage", "op": "in", "value": ["50-75%", "מעל 75%"]},
         "questions": [
             {
                 "key": "disability_type",
@@ -168,7 +176,7 @@ ADAPTIVE_FOLLOW_UPS = [
     
     # Accident and compensation questions - for tax payers
     {
-        "condition": lambda p: p.get("paid_income_tax_6_years") == "כן",
+        "condition": {"field": "paid_income_tax_6_years", "op": "eq", "value": "כן"},
         "questions": [
             {
                 "key": "had_work_accident",
@@ -187,7 +195,7 @@ ADAPTIVE_FOLLOW_UPS = [
     
     # Large family benefits
     {
-        "condition": lambda p: p.get("num_children") and int(p.get("num_children", "0")) >= 3,
+        "condition": {"field": "num_children", "read": "int", "op": "ge", "value": 3},
         "questions": [
             {
                 "key": "children_ages",
@@ -199,7 +207,7 @@ ADAPTIVE_FOLLOW_UPS = [
     
     # Long military service benefits  
     {
-        "condition": lambda p: p.get("service_length_years") in ["10-20 שנים", "מעל 20 שנים"],
+        "condition": {"field": "service_length_years", "op": "in", "value": ["10-20 שנים", "מעל 20 שנים"]},
         "questions": [
             {
                 "key": "miluim_days_yearly",
@@ -211,45 +219,65 @@ ADAPTIVE_FOLLOW_UPS = [
     }
 ]
 
-def get_relevant_questions(current_profile):
-    """Get next most relevant questions based on current profile"""
-    
-    # First, check if we need any core questions
+# Compiled once - follow-up conditions are declarative (see conditions.py)
+FOLLOW_UP_CONDITIONS = CompiledConditions(ADAPTIVE_FOLLOW_UPS)
+
+# Core questions only asked within an age range (inclusive) once the age is known
+CORE_AGE_RANGES = {
+    "military_or_national_service": (17, 70),  # Don't ask military to children or very elderly
+    "employment_status": (16, 75),  # Don't ask employment to children or very elderly initially
+}
+
+def missing_core_questions(current_profile):
+    """Core questions not answered yet (and not ruled out by age), in list order"""
     missing_core = []
     for q in MINIMAL_CORE_QUESTIONS:
         if q["key"] not in current_profile:
             # Apply age-based filtering
             age = current_profile.get('age')
-            if age:
+            if age and q["key"] in CORE_AGE_RANGES:
                 age_int = int(age) if age.isdigit() else 25
-                
-                # Don't ask military to children or very elderly
-                if q["key"] == "military_or_national_service" and (age_int < 17 or age_int > 70):
-                    continue
-                    
-                # Don't ask employment to children or very elderly initially
-                if q["key"] == "employment_status" and (age_int < 16 or age_int > 75):
+                low, high = CORE_AGE_RANGES[q["key"]]
+                if age_int < low or age_int > high:
                     continue
             
             missing_core.append(q)
+    return missing_core
+
+def open_follow_ups(current_profile, active=None):
+    """Unanswered questions of the follow-up blocks whose condition holds, in block order
     
+    active is FOLLOW_UP_CONDITIONS.evaluate(current_profile) when the caller already has it.
+    """
+    if active is None:
+        active = FOLLOW_UP_CONDITIONS.evaluate(current_profile)
+    relevant_followups = []
+    for followup_block, holds in zip(ADAPTIVE_FOLLOW_UPS, active):
+        if holds:
+            for question in followup_block["questions"]:
+                if question["key"] not in current_profile:
+                    relevant_followups.append(question)
+    return relevant_followups
+
+def pending_questions(current_profile, active=None):
+    """Every question that may still be asked - core questions by priority, then follow-ups"""
+    return (sorted(missing_core_questions(current_profile), key=lambda x: x["priority"])
+            + open_follow_ups(current_profile, active))
+
+def get_relevant_questions(current_profile):
+    """Get next most relevant questions based on current profile"""
+    
+    # First, check if we need any core questions
+    missing_core = missing_core_questions(current_profile)
     if missing_core:
         # Return highest priority core question
         return [min(missing_core, key=lambda x: x["priority"])]
     
-    # Then check for relevant follow-ups
-    relevant_followups = []
-    for followup_block in ADAPTIVE_FOLLOW_UPS:
-        try:
-            if followup_block["condition"](current_profile):
-                for question in followup_block["questions"]:
-                    if question["key"] not in current_profile:
-                        relevant_followups.append(question)
-        except:
-            continue  # Skip if condition evaluation fails
-    
     # Return up to 2 most relevant follow-up questions
-    return relevant_followups[:2]
+    return open_follow_ups(current_profile)[:2]
+
+# Share of the progress bar for core questions and for the follow-ups that apply
+PROGRESS_WEIGHTS = {"core": 0.7, "follow_ups": 0.3}
 
 def estimate_completion_percentage(current_profile):
     """Estimate how complete the profile is"""
@@ -262,25 +290,39 @@ def estimate_completion_percentage(current_profile):
     total_relevant_followups = 0
     answered_followups = 0
     
-    for followup_block in ADAPTIVE_FOLLOW_UPS:
-        try:
-            if followup_block["condition"](current_profile):
-                for question in followup_block["questions"]:
-                    total_relevant_followups += 1
-                    if question["key"] in current_profile:
-                        answered_followups += 1
-        except:
-            continue
+    for followup_block, holds in zip(ADAPTIVE_FOLLOW_UPS, FOLLOW_UP_CONDITIONS.evaluate(current_profile)):
+        if holds:
+            for question in followup_block["questions"]:
+                total_relevant_followups += 1
+                if question["key"] in current_profile:
+                    answered_followups += 1
     
     if total_relevant_followups == 0:
         return (core_completion / core_total) * 100
     
     # Weighted completion: 70% core, 30% follow-ups
-    core_percentage = (core_completion / core_total) * 0.7
-    followup_percentage = (answered_followups / total_relevant_followups) * 0.3
+    core_percentage = (core_completion / core_total) * PROGRESS_WEIGHTS["core"]
+    followup_percentage = (answered_followups / total_relevant_followups) * PROGRESS_WEIGHTS["follow_ups"]
     
     return (core_percentage + followup_percentage) * 100
 
+def questionnaire_flow():
+    """The whole questionnaire as one JSON document, for clients that walk it themselves
+    
+    Holds what get_relevant_questions and estimate_completion_percentage use - core questions
+    with their priorities and age ranges, follow-up blocks with declarative conditions, and the
+    progress weights. The version is a hash of the content, so clients can cache it.
+    """
+    flow = {
+        "greeting": GREETING,
+        "core": [dict(q, age_range=list(CORE_AGE_RANGES[q["key"]]) if q["key"] in CORE_AGE_RANGES else None)
+                 for q in MINIMAL_CORE_QUESTIONS],
+        "follow_ups": FOLLOW_UP_CONDITIONS.to_json(),
+        "progress_weights": PROGRESS_WEIGHTS,
+    }
+    content = json.dumps(flow, ensure_ascii=False, sort_keys=True)
+    return {"version": hashlib.sha1(content.encode("utf-8")).hexdigest()[:12], **flow}
+
 def convert_to_old_format(adaptive_profile):
     """Convert adaptive profile to old questionnaire format for compatibility"""
     converted = adaptive_profile.copy()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Amount string helpers shared by the matcher and the catalog compiler
+פענוח מחרוזות סכומים
+
+Every amount_estimation string is parsed once into an AmountSpec (memoized,
+and stored on each catalog Right at load). The helpers below only read it.
+"""
+
+import re
+from functools import lru_cache
+
+UNKNOWN_AMOUNTS = ['משתנה', 'לא ידוע']
+
+UNIT_SHEKEL = '₪'
+UNIT_SALARY_DAYS = 'ימי שכר'
+UNIT_SALARY_MONTHS = 'חודש שכר'
+UNIT_PERCENT = '%'
+
+PERIOD_WORDS = [
+    ('month', ['לחודש', 'בחודש', 'חודשי']),
+    ('year', ['לשנה', 'בשנה', 'שנתי']),
+    ('once', ['חד פעמי', 'חד-פעמי']),
+]
+
+
+class AmountSpec:
+    """A parsed amount_estimation string - shared, do not modify"""
+
+    __slots__ = ('text', 'numbers', 'min', 'max', 'unit', 'period', 'display', 'sort_key', 'value_floor')
+
+    def __init__(self, text: str):
+        self.text = text
+        known = bool(text) and text.lower() not in UNKNOWN_AMOUNTS
+        self.numbers = tuple(int(n) for n in re.findall(r'\d+', text.replace(',', ''))) if text else ()
+
+        if known and self.numbers:
+            self.min, self.max = min(self.numbers), max(self.numbers)
+        else:
+            self.min = self.max = 0
+
+        if UNIT_SALARY_DAYS in text:
+            self.unit = UNIT_SALARY_DAYS
+        elif UNIT_SALARY_MONTHS in text:
+            self.unit = UNIT_SALARY_MONTHS
+        elif UNIT_PERCENT in text and UNIT_SHEKEL not in text:
+            self.unit = UNIT_PERCENT
+        else:
+            self.unit = UNIT_SHEKEL
+        self.period = next((period for period, words in PERIOD_WORDS if any(w in text for w in words)), None)
+
+        self.sort_key = self._sort_key()
+        self.value_floor = self._value_floor(known)
+        self.display = self._display(known)
+
+    def _sort_key(self) -> int:
+        """Estimated maximum value in ₪, salary-based amounts converted roughly"""
+        if self.unit == UNIT_SALARY_DAYS and self.numbers:
+            # Estimate: 28 days = ~30,000 NIS (average monthly salary)
+            return max(self.numbers) * 1000  # Rough estimate
+        if UNIT_SALARY_MONTHS in self.text:
+            if self.numbers:
+                return max(self.numbers) * 10000  # Average monthly salary estimate
+            # If no number found but mentions "חודש שכר", assume 1 month per year of service (average 5 years)
+            return 50000  # Estimate for 5 months salary
+        return max(self.numbers) if self.numbers else 0
+
+    def _value_floor(self, known: bool):
+        if not known:
+            return None  # Include unknown amounts for safety
+        # Special handling for worker rights (always include)
+        if any(word in self.text for word in [UNIT_SALARY_DAYS, 'ימים', UNIT_SALARY_MONTHS]):
+            return None
+        return max(self.numbers) if self.numbers else None  # Include if can't parse
+
+    def _display(self, known: bool) -> str:
+        text = self.text
+        if not known:
+            return 'משתנה לפי מקרה'
+
+        # Shorten very long descriptions
+        if len(text) > 150:
+            # Extract key numbers and info
+            first = re.search(r'\d[\d,]*', text)
+            if first:
+                main_amount = int(first.group().replace(',', ''))
+                if 'הלוואה' in text:
+                    return f"הלוואה עד {main_amount:,} ₪ בתנאים מועדפים"
+                elif 'הפקדה' in text and 'מס' in text:
+                    return f"הטבת מס על הפקדות - חיסכון עד {main_amount:,} ₪"
+                elif 'פטור' in text and 'מס' in text:
+                    return f"פטור ממס עד {main_amount:,} ₪ לשנה"
+                else:
+                    return f"עד {main_amount:,} ₪"
+
+        # Add currency symbol if missing
+        if '₪' not in text and 'ש"ח' not in text and self.numbers:
+            text += ' ₪'
+        return text
+
+    def __repr__(self):
+        return f"AmountSpec({self.text!r}, {self.min}-{self.max} {self.unit}, period={self.period})"
+
+
+@lru_cache(maxsize=4096)
+def parse_amount(amount_str) -> AmountSpec:
+    """Parse an amount_estimation string (memoized)"""
+    return AmountSpec(amount_str or '')
+
+
+def amount_value_floor(amount_str: str):
+    """Return the number compared against the value threshold, or None if the right is always kept"""
+    return parse_amount(amount_str).value_floor
+
+def has_significant_value(amount_str: str, threshold: int):
+    """Check if the right has significant monetary value"""
+    value = amount_value_floor(amount_str)
+    return value is None or value >= threshold
+
+def extract_max_amount(amount_str: str) -> int:
+    """Extract maximum amount from amount string for sorting"""
+    return parse_amount(amount_str).sort_key
+
+def parse_amount_range(amount_str: str) -> tuple:
+    """Parse amount string and return (min, max) tuple"""
+    spec = parse_amount(amount_str)
+    return (spec.min, spec.max)
+
+def format_amount_nicely(amount_str: str) -> str:
+    """Format amount string nicely and concisely"""
+    return parse_amount(amount_str).display
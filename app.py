@@ -1,35 +1,74 @@
+import os
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 from gpt_response import (
     get_basic_rights_response,
     get_detailed_rights_report,
+    match_cache,
+    narrow_candidates,
+    preload_catalog,
+    schedule_next_questions,
+    session_candidates,
 )
-from adaptive_questionnaire import get_relevant_questions, estimate_completion_percentage
+from adaptive_questionnaire import GREETING, questionnaire_flow
+from questionnaire_graph import QUESTIONNAIRE_GRAPH, questionnaire_step
+
+# Pre-forked servers import this module once in the master - load the catalog there so workers share it
+if os.getenv("PRELOAD_CATALOG"):
+    preload_catalog()
 
 app = Flask(__name__, static_url_path="/static", static_folder="static")
 CORS(app)
 
+# Served to clients that walk the questionnaire themselves (static/script.js) - built once, versioned by content
+QUESTIONNAIRE_FLOW = questionnaire_flow()
+
 @app.route("/")
 def serve_index():
     return send_file("index.html")
 
+@app.route("/questionnaire")
+def questionnaire():
+    """The questionnaire flow - clients walk it locally and only post the final profile to /chat"""
+    response = jsonify(QUESTIONNAIRE_FLOW)
+    response.set_etag(QUESTIONNAIRE_FLOW["version"])
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    return response.make_conditional(request)
+
 @app.route("/chat", methods=["POST"])
 def chat():
     try:
         data = request.get_json()
         profile = data.get("profile", {})
         clarifications = data.get("clarifications", [])
+        session_id = data.get("session_id")
+        flow_version = data.get("flow_version")
 
         print(">>> chat הופעלה!")
         print(">>> פרופיל שהתקבל:", profile)
         print(">>> מספר שדות בפרופיל:", len([k for k, v in profile.items() if str(v).strip()]))
 
         if not profile or all(str(v).strip() == "" for v in profile.values()):
-            return jsonify({"reply": "שלום! אני כאן לעזור לך למצוא את כל הזכויות שמגיעות לך.\nבואו נתחיל עם השאלה הראשונה: מה גילך?", "field": "age", "done": False, "type": "number", "progress": 0})
+            return jsonify({"reply": GREETING, "field": "age", "done": False, "type": "number", "progress": 0})
+
+        # The client walked a cached flow older than the one served now - it refetches /questionnaire and goes on
+        if flow_version and flow_version != QUESTIONNAIRE_FLOW["version"]:
+            print(f">>> גרסת שאלון ישנה: {flow_version}")
+            return jsonify({"done": False, "flow_version": QUESTIONNAIRE_FLOW["version"]})
 
-        # Use adaptive questionnaire
-        next_questions = get_relevant_questions(profile)
-        completion = estimate_completion_percentage(profile)
+        # Rights this session can still match, narrowed by the new answers (clients without a session_id skip it)
+        candidates = narrow_candidates(session_id, profile) if session_id else None
+        if candidates is not None:
+            print(f">>> זכויות אפשריות: {len(candidates)}")
+
+        # Use adaptive questionnaire - next question and progress from the precompiled graph; with a session,
+        # ordered by how much each answer narrows its rights (no questions are left once no right is possible)
+        if candidates is not None:
+            next_questions = schedule_next_questions(profile, candidates)
+            completion = questionnaire_step(profile)[1]
+        else:
+            next_questions, completion = questionnaire_step(profile)
         
         print(f">>> שאלות שנותרו: {len(next_questions)}")
         print(f">>> אחוז השלמה: {completion:.0f}%")
@@ -50,7 +89,7 @@ def chat():
 
         print(">>> גונר דוח GPT - כל השאלות נענו!")
         try:
-            report = get_detailed_rights_report(profile, clarifications)
+            report = get_detailed_rights_report(profile, clarifications, candidates)
             print(f">>> דוח נוצר בהצלחה ({len(report)} תווים)")
         except Exception as e:
             print(f">>> שגיאה ביצירת דוח GPT: {e}")
@@ -71,5 +110,10 @@ def chat():
         traceback.print_exc()
         return jsonify({"reply": f"שגיאה: {str(e)}", "done": "error"})
 
+@app.route("/cache-stats")
+def cache_stats():
+    return jsonify({**match_cache.stats(), "sessions": session_candidates.stats(),
+                    "questionnaire": QUESTIONNAIRE_GRAPH.stats()})
+
 if __name__ == "__main__":
     app.run(host="127.0.0.1", port=5003, debug=True)
\ No newline at end of file
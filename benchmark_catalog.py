@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark the in-memory catalog: criteria memory per entry and per-right match time
+"""
+
+import sys
+import os
+import json
+import time
+import tempfile
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rights_catalog import CATALOG_PATH, get_catalog_snapshot, reload_catalog, compile_rights, build_compiled_catalog
+from gpt_response import check_eligibility_match, filter_matching_rights, match_cache, preload_catalog
+from predicate_compiler import CompiledPredicates
+from profile_features import ProfileFeatures
+from comprehensive_test import test_profiles
+
+def deep_size(obj, seen=None) -> int:
+    """Size of an object and everything it references (each object counted once)"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(v, seen) for v in obj)
+    return size
+
+def per_call_us(function, calls: int, rounds=3) -> float:
+    """Best of a few rounds, so the first (cold) run does not skew the comparison"""
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e6
+
+def benchmark_criteria(repeat=20):
+    """Compare the raw 33-key criteria dicts with the sparse Right.criteria"""
+    with open(CATALOG_PATH, encoding='utf-8') as f:
+        raw = [right.get('eligibility_criteria') or {} for right in json.load(f)]
+    records = get_catalog_snapshot().records
+    profiles = [case['profile'] for case in test_profiles]
+    calls = repeat * len(profiles) * len(records)
+
+    print("BENCHMARK: Catalog criteria")
+    print("=" * 60)
+    print(f"Rights: {len(records)}, profiles: {len(profiles)}")
+    print(f"Criteria keys per right:   raw {sum(map(len, raw)) / len(raw):.1f}"
+          f"   sparse {sum(len(r.criteria) for r in records) / len(records):.1f}")
+    print(f"Criteria bytes per right:  raw {sum(deep_size(c) for c in raw) / len(raw):.0f}"
+          f"   sparse {sum(deep_size(r.criteria) for r in records) / len(records):.0f}")
+
+    features = [ProfileFeatures(p) for p in profiles]
+
+    def scalar(criteria_list):
+        def run():
+            for _ in range(repeat):
+                for profile in features:
+                    for criteria, record in zip(criteria_list, records):
+                        check_eligibility_match(profile, criteria, record.data, record.flags)
+        return run
+
+    predicates = CompiledPredicates(records, check_eligibility_match).predicates
+
+    def compiled():
+        for _ in range(repeat):
+            for profile in features:
+                for predicate in predicates:
+                    predicate(profile)
+
+    print(f"Per-right match, µs:       raw {per_call_us(scalar(raw), calls):.2f}"
+          f"   sparse {per_call_us(scalar([r.criteria for r in records]), calls):.2f}"
+          f"   compiled {per_call_us(compiled, calls):.3f}")
+
+    match_cache.clear()
+    match_cache.maxsize = 0  # measure the uncached path
+    rounds = repeat * len(profiles)
+    print(f"filter_matching_rights, µs: {per_call_us(lambda: [filter_matching_rights(p) for _ in range(repeat) for p in profiles], rounds):.0f}")
+    print()
+
+def benchmark_memory():
+    """Catalog memory while matching (hot records) vs with every full entry loaded"""
+    profiles = [case['profile'] for case in test_profiles]
+    match_cache.clear()
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    snapshot = reload_catalog()
+    for profile in profiles:
+        filter_matching_rights(profile)
+    matching = tracemalloc.get_traced_memory()[0] - baseline
+    loaded = sum(record._data is not None for record in snapshot.records)
+    snapshot.rights
+    full = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    print("BENCHMARK: Catalog memory")
+    print("=" * 60)
+    print(f"After {len(profiles)} matches: {matching / 1024:.0f} KB, full entries loaded: {loaded}/{len(snapshot)}")
+    print(f"All entries loaded:  {full / 1024:.0f} KB")
+    print()
+
+def _traced(function):
+    """Run function, return (seconds, peak traced KB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / 1024
+
+def benchmark_streaming(copies=100):
+    """Load a large catalog (the real one repeated) with json.load vs the streaming reader"""
+    with open(CATALOG_PATH, encoding='utf-8') as f:
+        rights = json.load(f)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rights.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump([dict(right, id=f"{right.get('id')}-{i}", name=f"{right.get('name')} ({i})") for i in range(copies) for right in rights],
+                      f, ensure_ascii=False)
+        size_mb = os.path.getsize(path) / 2**20
+        del rights
+
+        def json_load():
+            with open(path, encoding='utf-8') as f:
+                compile_rights(json.load(f))
+
+        print("BENCHMARK: Large catalog load")
+        print("=" * 60)
+        print(f"Catalog: {140 * copies} rights, {size_mb:.0f} MB")
+        for label, function in [("json.load + compile", json_load),
+                                ("streaming load", lambda: reload_catalog(path)),
+                                ("streaming build", lambda: build_compiled_catalog(path)),
+                                ("load compiled", lambda: reload_catalog(path))]:
+            seconds, peak = _traced(function)
+            print(f"{label:<20} {seconds:6.2f} s   peak {peak / 1024:6.1f} MB")
+    print()
+
+def private_kb() -> int:
+    """Memory only this process uses (Linux: private pages from smaps_rollup)"""
+    with open('/proc/self/smaps_rollup') as f:
+        return sum(int(line.split()[1]) for line in f if line.startswith(('Private_Clean', 'Private_Dirty')))
+
+def _worker_private_kb(workers: int, load_in_worker: bool) -> list:
+    """Fork workers that each serve every test profile, and collect their private memory"""
+    profiles = [case['profile'] for case in test_profiles]
+    results = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            if load_in_worker:
+                reload_catalog()
+            for profile in profiles:
+                filter_matching_rights(profile)
+            os.write(write_fd, str(private_kb()).encode())
+            os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd) as f:
+            results.append(int(f.read()))
+        os.waitpid(pid, 0)
+    return results
+
+def benchmark_workers(workers=4):
+    """Per-worker private memory: catalog loaded by each worker vs preloaded in the master"""
+    if not (hasattr(os, 'fork') and os.path.exists('/proc/self/smaps_rollup')):
+        print("BENCHMARK: Worker memory - needs Linux fork and /proc, skipped")
+        return
+    match_cache.clear()
+    per_worker = _worker_private_kb(workers, load_in_worker=True)
+    preload_catalog()
+    preloaded = _worker_private_kb(workers, load_in_worker=False)
+
+    print("BENCHMARK: Worker memory")
+    print("=" * 60)
+    print(f"Private KB per worker, loading its own catalog: {sum(per_worker) / workers:.0f}")
+    print(f"Private KB per worker, preloaded in master:     {sum(preloaded) / workers:.0f}")
+    print()
+
+if __name__ == "__main__":
+    benchmark_criteria()
+    benchmark_memory()
+    benchmark_workers()
+    benchmark_streaming()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Bitset eligibility matcher - enum and yes/no gates as integer masks
+מנוע התאמה מבוסס ביטים - בדיקות קבוצה ככן/לא כפעולות AND על מספרים שלמים
+
+Every set-membership gate of check_eligibility_match becomes a dimension
+with one bit per possible value. A right is compiled into a single accept
+mask (all bits of a dimension it does not constrain, only the accepted
+values' bits otherwise) and a profile into one bit per dimension, so the
+enum part of the match is `accept & bits == bits`. Only the numeric ranges
+(age, income, service length) are checked as scalars.
+
+On the match path the masks are a prefilter: admits() drops the index
+survivors whose enum and yes/no gates reject the profile with one AND,
+and only the rest reach the compiled predicates (predicate_compiler).
+"""
+
+from eligibility_rules import (
+    ENUM_FIELDS, STRICT_BOOLEAN_FIELDS, REQUIRED_YES_FIELDS, EXACT_VALUE_FIELDS, is_regular_criteria,
+)
+from profile_features import ProfileFeatures
+
+OTHER = object()  # bit for answers no right lists
+
+# Derived yes/no answers used by the name heuristics
+DERIVED_FIELDS = ['student_ok', 'unemployed_ok', 'injury_reported', 'medical_need',
+                  'treatment_need', 'course_allowed']
+
+YES_DIMENSIONS = list(REQUIRED_YES_FIELDS) + ['receiving_business_grants', 'recognized_disability', 'has_children']
+
+
+class ProfileBits:
+    """A profile encoded once per request for the bitset matcher"""
+
+    __slots__ = ('bits', 'age', 'income', 'service_missing', 'service_years', 'service_years_int')
+
+
+class BitsetMatcher:
+    """Match compiled Right records with one AND/compare per right plus numeric ranges"""
+
+    def __init__(self, records, fallback=None):
+        self.records = records
+        self.fallback = fallback
+        self.dimensions = {}  # name -> {value: bit}
+        self.full = {}  # name -> mask of all the dimension's bits
+        self._next_bit = 0
+
+        for key in ENUM_FIELDS + EXACT_VALUE_FIELDS:
+            values = set()
+            for r in records:
+                value = r.criteria.get(key)
+                if isinstance(value, list):
+                    values.update(v for v in value if isinstance(v, str))
+                elif isinstance(value, str):
+                    values.add(value)
+            self._add_dimension(key, sorted(values) + [OTHER])
+        for key in STRICT_BOOLEAN_FIELDS:
+            self._add_dimension(f'bool:{key}', [True, False])
+        for key in YES_DIMENSIONS:
+            self._add_dimension(f'yes:{key}', [True, False])
+        for key in DERIVED_FIELDS:
+            self._add_dimension(key, [True, False])
+
+        self.rights = []
+        self.accept = []  # accept mask per right, all bits set for rights with irregular criteria
+        self.fallback_ids = []
+        for i, r in enumerate(records):
+            if is_regular_criteria(r.criteria):
+                self.rights.append(self._compile(r))
+                self.accept.append(self.rights[-1][0])
+            else:
+                self.fallback_ids.append(i)
+                self.rights.append(None)
+                self.accept.append(-1)
+        if self.fallback_ids and fallback is None:
+            raise ValueError(f"{len(self.fallback_ids)} rights need a scalar fallback predicate")
+
+    def _add_dimension(self, name, values):
+        bits = {}
+        for value in values:
+            bits[value] = 1 << self._next_bit
+            self._next_bit += 1
+        self.dimensions[name] = bits
+        self.full[name] = sum(bits.values())
+
+    def _bit(self, name, value):
+        bits = self.dimensions[name]
+        try:
+            return bits.get(value, bits[OTHER])
+        except TypeError:
+            return bits[OTHER]  # unhashable answers never appear in a criteria list
+
+    def _compile(self, right):
+        """Return (accept mask, age_min, age_max, income_max, service_min) for a right"""
+        criteria = right.criteria
+        flags = right.flags
+        accept = 0
+
+        def only(name, value):
+            return self.dimensions[name][value]
+
+        for key in ENUM_FIELDS:
+            value = criteria.get(key)
+            if value and value != ['כל']:
+                accept |= sum(only(key, v) for v in set(value))
+            else:
+                accept |= self.full[key]
+        for key in EXACT_VALUE_FIELDS:
+            value = criteria.get(key)
+            accept |= only(key, value) if value else self.full[key]
+        for key in STRICT_BOOLEAN_FIELDS:
+            value = criteria.get(key)
+            accept |= self.full[f'bool:{key}'] if value is None else only(f'bool:{key}', value)
+
+        required = {key: test(criteria.get(key)) for key, test in REQUIRED_YES_FIELDS.items()}
+        required['recognized_disability'] = 'requires_disability' in flags
+        required['has_children'] = criteria.get('child_special_needs') == True
+        required['student_ok'] = 'student_only' in flags
+        required['unemployed_ok'] = 'unemployed_only' in flags
+        required['injury_reported'] = 'work_injury_only' in flags
+        required['medical_need'] = 'medical_expenses' in flags
+        required['treatment_need'] = 'treatment_travel' in flags
+        required['course_allowed'] = 'course' in flags
+        for key, needs_yes in required.items():
+            name = key if key in DERIVED_FIELDS else f'yes:{key}'
+            accept |= only(name, True) if needs_yes else self.full[name]
+
+        excluded = criteria.get('receiving_business_grants') == False
+        accept |= only('yes:receiving_business_grants', False) if excluded else self.full['yes:receiving_business_grants']
+
+        def bound(key):
+            return criteria.get(key) or None  # 0 means unlimited, like in the matcher
+
+        return (accept, bound('age_min'), bound('age_max'), bound('income_max'), bound('service_length_years'))
+
+    def encode_profile(self, profile) -> ProfileBits:
+        """Encode the profile's answers - done once per request"""
+        features = ProfileFeatures.of(profile)
+        encoded = ProfileBits()
+        bits = 0
+
+        for key, value in [('employment_status', features.employment), ('gender', features.gender)] + \
+                [(key, getattr(features, key)) for key in EXACT_VALUE_FIELDS]:
+            if value:
+                bits |= self._bit(key, value)
+        bits |= self._bit('military_service', features.military)
+
+        for key in STRICT_BOOLEAN_FIELDS:
+            bits |= self.dimensions[f'bool:{key}'][key in features.affirmed]
+        for key in YES_DIMENSIONS:
+            bits |= self.dimensions[f'yes:{key}'][key in features.yes]
+        for key in DERIVED_FIELDS:
+            bits |= self.dimensions[key][getattr(features, key)]
+        encoded.bits = bits
+
+        encoded.age = features.age
+        encoded.income = features.income
+        encoded.service_missing = features.service_missing
+        encoded.service_years = features.service_years
+        encoded.service_years_int = features.service_years_int
+        return encoded
+
+    def admits(self, i: int, bits: int) -> bool:
+        """Whether right number i's enum and yes/no gates accept the profile's bits (encode_profile().bits)
+
+        A necessary condition only - the numeric ranges are left to the full check.
+        """
+        return self.accept[i] & bits == bits
+
+    def matches(self, i: int, encoded: ProfileBits, profile) -> bool:
+        """Check right number i against an encoded profile"""
+        compiled = self.rights[i]
+        if compiled is None:
+            record = self.records[i]
+            return bool(self.fallback(profile, record.criteria, record.data, record.flags))
+
+        accept, age_min, age_max, income_max, service_min = compiled
+        if accept & encoded.bits != encoded.bits:
+            return False
+
+        age = encoded.age
+        if age is not None:
+            if age_min and age < age_min:
+                return False
+            if age_max and age > age_max:
+                return False
+        if income_max and encoded.income is not None and encoded.income > income_max:
+            return False
+        if service_min:
+            if encoded.service_missing or encoded.service_years < service_min:
+                return False
+            if encoded.service_years_int is not None and encoded.service_years_int < service_min:
+                return False
+        return True
+
+    def match(self, profile) -> list:
+        """Return the records matching the profile, in catalog order"""
+        features = ProfileFeatures.of(profile)
+        encoded = self.encode_profile(features)
+        return [r for i, r in enumerate(self.records) if self.matches(i, encoded, features)]
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Live candidate sets - the rights each questionnaire session can still match
+קבוצת מועמדים חיה - הזכויות שעדיין יכולות להתאים בכל שיחה
+
+Every right's eligibility check is a conjunction of independent gates, one
+per criterion and name-based flag, and each gate reads a known set of
+answers (eligibility_rules.criterion_fields / FLAG_PROFILE_FIELDS). Once
+all the answers a gate reads are in the profile its result is final, so a
+right whose gate fails can be dropped right away. Each /chat call only
+runs the gates that read a newly answered field, on the rights still in
+the set. The final match then only validates the survivors, and an empty
+set means no further answer can bring a right back.
+"""
+
+from eligibility_rules import FLAG_PROFILE_FIELDS, criterion_fields, is_regular_criteria
+from profile_features import ProfileFeatures
+
+# The matcher reads military_service only when military_or_national_service is missing,
+# so its gate is final once the newer field is answered
+DECIDING_FIELDS = {'military_service': ['military_or_national_service']}
+
+
+class FieldGates:
+    """Each right's gates indexed by the answers they read - built once per catalog snapshot"""
+
+    def __init__(self, records, check):
+        self.by_field = {}  # field -> [(position, fields the gate reads, gate)]
+        for record in records:
+            if not is_regular_criteria(record.criteria):
+                continue  # checked as a whole by the final match
+            for key, value in record.criteria.items():
+                fields = criterion_fields(key, value)
+                if fields:
+                    self._add(record.position, DECIDING_FIELDS.get(key, fields),
+                              lambda p, criteria={key: value}: check(p, criteria, flags=frozenset()))
+            for flag in record.flags:
+                self._add(record.position, FLAG_PROFILE_FIELDS[flag],
+                          lambda p, flags=frozenset([flag]): check(p, {}, flags=flags))
+        self.fields = frozenset(self.by_field)
+
+    def _add(self, position, fields, gate):
+        fields = frozenset(fields)
+        for field in fields:
+            self.by_field.setdefault(field, []).append((position, fields, gate))
+
+
+class CandidateSet:
+    """Positions of the rights still possible for one session, narrowed one answer at a time"""
+
+    __slots__ = ('version', 'threshold', 'answers', 'positions')
+
+    def __init__(self, snapshot, min_value_threshold):
+        self.version = snapshot.version
+        self.threshold = min_value_threshold
+        self.answers = {}
+        # Rights below the value threshold never reach the report
+        self.positions = {right.position for right in snapshot.records
+                          if right.value_floor is None or right.value_floor >= min_value_threshold}
+
+    def __len__(self):
+        return len(self.positions)
+
+    def update(self, gates: FieldGates, profile: dict) -> set:
+        """Drop the rights ruled out by the answers added since the last call. Returns the survivors.
+
+        Callers start a new set when an earlier answer was changed or removed (see changed).
+        """
+        new_fields = [key for key in gates.fields if key in profile and key not in self.answers]
+        if not new_fields:
+            return self.positions
+        self.answers.update((key, profile[key]) for key in new_fields)
+
+        features = ProfileFeatures(profile)
+        positions = self.positions
+        for field in new_fields:
+            for position, fields, gate in gates.by_field[field]:
+                if position in positions and fields.issubset(self.answers) and not gate(features):
+                    positions.discard(position)
+        return positions
+
+    def changed(self, profile: dict) -> bool:
+        """Whether an answer this set was narrowed on is no longer in the profile as given"""
+        return any(profile.get(key, self) != value for key, value in self.answers.items())
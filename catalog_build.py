@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Catalog build - one streaming pass from the JSON sources to the compiled catalog
+בניית קטלוג הזכויות - מעבר אחד מקובצי המקור ועד לקטלוג המקומפל
+
+Replaces the one-off fix_* scripts that each re-read and rewrote
+rights_data.json for a single change. Changes go into layer files instead
+(overlays and patches keyed by right id, see rights_catalog.py), and one
+build applies them:
+
+    python catalog_build.py build
+    python catalog_build.py build rights_data.json --layer new_rights_to_add_workers.json --layer fixes.json
+
+Every entry is normalized and checked, its amount and flags parsed, and its
+full text written to the cold segment as it is read. Then the layers are
+merged, near-duplicates clustered and the index built. The artifact records
+a build version and the time of each stage. It is written to a temporary
+file and swapped in atomically, and running workers pick it up on their
+next reload. If any entry fails the checks nothing is written.
+
+The service loads the artifact when it was built from the same base file
+and the same RIGHTS_CATALOG_LAYERS.
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import pickle
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime
+
+from rights_catalog import (
+    CATALOG_PATH, COMPILED_FORMAT, ColdStore, compile_rights, stream_records, merge_entries,
+    source_digest, compiled_path_for, cold_path_for, attach_cold, read_layer,
+)
+from catalog_stream import file_sha1
+from catalog_index import RightsIndex
+from eligibility_rules import profile_fields
+
+STAGES = ('hash', 'read', 'check', 'compile', 'cold', 'layers', 'duplicates', 'index', 'write')
+
+
+class StageTimer:
+    """Accumulated seconds per build stage"""
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+
+    @contextlib.contextmanager
+    def __call__(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] += time.perf_counter() - start
+
+
+def _write_cold(records, path: str) -> list:
+    """Write the records' full entries to a new cold segment file, return its offsets"""
+    offsets = [0]
+    with open(path, 'wb') as f:
+        for record in records:
+            f.write(json.dumps(record.data, ensure_ascii=False).encode('utf-8'))
+            offsets.append(f.tell())
+    return offsets
+
+
+def build_catalog(source: str = CATALOG_PATH, layers=()) -> dict:
+    """Build the compiled catalog for source plus layers. Returns the build summary"""
+    timer = StageTimer()
+    started = time.perf_counter()
+    layers = tuple(layers)
+    rejected = []
+
+    with open(source, 'rb') as f:
+        with timer('hash'):
+            digest = source_digest(file_sha1(f), layers)
+        cold_path = cold_path_for(source, digest)
+        tmp_cold = cold_path + '.tmp'
+        try:
+            if not layers:
+                with open(tmp_cold, 'wb') as cold:
+                    records, offsets = stream_records(f, cold, timer, rejected)
+            else:
+                # The base goes to a scratch segment, the merged catalog to the real one
+                with tempfile.TemporaryFile() as scratch:
+                    records, offsets = stream_records(f, scratch, timer, rejected)
+                    with timer('layers'):
+                        scratch.flush()
+                        attach_cold(records, ColdStore(None, offsets, scratch))
+                        records = merge_entries(records, [read_layer(layer) for layer in layers], rejected)
+                        offsets = _write_cold(records, tmp_cold)
+            if rejected:
+                details = '; '.join(f"{label}: {', '.join(problems)}" for label, problems in rejected[:10])
+                raise ValueError(f"{len(rejected)} catalog entries failed the checks - {details}")
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_cold)
+            raise
+
+    with timer('duplicates'):
+        records = compile_rights(records)
+    with timer('index'):
+        derived = {'index': RightsIndex(records), 'profile_fields': profile_fields(records)}
+
+    with timer('write'):
+        # Cold segment first, so the artifact never points at a missing file
+        os.replace(tmp_cold, cold_path)
+        built_at = datetime.now()
+        artifact = {
+            'format': COMPILED_FORMAT,
+            'source_sha1': digest,
+            'build': f"{built_at:%Y%m%d-%H%M%S}-{digest[:8]}",
+            'built_at': built_at.isoformat(timespec='seconds'),
+            'layers': [os.path.basename(layer) for layer in layers],
+            'stage_seconds': timer.seconds,
+            'records': records,
+            'cold_offsets': offsets,
+            'derived': derived,
+        }
+        target = compiled_path_for(source)
+        with open(target + '.tmp', 'wb') as out:
+            pickle.dump(artifact, out, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(target + '.tmp', target)  # atomic swap for running workers
+
+        # Segments of older builds - snapshots loaded from one mapped it at load (ColdStore.open),
+        # so their workers keep reading it after the file is removed
+        for stale in glob.glob(f"{glob.escape(os.path.splitext(source)[0])}.*.cold"):
+            if stale != cold_path:
+                os.remove(stale)
+
+    return {
+        'target': target,
+        'build': artifact['build'],
+        'rights': len(records),
+        'stage_seconds': timer.seconds,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build the compiled rights catalog")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="compile the catalog and its layers in one pass")
+    build.add_argument('source', nargs='?', default=CATALOG_PATH)
+    build.add_argument('--layer', action='append', default=[], help="overlay or patch file, applied in order")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = build_catalog(args.source, args.layer)
+    except (OSError, ValueError) as e:
+        print(f"❌ הבנייה נכשלה: {e}")
+        return 1
+
+    print(f"✅ {summary['rights']} זכויות נבנו ל-{summary['target']} (גרסה {summary['build']})")
+    for stage, seconds in summary['stage_seconds'].items():
+        print(f"  {stage:<11} {seconds * 1000:8.1f} ms")
+    print(f"  {'total':<11} {summary['seconds'] * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
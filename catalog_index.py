@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Inverted index over eligibility criteria - prunes candidates before full matching
+אינדקס הפוך על קריטריוני הזכאות - צמצום מועמדים לפני בדיקת התאמה מלאה
+
+The index is conservative: it only drops a right when check_eligibility_match
+would certainly reject it. Anything irregular (unexpected types, free text)
+stays a candidate and is left to the full predicate.
+"""
+
+from bisect import bisect_right
+
+from eligibility_rules import STRICT_BOOLEAN_FIELDS
+from profile_features import ProfileFeatures
+
+# (criteria key, profile key) - rejected when the profile value is set and not listed
+ENUM_DIMENSIONS = [
+    ('employment_status', 'employment_status'),
+    ('gender', 'gender'),
+]
+
+
+def _is_number(value) -> bool:
+    return type(value) in (int, float)
+
+
+def _is_hashable(value) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class _EnumIndex:
+    """value -> rights that list it, plus the rights that accept any value"""
+
+    def __init__(self, criteria_values):
+        self.unconstrained = set()
+        self.accepting = {}
+        for i, value in criteria_values:
+            if not value or value == ['כל'] or not isinstance(value, list):
+                self.unconstrained.add(i)
+                continue
+            for accepted in value:
+                if _is_hashable(accepted):
+                    self.accepting.setdefault(accepted, set()).add(i)
+        self.unconstrained = frozenset(self.unconstrained)
+        self.accepting = {k: frozenset(v) for k, v in self.accepting.items()}
+
+    def allowed(self, value):
+        if not _is_hashable(value):
+            return None
+        return self.unconstrained | self.accepting.get(value, frozenset())
+
+
+class _RangeIndex:
+    """Integer buckets whose allowed-rights set is precomputed"""
+
+    def __init__(self, bounds, everyone):
+        # bounds: (i, lo, hi) inclusive limits, None when unlimited
+        breakpoints = set()
+        for _, lo, hi in bounds:
+            if lo is not None:
+                breakpoints.add(int(-(-lo // 1)))  # ceil
+            if hi is not None:
+                breakpoints.add(int(hi // 1) + 1)
+        self.breakpoints = sorted(breakpoints)
+
+        limited = {i for i, _, _ in bounds}
+        free = frozenset(everyone - limited)
+        representatives = [self.breakpoints[0] - 1 if self.breakpoints else 0] + self.breakpoints
+        self.buckets = []
+        for x in representatives:
+            accepted = {i for i, lo, hi in bounds
+                        if (lo is None or x >= lo) and (hi is None or x <= hi)}
+            self.buckets.append(free | accepted)
+
+    def allowed(self, x: int):
+        return self.buckets[bisect_right(self.breakpoints, x)]
+
+
+def _range_bound(value):
+    """Return the numeric bound, None for no bound, or False if the value is irregular"""
+    if not value:
+        return None  # 0 / None are ignored by the matcher
+    if _is_number(value):
+        return value
+    return False
+
+
+class RightsIndex:
+    """Per-dimension indexes over a tuple of compiled Right records"""
+
+    def __init__(self, records):
+        self.records = records
+        everyone = frozenset(range(len(records)))
+
+        self.enums = {
+            profile_key: _EnumIndex((i, r.criteria.get(criteria_key)) for i, r in enumerate(records))
+            for criteria_key, profile_key in ENUM_DIMENSIONS
+        }
+        self.military = _EnumIndex((i, r.criteria.get('military_service')) for i, r in enumerate(records))
+
+        self.booleans = {}
+        for key in STRICT_BOOLEAN_FIELDS:
+            unconstrained, requires = set(), {True: set(), False: set()}
+            for i, r in enumerate(records):
+                value = r.criteria.get(key)
+                if isinstance(value, bool):
+                    requires[value].add(i)
+                else:
+                    unconstrained.add(i)
+            self.booleans[key] = {answer: frozenset(unconstrained | requires[answer])
+                                  for answer in (True, False)}
+
+        age_bounds, income_bounds = [], []
+        for i, r in enumerate(records):
+            lo = _range_bound(r.criteria.get('age_min'))
+            hi = _range_bound(r.criteria.get('age_max'))
+            if lo is not False and hi is not False and (lo is not None or hi is not None):
+                age_bounds.append((i, lo, hi))
+            income_max = _range_bound(r.criteria.get('income_max'))
+            if income_max:
+                income_bounds.append((i, None, income_max))
+        self.age = _RangeIndex(age_bounds, everyone)
+        self.income = _RangeIndex(income_bounds, everyone)
+
+    def candidate_ids(self, profile):
+        """Return the sorted positions of rights that may still match the profile"""
+        features = ProfileFeatures.of(profile)
+        allowed = []
+
+        for profile_key, index in self.enums.items():
+            value = features.get(profile_key)
+            if value:
+                allowed.append(index.allowed(value))
+
+        allowed.append(self.military.allowed(features.military))
+
+        for key, sets in self.booleans.items():
+            allowed.append(sets[key in features.affirmed])
+
+        if features.age is not None:
+            allowed.append(self.age.allowed(features.age))
+        if features.income is not None:
+            allowed.append(self.income.allowed(features.income))
+
+        allowed = sorted((s for s in allowed if s is not None), key=len)
+        if not allowed:
+            return range(len(self.records))
+        survivors = allowed[0].intersection(*allowed[1:])
+        return sorted(survivors)
+
+    def candidates(self, profile) -> list:
+        """Return the records that may still match, in catalog order"""
+        return [self.records[i] for i in self.candidate_ids(profile)]
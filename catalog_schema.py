@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Catalog entry normalization and schema validation - shared by the loader and the build
+נרמול ובדיקת סכימה של רשומות בקטלוג - משותף לטעינה ולבנייה
+
+Every entry passes through prepare_right before it is compiled: the loader
+quarantines entries that fail validation (the service keeps running and
+the snapshot lists them with the exact problems), the build refuses to
+write an artifact until they are fixed. Entries that pass are guaranteed
+the types the matchers rely on, so matching needs no defensive checks.
+
+The schema below is compiled once into a single validation function, the
+same way predicate_compiler builds the matchers. All fields except name may
+be missing or null; keys that are not in the schema are not checked.
+"""
+
+from eligibility_rules import (
+    ENUM_FIELDS, NUMERIC_FIELDS, STRICT_BOOLEAN_FIELDS, EXACT_VALUE_FIELDS, REQUIRED_YES_FIELDS,
+)
+
+TRIMMED_FIELDS = ('name', 'category', 'amount_estimation')
+
+# Field kinds -> the type test in the generated validator (v is the value)
+TYPE_TESTS = {
+    'number': "(type(v) is int or type(v) is float)",
+    'boolean': "(v is True or v is False)",
+    'text': "type(v) is str",
+    'text list': "(type(v) is list and all(type(x) is str for x in v))",
+    'object': "type(v) is dict",
+}
+
+RIGHT_SCHEMA = {
+    'id': 'text',
+    'name': 'text',
+    **dict.fromkeys(['description', 'category', 'subcategory', 'priority', 'amount_estimation',
+                     'application_method', 'processing_time', 'contact_info', 'website_url',
+                     'last_updated'], 'text'),
+    **dict.fromkeys(['required_documents', 'keywords', 'related_rights'], 'text list'),
+    'eligibility_criteria': 'object',
+    'exclusion_criteria': 'object',
+}
+
+CRITERIA_SCHEMA = {
+    **dict.fromkeys(NUMERIC_FIELDS, 'number'),
+    **dict.fromkeys(['disability_percentage', 'work_months_minimum', 'work_years_minimum'], 'number'),
+    **dict.fromkeys(STRICT_BOOLEAN_FIELDS, 'boolean'),
+    **dict.fromkeys(['children_under_18', 'need_daily_assistance', 'filed_disability_claim',
+                     'receiving_benefit', 'paid_income_tax', 'receiving_business_grants'], 'boolean'),
+    **dict.fromkeys(ENUM_FIELDS, 'text list'),
+    **dict.fromkeys(['marital_status', 'sector', 'housing_status', 'education'], 'text list'),
+    **dict.fromkeys(EXACT_VALUE_FIELDS, 'text'),
+    # Fields that must be answered 'כן' - a flag or the literal answer
+    **{key: 'text' if test('כן') else 'boolean' for key, test in REQUIRED_YES_FIELDS.items()},
+}
+
+
+def _problem(path: str, kind: str, value) -> str:
+    return f"{path}: expected {kind}, got {type(value).__name__} {repr(value)[:40]}"
+
+
+def _field_checks(schema: dict, source: str, prefix: str, indent: str) -> list:
+    lines = []
+    for key, kind in schema.items():
+        lines.append(f"{indent}v = {source}.get({key!r})")
+        lines.append(f"{indent}if v is not None and not {TYPE_TESTS[kind]}: "
+                     f"problems.append(problem({prefix + key!r}, {kind!r}, v))")
+    return lines
+
+
+def compile_validator(right_schema: dict = RIGHT_SCHEMA, criteria_schema: dict = CRITERIA_SCHEMA):
+    """Build validate(right) -> list of problems (empty when the entry is valid)"""
+    lines = [
+        "def validate(right):",
+        "    if type(right) is not dict:",
+        "        return ['not an object']",
+        "    problems = []",
+        "    if not right.get('name'):",
+        "        problems.append('name: missing')",
+    ]
+    lines += _field_checks(right_schema, 'right', '', '    ')
+    lines += [
+        "    criteria = right.get('eligibility_criteria')",
+        "    if type(criteria) is dict:",
+    ]
+    lines += _field_checks(criteria_schema, 'criteria', 'eligibility_criteria.', '        ')
+    lines.append("    return problems")
+
+    namespace = {'problem': _problem}
+    exec(compile("\n".join(lines) + "\n", '<catalog validator>', 'exec'), namespace)
+    return namespace['validate']
+
+
+check_right = compile_validator()
+
+
+def normalize_right(right: dict) -> dict:
+    """Trim the display texts and turn a single enum value into a list (a copy only if something changed)"""
+    if not isinstance(right, dict):
+        return right
+    changes = {}
+    for key in TRIMMED_FIELDS:
+        value = right.get(key)
+        if isinstance(value, str) and value != value.strip():
+            changes[key] = value.strip()
+
+    criteria = right.get('eligibility_criteria')
+    if isinstance(criteria, dict):
+        listed = {key: [criteria[key]] for key in ENUM_FIELDS if isinstance(criteria.get(key), str)}
+        if listed:
+            changes['eligibility_criteria'] = {**criteria, **listed}
+    return {**right, **changes} if changes else right
+
+
+def entry_label(right) -> str:
+    if isinstance(right, dict):
+        return repr(right.get('id') or right.get('name'))
+    return repr(right)[:40]
+
+
+def prepare_right(right: dict, rejected=None):
+    """The normalized entry, or None (with a warning) when it fails validation.
+
+    Rejected entries are also appended to the rejected list, as (label, problems), when one is given.
+    """
+    right = normalize_right(right)
+    problems = check_right(right)
+    if problems:
+        print(f"Skipping catalog entry {entry_label(right)}: {'; '.join(problems)}")
+        if rejected is not None:
+            rejected.append((entry_label(right), problems))
+        return None
+    return right
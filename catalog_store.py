@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SQLite catalog store - optional backend for the rights catalog
+אחסון קטלוג הזכויות ב-SQLite - עריכות בטרנזקציות במקום שכתוב של כל הקובץ
+
+Set RIGHTS_CATALOG=rights_data.db to load the catalog from here instead of
+rights_data.json. Each right keeps its full entry as JSON, plus indexed
+columns for the numeric and yes/no criteria, a (field, value) table for
+the enum lists, an FTS5 index over name, description and keywords, and a
+version that every edit bumps.
+
+A snapshot loaded from the store matches through StoreCandidates: the
+candidate query runs on the indexed columns instead of RightsIndex, and
+its store positions (which keep gaps after deletes) are mapped to the
+snapshot's record numbers.
+
+    python catalog_store.py import rights_data.json rights_data.db
+    python catalog_store.py search rights_data.db "נכות"
+"""
+
+import sys
+import json
+import sqlite3
+import pathlib
+from datetime import datetime
+
+from eligibility_rules import (
+    ENUM_FIELDS, STRICT_BOOLEAN_FIELDS, NUMERIC_FIELDS, is_constraining, is_regular_criteria,
+)
+from profile_features import ProfileFeatures
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS rights (
+    position INTEGER PRIMARY KEY,
+    id TEXT,
+    name TEXT NOT NULL,
+    category TEXT,
+    amount_estimation TEXT,
+    {''.join(f'{key} REAL, ' for key in NUMERIC_FIELDS)}
+    {''.join(f'{key} INTEGER, ' for key in STRICT_BOOLEAN_FIELDS)}
+    regular INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rights_id ON rights(id);
+CREATE INDEX IF NOT EXISTS rights_age ON rights(age_min, age_max);
+CREATE INDEX IF NOT EXISTS rights_income ON rights(income_max);
+CREATE TABLE IF NOT EXISTS right_enums (
+    field TEXT NOT NULL,
+    value TEXT NOT NULL,
+    position INTEGER NOT NULL REFERENCES rights(position) ON DELETE CASCADE,
+    PRIMARY KEY (field, value, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS right_enums_position ON right_enums(position, field);
+CREATE TABLE IF NOT EXISTS catalog_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+INSERT OR IGNORE INTO catalog_version VALUES (1, 0, '');
+"""
+
+FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS rights_fts USING fts5(name, description, keywords)"
+
+
+def _row(position: int, right: dict) -> tuple:
+    """Column values for one catalog entry, and its constraining criteria"""
+    criteria = {key: value for key, value in (right.get('eligibility_criteria') or {}).items()
+                if is_constraining(key, value)}
+    row = {
+        'position': position,
+        'id': right.get('id'),
+        'name': right.get('name') or '',
+        'category': right.get('category'),
+        'amount_estimation': right.get('amount_estimation'),
+        # Irregular criteria cannot be indexed - those rights are always candidates
+        'regular': int(is_regular_criteria(criteria)),
+        'data': json.dumps(right, ensure_ascii=False),
+    }
+    for key in NUMERIC_FIELDS:
+        row[key] = criteria.get(key) or None  # 0 is ignored by the matcher
+    for key in STRICT_BOOLEAN_FIELDS:
+        row[key] = criteria.get(key) if row['regular'] else None
+    return row, criteria
+
+
+class CatalogStore:
+    """A catalog in one SQLite file"""
+
+    def __init__(self, path: str, readonly: bool = False):
+        self.path = path
+        if readonly:
+            # Queries only - nothing is created, and the file must already be a store
+            self.conn = sqlite3.connect(f"{pathlib.Path(path).absolute().as_uri()}?mode=ro", uri=True)
+            self.fts = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'rights_fts'").fetchone() is not None
+            return
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            try:
+                self.conn.execute(FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:
+                self.fts = False  # SQLite built without FTS5 - search falls back to LIKE
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def version(self) -> int:
+        return self.conn.execute("SELECT version FROM catalog_version").fetchone()[0]
+
+    def _bump_version(self):
+        self.conn.execute("UPDATE catalog_version SET version = version + 1, updated_at = ?",
+                          (datetime.now().isoformat(),))
+
+    def _write(self, position: int, right: dict):
+        row, criteria = _row(position, right)
+        columns = ', '.join(row)
+        self.conn.execute(f"INSERT OR REPLACE INTO rights ({columns}) VALUES ({', '.join('?' * len(row))})",
+                          list(row.values()))
+        self.conn.execute("DELETE FROM right_enums WHERE position = ?", (position,))
+        if row['regular']:
+            for field in ENUM_FIELDS:
+                values = criteria.get(field)
+                if values:
+                    self.conn.executemany("INSERT OR IGNORE INTO right_enums VALUES (?, ?, ?)",
+                                          [(field, value, position) for value in values])
+        if self.fts:
+            self.conn.execute("DELETE FROM rights_fts WHERE rowid = ?", (position,))
+            keywords = right.get('keywords') or []
+            self.conn.execute("INSERT INTO rights_fts (rowid, name, description, keywords) VALUES (?, ?, ?, ?)",
+                              (position, row['name'], right.get('description') or '',
+                               ' '.join(keywords) if isinstance(keywords, list) else str(keywords)))
+
+    def replace_all(self, rights: list):
+        """Replace the whole catalog in one transaction"""
+        with self.conn:
+            self.conn.execute("DELETE FROM rights")
+            if self.fts:
+                self.conn.execute("DELETE FROM rights_fts")
+            for position, right in enumerate(rights):
+                self._write(position, right)
+            self._bump_version()
+
+    def upsert(self, right: dict) -> int:
+        """Update the entry with this id in place, or append it. Returns its position"""
+        with self.conn:
+            found = self.conn.execute("SELECT MIN(position) FROM rights WHERE id = ?", (right.get('id'),)).fetchone()[0]
+            if found is None:
+                found = self.conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM rights").fetchone()[0]
+            self._write(found, right)
+            self._bump_version()
+        return found
+
+    def delete(self, right_id) -> int:
+        """Delete the entries with this id. Returns how many were removed"""
+        with self.conn:
+            positions = [p for p, in self.conn.execute("SELECT position FROM rights WHERE id = ?", (right_id,))]
+            for position in positions:
+                self.conn.execute("DELETE FROM rights WHERE position = ?", (position,))
+                if self.fts:
+                    self.conn.execute("DELETE FROM rights_fts WHERE rowid = ?", (position,))
+            if positions:
+                self._bump_version()
+        return len(positions)
+
+    def rights(self) -> list:
+        """All entries in catalog order"""
+        return [right for _, right in self.entries()]
+
+    def entries(self) -> list:
+        """(position, entry) for every right in catalog order - positions keep the gaps deletes leave"""
+        return [(position, json.loads(data))
+                for position, data in self.conn.execute("SELECT position, data FROM rights ORDER BY position")]
+
+    def candidate_positions(self, profile) -> list:
+        """Positions of rights the indexed criteria do not rule out (same guarantee as RightsIndex)"""
+        features = ProfileFeatures.of(profile)
+        conditions, params = [], []
+        if features.age is not None:
+            conditions.append("(age_min IS NULL OR age_min <= ?) AND (age_max IS NULL OR age_max >= ?)")
+            params += [features.age, features.age]
+        if features.income is not None:
+            conditions.append("(income_max IS NULL OR income_max >= ?)")
+            params.append(features.income)
+        for key in STRICT_BOOLEAN_FIELDS:
+            conditions.append(f"({key} IS NULL OR {key} = ?)")
+            params.append(int(key in features.affirmed))
+
+        answers = [('military_service', features.military)]
+        answers += [(field, value) for field, value in
+                    [('employment_status', features.employment), ('gender', features.gender)] if value]
+        for field, value in answers:
+            conditions.append("(NOT EXISTS (SELECT 1 FROM right_enums e WHERE e.position = r.position AND e.field = ?)"
+                              " OR EXISTS (SELECT 1 FROM right_enums e WHERE e.field = ? AND e.value = ? AND e.position = r.position))")
+            params += [field, field, value if isinstance(value, str) else None]
+
+        where = " AND ".join(conditions) or "1"
+        query = f"SELECT position FROM rights r WHERE regular = 0 OR ({where}) ORDER BY position"
+        return [position for position, in self.conn.execute(query, params)]
+
+    def search(self, text: str, limit: int = 10) -> list:
+        """Full-text search over name, description and keywords"""
+        if self.fts:
+            query = " ".join(f'"{word.replace(chr(34), "")}"*' for word in text.split())
+            if not query:
+                return []
+            rows = self.conn.execute(
+                "SELECT r.data FROM rights_fts f JOIN rights r ON r.position = f.rowid"
+                " WHERE rights_fts MATCH ? ORDER BY bm25(rights_fts) LIMIT ?", (query, limit))
+        else:
+            rows = self.conn.execute("SELECT data FROM rights WHERE name LIKE ? OR data LIKE ? LIMIT ?",
+                                     (f'%{text}%', f'%{text}%', limit))
+        return [json.loads(data) for data, in rows]
+
+
+class StoreCandidates:
+    """The store's candidate query for one snapshot loaded from it, in the snapshot's record numbers"""
+
+    def __init__(self, path: str, version: int, positions):
+        self.path = path
+        self.version = version  # store version the snapshot was read at
+        self.numbers = {position: number for number, position in enumerate(positions)}
+
+    def candidate_ids(self, profile):
+        """Record numbers the indexed criteria do not rule out, or None once the store has moved on"""
+        with CatalogStore(self.path, readonly=True) as store:
+            with store.conn:  # version and query read in one transaction
+                store.conn.execute("BEGIN")
+                if store.version() != self.version:
+                    return None
+                positions = store.candidate_positions(profile)
+        # Positions missing from the snapshot were quarantined at load
+        return [self.numbers[position] for position in positions if position in self.numbers]
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'import' and len(sys.argv) == 4:
+        with open(sys.argv[2], encoding='utf-8') as f:
+            rights = json.load(f)
+        with CatalogStore(sys.argv[3]) as store:
+            store.replace_all(rights)
+            print(f"✅ {len(rights)} זכויות נטענו ל-{sys.argv[3]} (גרסה {store.version()})")
+    elif command == 'search' and len(sys.argv) == 4:
+        with CatalogStore(sys.argv[2]) as store:
+            for right in store.search(sys.argv[3]):
+                print(f"- {right['name']}")
+    else:
+        print(__doc__)
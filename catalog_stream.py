@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Streaming reader for JSON catalogs - one right at a time
+קריאת קטלוג JSON בהזרמה - זכות אחת בכל פעם, בלי לטעון את כל המסמך
+
+json.load keeps the whole file text and the whole parsed tree in memory
+at once. These helpers read the top-level array in chunks and hand out
+each entry as soon as it is parsed, so the caller can compile it (or
+write it to the cold segment) and let the raw dict go.
+"""
+
+import io
+import json
+import hashlib
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_json_array(f, chunk_size: int = CHUNK_SIZE):
+    """Yield the items of the JSON array in text file f, parsing one item at a time"""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+
+    def more():
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+        return not eof
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer) or not more():
+                return buffer[pos] if pos < len(buffer) else ''
+
+    if skip_whitespace() != '[':
+        raise ValueError("Catalog must be a JSON array")
+    pos += 1
+    if skip_whitespace() == ']':
+        return
+
+    while True:
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if not more():
+                raise
+            continue
+        if (not eof and isinstance(item, (int, float))
+                and (end == len(buffer) or buffer[end] not in _WHITESPACE + ',]')):
+            more()
+            continue  # a number cut at the chunk edge - parse it again with what follows
+        pos = end
+        yield item
+
+        separator = skip_whitespace()
+        pos += 1
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError(f"Expected ',' or ']' in catalog array, got {separator!r}")
+        skip_whitespace()
+
+
+def iter_catalog(f, chunk_size: int = CHUNK_SIZE):
+    """Yield the catalog entries from binary file f (checked by the caller, see catalog_schema)"""
+    text = io.TextIOWrapper(f, encoding='utf-8')
+    try:
+        yield from iter_json_array(text, chunk_size)
+    finally:
+        text.detach()  # leave f open for the caller
+
+
+def file_sha1(f, chunk_size: int = CHUNK_SIZE) -> str:
+    """SHA-1 of binary file f read in chunks, leaving it positioned at the start"""
+    digest = hashlib.sha1()
+    f.seek(0)
+    for chunk in iter(lambda: f.read(chunk_size), b''):
+        digest.update(chunk)
+    f.seek(0)
+    return digest.hexdigest()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Column-store eligibility evaluator (requires numpy)
+מנוע התאמה וקטורי - בדיקת כל הקטלוג מול פרופיל אחד או רבים בבת אחת
+
+The catalog's eligibility criteria are stored as NaN-aware float columns
+(numeric limits), int8 codes (yes/no criteria) and boolean accept matrices
+(enum lists). Profiles are encoded into an N x F feature matrix, and
+evaluate() returns the N x R eligibility mask with the same semantics as
+gpt_response.check_eligibility_match.
+
+Rights whose criteria have unexpected types cannot be expressed as columns
+and are evaluated with the scalar fallback predicate instead.
+"""
+
+import numpy as np
+
+from eligibility_rules import (
+    ENUM_FIELDS, STRICT_BOOLEAN_FIELDS, REQUIRED_YES_FIELDS, EXACT_VALUE_FIELDS,
+    YES_FIELDS, HEURISTIC_FLAGS, is_regular_criteria,
+)
+from profile_features import ProfileFeatures
+
+NAN = float('nan')
+
+# Feature matrix layout
+FEATURES = (
+    ['age', 'income', 'service_missing', 'service_years', 'service_years_int',
+     'employment', 'employment_present', 'gender', 'gender_present', 'military',
+     'student_ok', 'unemployed_ok']
+    + [f'bool:{key}' for key in STRICT_BOOLEAN_FIELDS]
+    + [f'yes:{key}' for key in YES_FIELDS]
+    + [f'value:{key}' for key in EXACT_VALUE_FIELDS]
+    + [f'present:{key}' for key in EXACT_VALUE_FIELDS]
+)
+COLUMN = {name: i for i, name in enumerate(FEATURES)}
+
+
+class ColumnMatcher:
+    """Whole-catalog eligibility evaluation over columnar criteria"""
+
+    def __init__(self, records, fallback=None):
+        self.records = records
+        self.fallback = fallback
+        criteria_list = [r.criteria for r in records]
+        regular = [is_regular_criteria(c) for c in criteria_list]
+        self.fallback_ids = [i for i, ok in enumerate(regular) if not ok]
+        if self.fallback_ids and fallback is None:
+            raise ValueError(f"{len(self.fallback_ids)} rights need a scalar fallback predicate")
+        rows = [c if ok else {} for c, ok in zip(criteria_list, regular)]
+
+        def numeric(key):
+            return np.array([float(c[key]) if c.get(key) else NAN for c in rows], dtype=np.float64)
+
+        self.age_min = numeric('age_min')
+        self.age_max = numeric('age_max')
+        self.income_max = numeric('income_max')
+        self.service_min = numeric('service_length_years')
+
+        # Enum lists -> constrained flag + R x (V+1) accept matrix, last column for unknown values
+        self.vocab = {}
+        self.enum_constrained = {}
+        self.enum_accept = {}
+        for key in ENUM_FIELDS:
+            values = sorted({v for c in rows for v in (c.get(key) or [])})
+            vocab = {v: i for i, v in enumerate(values)}
+            accept = np.zeros((len(rows), len(values) + 1), dtype=bool)
+            constrained = np.zeros(len(rows), dtype=bool)
+            for i, c in enumerate(rows):
+                value = c.get(key)
+                if value and value != ['כל']:
+                    constrained[i] = True
+                    for v in value:
+                        accept[i, vocab[v]] = True
+            self.vocab[key] = vocab
+            self.enum_constrained[key] = constrained
+            self.enum_accept[key] = accept
+
+        # Strict yes/no criteria as int8: -1 unset, 0 requires no, 1 requires yes
+        self.strict = {
+            key: np.array([-1 if c.get(key) is None else int(c[key]) for c in rows], dtype=np.int8)
+            for key in STRICT_BOOLEAN_FIELDS
+        }
+        self.required_yes = {
+            key: np.array([bool(test(c.get(key))) for c in rows], dtype=bool)
+            for key, test in REQUIRED_YES_FIELDS.items()
+        }
+        self.grants_excluded = np.array([c.get('receiving_business_grants') == False for c in rows], dtype=bool)
+        self.child_needs_required = np.array([c.get('child_special_needs') == True for c in rows], dtype=bool)
+
+        self.value_vocab = {}
+        self.value_codes = {}
+        for key in EXACT_VALUE_FIELDS:
+            vocab = {v: i for i, v in enumerate(sorted({c[key] for c in rows if c.get(key)}))}
+            self.value_vocab[key] = vocab
+            self.value_codes[key] = np.array([vocab[c[key]] if c.get(key) else -1 for c in rows], dtype=np.int16)
+
+        self.flags = {
+            flag: np.array([ok and flag in r.flags for r, ok in zip(records, regular)], dtype=bool)
+            for flag in HEURISTIC_FLAGS
+        }
+
+    def encode_profile(self, profile) -> np.ndarray:
+        """Encode one profile as a feature row"""
+        features = ProfileFeatures.of(profile)
+        row = np.full(len(FEATURES), NAN)
+
+        for column in ['age', 'income', 'service_years', 'service_years_int']:
+            value = getattr(features, column)
+            if value is not None:
+                row[COLUMN[column]] = value
+        row[COLUMN['service_missing']] = features.service_missing
+
+        for key, column in [('employment_status', 'employment'), ('gender', 'gender')]:
+            value = getattr(features, column)
+            row[COLUMN[f'{column}_present']] = bool(value)
+            row[COLUMN[column]] = self._code(key, value)
+        row[COLUMN['military']] = self._code('military_service', features.military)
+
+        row[COLUMN['student_ok']] = features.student_ok
+        row[COLUMN['unemployed_ok']] = features.unemployed_ok
+
+        for key in STRICT_BOOLEAN_FIELDS:
+            row[COLUMN[f'bool:{key}']] = key in features.affirmed
+        for key in YES_FIELDS:
+            row[COLUMN[f'yes:{key}']] = key in features.yes
+        for key in EXACT_VALUE_FIELDS:
+            value = getattr(features, key)
+            row[COLUMN[f'present:{key}']] = bool(value)
+            try:
+                row[COLUMN[f'value:{key}']] = self.value_vocab[key].get(value, -2)
+            except TypeError:
+                row[COLUMN[f'value:{key}']] = -2
+        return row
+
+    def _code(self, key, value):
+        vocab = self.vocab[key]
+        try:
+            return vocab.get(value, len(vocab))
+        except TypeError:
+            return len(vocab)  # unhashable answers never appear in a criteria list
+
+    def encode_profiles(self, profiles) -> np.ndarray:
+        """Encode N profiles as an N x F feature matrix"""
+        if not profiles:
+            return np.empty((0, len(FEATURES)))
+        return np.vstack([self.encode_profile(p) for p in profiles])
+
+    def evaluate(self, features: np.ndarray, profiles=None) -> np.ndarray:
+        """Return the N x R eligibility mask for an N x F feature matrix.
+
+        `profiles` is only needed when some rights use the scalar fallback.
+        """
+        f = np.atleast_2d(features)
+
+        def col(name):
+            return f[:, COLUMN[name]][:, None]
+
+        def flag(name):
+            return col(name).astype(bool)
+
+        age = col('age')
+        reject = (age < self.age_min) | (age > self.age_max)
+        reject |= col('income') > self.income_max
+
+        military = f[:, COLUMN['military']].astype(np.intp)
+        reject |= self.enum_constrained['military_service'] & ~self.enum_accept['military_service'][:, military].T
+        for key, column in [('employment_status', 'employment'), ('gender', 'gender')]:
+            codes = f[:, COLUMN[column]].astype(np.intp)
+            reject |= flag(f'{column}_present') & self.enum_constrained[key] & ~self.enum_accept[key][:, codes].T
+
+        needs_service = ~np.isnan(self.service_min)
+        reject |= needs_service & (flag('service_missing') | (col('service_years') < self.service_min))
+        reject |= col('service_years_int') < self.service_min
+
+        for key in STRICT_BOOLEAN_FIELDS:
+            codes = self.strict[key]
+            reject |= (codes >= 0) & (codes != col(f'bool:{key}'))
+        for key, required in self.required_yes.items():
+            reject |= required & ~flag(f'yes:{key}')
+        reject |= self.grants_excluded & flag('yes:receiving_business_grants')
+        for key in EXACT_VALUE_FIELDS:
+            codes = self.value_codes[key]
+            reject |= (codes >= 0) & flag(f'present:{key}') & (codes != col(f'value:{key}'))
+
+        disabled = flag('yes:recognized_disability')
+        has_children = flag('yes:has_children')
+        health = flag('yes:health_issue')
+        reject |= self.flags['requires_disability'] & ~disabled
+        reject |= self.child_needs_required & ~has_children
+        reject |= self.flags['student_only'] & ~flag('student_ok')
+        reject |= self.flags['course'] & (col('age') > 45) & ~flag('unemployed_ok')
+        reject |= self.flags['unemployed_only'] & ~flag('unemployed_ok')
+        reject |= self.flags['work_injury_only'] & ~flag('yes:injured_in_service') & ~flag('yes:work_injury')
+        reject |= self.flags['medical_expenses'] & ~health & ~has_children & ~disabled
+        reject |= self.flags['treatment_travel'] & ~health & ~disabled
+
+        mask = ~reject
+        if self.fallback_ids:
+            if profiles is None:
+                raise ValueError("profiles are required to evaluate fallback rights")
+            for n, profile in enumerate(profiles):
+                for i in self.fallback_ids:
+                    record = self.records[i]
+                    mask[n, i] = bool(self.fallback(profile, record.criteria, record.data, record.flags))
+        return mask
+
+    def match(self, profile: dict) -> np.ndarray:
+        """Return the length-R eligibility mask for one profile"""
+        return self.evaluate(self.encode_profile(profile), [profile])[0]
+
+    def match_many(self, profiles) -> np.ndarray:
+        """Return the N x R eligibility mask for a list of profiles"""
+        return self.evaluate(self.encode_profiles(profiles), profiles)
+
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Declarative questionnaire conditions - field/op/value trees compiled to Python
+תנאי שאלון הצהרתיים - עצים של שדה/פעולה/ערך שמהודרים לפייתון
+
+A condition is plain JSON, so it can be indexed, cached and sent to a client:
+
+    {"field": "num_children", "read": "int", "op": "gt", "value": 0}
+    {"any": [<condition>, ...]}   {"all": [<condition>, ...]}   {"not": <condition>}
+
+"read" says how the answer is taken before the op is applied:
+    raw       the answer as given, None when missing (default)
+    str       str(answer), '' when missing
+    strip     the same, stripped
+    fold      the same, stripped and lower-cased
+    int       int(answer)
+    int_list  comma-separated integers, e.g. "5, 8, 12" (text answers only)
+A leaf whose answer cannot be read as int / int_list is false.
+
+Ops: eq, ne, in, not_in, gt, ge, lt, le, answered (the value is truthy)
+and any_lt (some item of a list is smaller than value).
+
+CompiledConditions compiles the conditions of a list of question blocks
+into one generated function each, the same way predicate_compiler builds
+the matchers. It also indexes the blocks by the fields their condition
+reads, so after an answer only the blocks that read that field are
+evaluated again.
+"""
+
+import json
+import functools
+
+READS = {
+    'raw': "p.get({field!r})",
+    'str': "str(p.get({field!r}, ''))",
+    'strip': "str(p.get({field!r}, '')).strip()",
+    'fold': "str(p.get({field!r}, '')).strip().lower()",
+    'int': "as_int(p.get({field!r}))",
+    'int_list': "as_int_list(p.get({field!r}))",
+}
+
+# Reads that may fail - the leaf is false when they return UNREADABLE
+FALLIBLE_READS = {'int', 'int_list'}
+
+# Ops, with v the answer as read and value the condition's value
+
+OPS = {
+    'eq': "v == {value}",
+    'ne': "v != {value}",
+    'in': "v in {value}",
+    'not_in': "v not in {value}",
+    'gt': "v > {value}",
+    'ge': "v >= {value}",
+    'lt': "v < {value}",
+    'le': "v <= {value}",
+    'answered': "bool(v)",
+    'any_lt': "any(x < {value} for x in v)",
+}
+
+UNREADABLE = object()
+
+
+def as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return UNREADABLE
+
+
+def as_int_list(value):
+    if not isinstance(value, str):
+        return UNREADABLE
+    try:
+        return [int(item.strip()) for item in value.split(',')]
+    except ValueError:
+        return UNREADABLE
+
+
+def condition_fields(condition) -> frozenset:
+    """Every answer the condition reads"""
+    if 'field' in condition:
+        return frozenset([condition['field']])
+    if 'not' in condition:
+        return condition_fields(condition['not'])
+    return frozenset().union(*(condition_fields(c) for c in condition.get('all', condition.get('any', []))))
+
+
+def _expression(condition, constants: dict) -> str:
+    """Python expression for the condition over answers p"""
+    if 'all' in condition or 'any' in condition:
+        joiner, parts = (' and ', condition['all']) if 'all' in condition else (' or ', condition['any'])
+        if not parts:
+            return 'True' if joiner == ' and ' else 'False'
+        return '(' + joiner.join(_expression(c, constants) for c in parts) + ')'
+    if 'not' in condition:
+        return f"(not {_expression(condition['not'], constants)})"
+
+    read = condition.get('read', 'raw')
+    op = condition.get('op')
+    if read not in READS or op not in OPS or not isinstance(condition.get('field'), str):
+        raise ValueError(f"Invalid condition: {json.dumps(condition, ensure_ascii=False)}")
+    value = condition.get('value')
+    name = f'K{len(constants)}'
+    constants[name] = tuple(value) if isinstance(value, list) else value
+    test = OPS[op].format(value=name)
+    reader = READS[read].format(field=condition['field'])
+    if read in FALLIBLE_READS:
+        return f"((v := {reader}) is not UNREADABLE and {test})"
+    return f"((v := {reader}) is v and {test})"
+
+
+def compile_conditions(conditions: list) -> list:
+    """One function per condition, compiled together - each takes the answers dict"""
+    constants = {}
+    sources = [f"def condition_{i}(p):\n    return {_expression(c, constants)}\n"
+               for i, c in enumerate(conditions)]
+    namespace = {**constants, 'as_int': as_int, 'as_int_list': as_int_list, 'UNREADABLE': UNREADABLE}
+    exec(compile("\n".join(sources), '<questionnaire conditions>', 'exec'), namespace)
+    return [namespace[f'condition_{i}'] for i in range(len(conditions))]
+
+
+@functools.lru_cache(maxsize=256)
+def _compiled(key: str):
+    return compile_conditions([json.loads(key)])[0]
+
+
+def holds(condition, profile: dict) -> bool:
+    """Evaluate one condition (compiled once per distinct condition)"""
+    return _compiled(json.dumps(condition, sort_keys=True, ensure_ascii=False))(profile)
+
+
+class CompiledConditions:
+    """The conditions of a list of question blocks, with the blocks indexed by the fields they read"""
+
+    def __init__(self, blocks: list):
+        self.blocks = blocks
+        self.tests = compile_conditions([block['condition'] for block in blocks])
+        self.depends = {}  # field -> indices of the blocks whose condition reads it
+        for i, block in enumerate(blocks):
+            for field in condition_fields(block['condition']):
+                self.depends.setdefault(field, []).append(i)
+
+    def evaluate(self, profile: dict) -> list:
+        """Whether each block's condition holds"""
+        return [test(profile) for test in self.tests]
+
+    def reevaluate(self, active: list, profile: dict, changed) -> list:
+        """active (from evaluate) updated for a profile that differs from the last one only in changed fields"""
+        affected = {i for field in changed for i in self.depends.get(field, ())}
+        if not affected:
+            return active
+        active = list(active)
+        for i in affected:
+            active[i] = self.tests[i](profile)
+        return active
+
+    def to_json(self) -> list:
+        """The blocks as JSON - conditions and questions, without the questions' Python validators"""
+        return [{'condition': block['condition'],
+                 'questions': [{k: v for k, v in q.items() if not callable(v)} for q in block['questions']]}
+                for block in self.blocks]
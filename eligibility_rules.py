@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Shared eligibility rule tables for the compiled matchers
+טבלאות כללי הזכאות המשותפות למנועי ההתאמה
+
+These mirror the gates of gpt_response.check_eligibility_match so the
+faster engines (index, bitsets, compiled predicates, columns) stay in step with it.
+"""
+
+import re
+
+TRUE_ANSWERS = ['כן', 'true', 'yes']
+
+ENUM_FIELDS = ['employment_status', 'gender', 'military_service']
+
+STRICT_BOOLEAN_FIELDS = [
+    'recognized_disability',
+    'health_issue',
+    'has_children',
+    'child_special_needs',
+    'is_new_immigrant',
+    'injured_in_service',
+]
+
+# criteria key -> test for the criterion being set; the profile answer for the same key must then be exactly 'כן'
+REQUIRED_YES_FIELDS = {
+    'paid_courses': lambda v: v == True,
+    'medical_expense_receipts': lambda v: v == True,
+    'business_decline': lambda v: v == True,
+    'paying_afterschool': lambda v: v == 'כן',
+    'children_transportation': lambda v: v == 'כן',
+}
+
+EXACT_VALUE_FIELDS = ['children_school_type', 'disability_type']
+
+# Answers compared with == 'כן' anywhere in the matcher
+YES_FIELDS = [
+    'paid_courses', 'medical_expense_receipts', 'business_decline', 'receiving_business_grants',
+    'paying_afterschool', 'children_transportation', 'recognized_disability', 'has_children',
+    'injured_in_service', 'work_injury', 'health_issue',
+]
+
+HEBREW_NUMBERS = {'אחת': 1, 'שתיים': 2, 'שלוש': 3, 'ארבע': 4, 'חמש': 5, 'שש': 6, 'שבע': 7, 'שמונה': 8, 'תשע': 9, 'עשר': 10, 'אחת עשרה': 11, 'שתים עשרה': 12, 'שלוש עשרה': 13, 'ארבע עשרה': 14, 'חמש עשרה': 15, 'עשרים': 20}
+
+NUMERIC_FIELDS = ['age_min', 'age_max', 'income_max', 'service_length_years']
+
+
+def first_number(text: str):
+    """Return the first integer in the text, or None"""
+    numbers = re.findall(r'\d+', text)
+    return int(numbers[0]) if numbers else None
+
+
+def is_constraining(key: str, value) -> bool:
+    """False for criteria that can never reject a profile: None, and ['כל'] where the matcher reads it as "anyone".
+
+    For strict yes/no, exact-value and numeric keys a list is a real (if odd)
+    constraint, so ['כל'] is kept there.
+    """
+    if value is None:
+        return False
+    if value == ['כל'] and key not in STRICT_BOOLEAN_FIELDS + EXACT_VALUE_FIELDS + NUMERIC_FIELDS:
+        return False
+    return True
+
+
+def is_regular_criteria(criteria: dict) -> bool:
+    """Check the criteria only use the types the compiled matchers can express"""
+    for key in NUMERIC_FIELDS:
+        value = criteria.get(key)
+        if value and not isinstance(value, (int, float)):
+            return False
+    for key in ENUM_FIELDS:
+        value = criteria.get(key)
+        if value and not (isinstance(value, list) and all(isinstance(v, str) for v in value)):
+            return False
+    for key in STRICT_BOOLEAN_FIELDS:
+        value = criteria.get(key)
+        if value is not None and not isinstance(value, bool):
+            return False
+    for key in EXACT_VALUE_FIELDS:
+        value = criteria.get(key)
+        if value and not isinstance(value, str):
+            return False
+    return True
+
+
+HEURISTIC_FLAGS = ['requires_disability', 'student_only', 'course', 'unemployed_only',
+                   'work_injury_only', 'medical_expenses', 'treatment_travel']
+
+
+def heuristic_flags(criteria: dict, right: dict) -> frozenset:
+    """Name/keyword based categories used by the tail of check_eligibility_match.
+
+    Computed once per right at catalog load (Right.flags) - these substring
+    scans used to run for every right on every request.
+    """
+    name = str(right.get('name', ''))
+    flags = set()
+    if ('נכות' in criteria.get('keywords', []) or 'נכה' in str(criteria) or
+            'נכים' in name or 'נכות' in name or 'נפגעי' in name or 'מוגבלויות' in name or
+            'שיפוץ לבעלי מוגבלויות' in name or criteria.get('recognized_disability') == True):
+        flags.add('requires_disability')
+    if 'סטודנט' in name or 'מלגה' in name:
+        flags.add('student_only')
+    if 'קורס' in name or 'הכשר' in name:
+        flags.add('course')
+    if ('מובטל' in name or 'הכנסה מבטחת' in name or 'מענקי עידוד' in name or
+            'שיקום תעסוקתי' in name or 'יציאה לעצמאות' in name):
+        flags.add('unemployed_only')
+    if 'תאונת עבודה' in name or 'מחלה מקצועית' in name or 'נפגע עבודה' in name:
+        flags.add('work_injury_only')
+    if 'הוצאות רפואיות' in name:
+        flags.add('medical_expenses')
+    if 'החזרי נסיעות' in name and 'טיפול' in name:
+        flags.add('treatment_travel')
+    return frozenset(flags)
+
+
+# Profile answers each heuristic flag reads
+FLAG_PROFILE_FIELDS = {
+    'requires_disability': ['recognized_disability'],
+    'student_only': ['employment_status'],
+    'course': ['age', 'employment_status'],
+    'unemployed_only': ['employment_status'],
+    'work_injury_only': ['injured_in_service', 'work_injury'],
+    'medical_expenses': ['health_issue', 'has_children', 'recognized_disability'],
+    'treatment_travel': ['health_issue', 'recognized_disability'],
+}
+
+
+def criterion_fields(key, value) -> list:
+    """Profile answers the matcher reads for one criterion, mirroring when each gate is active"""
+    if key in ('age_min', 'age_max'):
+        return ['age'] if value else []
+    if key == 'income_max':
+        return ['avg_monthly_income'] if value else []
+    if key == 'service_length_years':
+        return ['service_length_years'] if value else []
+    if key in ENUM_FIELDS:
+        if not value or value == ['כל']:
+            return []
+        return ['military_or_national_service', 'military_service'] if key == 'military_service' else [key]
+    fields = []
+    if key in STRICT_BOOLEAN_FIELDS:
+        fields.append(key)
+    if key == 'child_special_needs' and value == True:
+        fields.append('has_children')
+    if key in REQUIRED_YES_FIELDS and REQUIRED_YES_FIELDS[key](value):
+        fields.append(key)
+    if key == 'receiving_business_grants' and value == False:
+        fields.append(key)
+    if key in EXACT_VALUE_FIELDS and value:
+        fields.append(key)
+    return fields
+
+
+def profile_fields(records) -> tuple:
+    """Return the sorted profile keys that can change the match result for these rights.
+
+    Criteria the matcher ignores (e.g. 'sector', or ['כל'] lists) add nothing.
+    """
+    fields = set()
+    for right in records:
+        for key, value in right.criteria.items():
+            fields.update(criterion_fields(key, value))
+        for flag in right.flags:
+            fields.update(FLAG_PROFILE_FIELDS[flag])
+    return tuple(sorted(fields))
@@ -1,52 +1,161 @@
 import os
+import gc
 import json
+import heapq
 from openai import OpenAI
 from dotenv import load_dotenv
 from adaptive_questionnaire import get_relevant_questions, estimate_completion_percentage, convert_to_old_format
 from rights_validator import RightsValidator, create_validation_report
+from rights_catalog import Right, get_catalog_snapshot
+from catalog_index import RightsIndex
+from bitset_matcher import BitsetMatcher
+from predicate_compiler import CompiledPredicates
+from profile_features import ProfileFeatures
+from eligibility_rules import heuristic_flags, profile_fields
+from amounts import has_significant_value, extract_max_amount, parse_amount_range, format_amount_nicely
+from match_cache import MatchCache, profile_key as match_key
+from candidate_sets import CandidateSet, FieldGates
+from question_scheduler import schedule_questions
+from questionnaire import BASIC_QUESTIONS, CONDITIONAL_CONDITIONS, SECONDARY_CONDITIONS
+from name_similarity import is_near_duplicate, name_tokens, token_similarity
 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Results of filter_matching_rights, shared by profiles with the same eligibility-relevant answers
+match_cache = MatchCache(maxsize=int(os.getenv("MATCH_CACHE_SIZE", "1024")),
+                         ttl=float(os.getenv("MATCH_CACHE_TTL", "600")))
+
+# Rights each questionnaire session can still match, by the client's session_id
+session_candidates = MatchCache(maxsize=int(os.getenv("SESSION_CACHE_SIZE", "4096")),
+                                ttl=float(os.getenv("SESSION_CACHE_TTL", "1800")))
+
+# One validator per process - its rules are read-only
+validator = RightsValidator()
+
 def load_rights_catalog():
-    """Load the rights catalog from JSON file"""
-    try:
-        with open('rights_data.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print("Rights catalog file not found")
-        return []
-
-def filter_matching_rights(profile: dict, min_value_threshold=500):
-    """Filter rights that match the user profile and have significant value"""
-    rights_catalog = load_rights_catalog()
+    """Load the rights catalog (cached per process, reloaded when the file changes)"""
+    return get_catalog_snapshot().rights
+
+def build_bitsets(records) -> BitsetMatcher:
+    return BitsetMatcher(records, check_eligibility_match)
+
+def compile_predicates(records) -> CompiledPredicates:
+    return CompiledPredicates(records, check_eligibility_match)
+
+def build_field_gates(records) -> FieldGates:
+    return FieldGates(records, check_eligibility_match)
+
+def preload_catalog(freeze: bool = True):
+    """Load the catalog and build everything matching needs, before workers fork.
+
+    Called in the master of a pre-forked server (gunicorn --preload, see
+    gunicorn.conf.py). With freeze the loaded objects are moved out of the
+    garbage collector's generations (gc.freeze), so collections in the
+    workers never write to their pages and every worker keeps sharing the
+    master's physical copy instead of duplicating it.
+    """
+    snapshot = get_catalog_snapshot()
+    snapshot.derived('profile_fields', profile_fields)
+    snapshot.derived('index', RightsIndex)
+    snapshot.derived('bitsets', build_bitsets)
+    snapshot.derived('predicates', compile_predicates)
+    snapshot.derived('field_gates', build_field_gates)
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    return snapshot
+
+def narrow_candidates(session_id: str, profile: dict, min_value_threshold=500) -> CandidateSet:
+    """Narrow the session's candidate rights by the answers added since its last call"""
+    snapshot = get_catalog_snapshot()
+    gates = snapshot.derived('field_gates', build_field_gates)
+    candidates = session_candidates.get(session_id)
+    if (candidates is None or candidates.version != snapshot.version
+            or candidates.threshold != min_value_threshold or candidates.changed(profile)):
+        candidates = CandidateSet(snapshot, min_value_threshold)
+    candidates.update(gates, profile)
+    session_candidates.put(session_id, candidates)
+    return candidates
+
+def schedule_next_questions(profile: dict, candidates: CandidateSet) -> list:
+    """The session's pending questions, the one that narrows its candidates most first (question_scheduler)"""
+    snapshot = get_catalog_snapshot()
+    if candidates.version != snapshot.version:
+        return get_relevant_questions(profile)
+    return schedule_questions(profile, candidates, snapshot.derived('field_gates', build_field_gates))
+
+def filter_matching_rights(profile: dict, min_value_threshold=500, candidates: CandidateSet = None):
+    """Filter rights that match the user profile and have significant value
+    
+    With the session's candidates (narrow_candidates) only the surviving rights are checked.
+    """
+    snapshot = get_catalog_snapshot()
+    fields = snapshot.derived('profile_fields', profile_fields)
+    key = (snapshot.version, min_value_threshold, match_key(profile, fields))
+    
+    rights = match_cache.get(key)
+    if rights is None:
+        rights = _match_rights(snapshot, profile, min_value_threshold, candidates)
+        match_cache.put(key, rights)
+    return list(rights)
+
+def _match_rights(snapshot, profile: dict, min_value_threshold, candidates: CandidateSet = None):
+    """Run the matchers over one catalog snapshot (uncached)"""
+    index = snapshot.derived('index', RightsIndex)
+    bitsets = snapshot.derived('bitsets', build_bitsets)
+    predicates = snapshot.derived('predicates', compile_predicates).predicates
+    features = ProfileFeatures(profile)
+    bits = bitsets.encode_profile(features).bits
     matching_rights = []
     
-    for right in rights_catalog:
-        eligibility = right.get('eligibility_criteria', {})
+    # Only rights the session's answers or the index could not rule out go through the full check
+    if (candidates is not None and candidates.version == snapshot.version
+            and candidates.threshold == min_value_threshold):
+        candidate_ids = sorted(candidates.positions)
+    else:
+        candidate_ids = None
+        if snapshot.load_stats.get('source') == 'sqlite':
+            # Catalog read from a SQLite store - its indexed columns answer the query (None once it was edited)
+            candidate_ids = snapshot.derived('store_index', None).candidate_ids(features)
+        if candidate_ids is None:
+            candidate_ids = index.candidate_ids(features)
+    for i in candidate_ids:
+        right = snapshot.records[i]
         
-        # Skip rights with empty or overly broad criteria
-        if not has_specific_criteria(eligibility):
+        # Check if right has significant monetary value (pre-parsed at catalog load)
+        if right.value_floor is not None and right.value_floor < min_value_threshold:
             continue
         
-        # Check basic criteria matching
-        if not check_eligibility_match(profile, eligibility, right):
+        # Skip rights with empty or overly broad criteria
+        if not has_specific_criteria(right.criteria):
             continue
-            
-        # Check if right has significant monetary value
-        amount = right.get('amount_estimation', '')
-        if not has_significant_value(amount, min_value_threshold):
+        
+        # Check basic criteria matching - enum and yes/no gates by one mask AND, then the compiled predicate
+        if not bitsets.admits(i, bits) or not predicates[i](features):
             continue
             
         matching_rights.append(right)
     
-    # Remove duplicates and sort by value
-    unique_rights = remove_duplicate_rights(matching_rights)
+    # Remove duplicates (near-duplicate names precomputed at catalog load) and keep the highest-value ones
+    unique_rights = remove_duplicate_records(matching_rights)
+    top_rights = rank_rights(unique_rights, 5)  # Max 5 high-quality rights
     
-    # Sort by estimated value (highest first)
-    rights_sorted = sorted(unique_rights, key=lambda x: extract_max_amount(x.get('amount_estimation', '0')), reverse=True)
+    # Only the rights returned need their full entry (loaded from the cold segment)
+    return [right.data for right in top_rights]
+
+def rank_rights(rights: list, limit: int) -> list:
+    """Return the `limit` highest-value rights, highest first (equal amounts keep their order)
     
-    return rights_sorted[:5]  # Max 5 high-quality rights
+    Right records use the amount parsed at catalog load; for dicts the amount
+    string is parsed once and memoized (amounts.parse_amount).
+    """
+    return heapq.nlargest(limit, rights, key=_amount_key)
+
+def _amount_key(right) -> float:
+    if isinstance(right, Right):
+        return right.max_amount
+    return extract_max_amount(right.get('amount_estimation', '0'))
 
 def has_specific_criteria(criteria: dict) -> bool:
     """Check if the right has specific, meaningful criteria"""
@@ -61,6 +170,18 @@ def has_specific_criteria(criteria: dict) -> bool:
     # Accept rights with at least 1 meaningful criterion OR rights that are completely general (for universal benefits)
     return True  # For now, let the eligibility matching do all the filtering
 
+def remove_duplicate_records(records: list) -> list:
+    """Keep each catalog record unless a near-duplicate of it was already kept (single pass)"""
+    unique_records = []
+    kept = set()
+    
+    for record in records:
+        if record.duplicates.isdisjoint(kept):
+            unique_records.append(record)
+            kept.add(record.position)
+    
+    return unique_records
+
 def remove_duplicate_rights(rights: list) -> list:
     """Remove duplicate rights based on name similarity"""
     unique_rights = []
@@ -71,7 +192,7 @@ def remove_duplicate_rights(rights: list) -> list:
         # Check for duplicate or very similar names
         is_duplicate = False
         for seen_name in seen_names:
-            if name in seen_name or seen_name in name or calculate_similarity(name, seen_name) > 0.8:
+            if is_near_duplicate(name, seen_name):
                 is_duplicate = True
                 break
         
@@ -83,21 +204,19 @@ def remove_duplicate_rights(rights: list) -> list:
 
 def calculate_similarity(str1: str, str2: str) -> float:
     """Simple similarity calculation"""
-    words1 = set(str1.split())
-    words2 = set(str2.split())
-    if not words1 or not words2:
-        return 0
-    intersection = words1.intersection(words2)
-    union = words1.union(words2)
-    return len(intersection) / len(union)
+    return token_similarity(name_tokens(str1), name_tokens(str2))
 
-def check_eligibility_match(profile: dict, criteria: dict, right: dict = None):
-    """Check if profile matches eligibility criteria - strict matching"""
+def check_eligibility_match(profile, criteria: dict, right: dict = None, flags: frozenset = None):
+    """Check if profile matches eligibility criteria - strict matching
+    
+    `profile` is the answers dict or its ProfileFeatures (parsed once per request).
+    Criteria come from the catalog loader, which validated their types (catalog_schema).
+    """
+    features = ProfileFeatures.of(profile)
     
     # Age check
-    age = profile.get('age')
-    if age and age.isdigit():
-        age = int(age)
+    age = features.age
+    if age is not None:
         age_min = criteria.get('age_min')
         age_max = criteria.get('age_max')
         if age_min and age < age_min:
@@ -107,22 +226,14 @@ def check_eligibility_match(profile: dict, criteria: dict, right: dict = None):
     
     # Income check - strict
     income_max = criteria.get('income_max')
-    user_income = profile.get('avg_monthly_income')
-    if income_max and user_income:
-        try:
-            # Extract numbers from income string (handle "10,000 שח" format)
-            import re
-            income_numbers = re.findall(r'\d+', str(user_income).replace(',', ''))
-            if income_numbers:
-                user_income_num = int(income_numbers[0])
-                if user_income_num > income_max:
-                    return False
-        except:
-            pass
+    # First number of the answer, e.g. "10,000 שח" -> 10000
+    user_income_num = features.income
+    if income_max and user_income_num is not None and user_income_num > income_max:
+        return False
     
     # Military service - very important check with exact matching
     military_criteria = criteria.get('military_service')
-    user_military = profile.get('military_or_national_service', profile.get('military_service', ''))
+    user_military = features.military
     if military_criteria and military_criteria != ['כל']:
         # Must have exact match in criteria list
         if user_military not in military_criteria:
@@ -131,26 +242,13 @@ def check_eligibility_match(profile: dict, criteria: dict, right: dict = None):
     # Service length check - critical for military pension rights
     service_length_years = criteria.get('service_length_years')
     if service_length_years:
-        user_service_years = profile.get('service_length_years', '')
-        if not user_service_years or str(user_service_years).strip() == '':
-            # If service length is required but not provided, reject
+        if features.service_missing:
+            # If service length is required but not provided (or can't be parsed), reject
             return False
         
-        try:
-            # Extract number from service length (e.g., "חמש" -> need conversion)
-            import re
-            numbers = re.findall(r'\d+', str(user_service_years))
-            if numbers:
-                user_years = int(numbers[0])
-            else:
-                # Handle Hebrew numbers
-                hebrew_to_num = {'אחת': 1, 'שתיים': 2, 'שלוש': 3, 'ארבע': 4, 'חמש': 5, 'שש': 6, 'שבע': 7, 'שמונה': 8, 'תשע': 9, 'עשר': 10, 'אחת עשרה': 11, 'שתים עשרה': 12, 'שלוש עשרה': 13, 'ארבע עשרה': 14, 'חמש עשרה': 15, 'עשרים': 20}
-                user_years = hebrew_to_num.get(user_service_years.strip(), 0)
-            
-            if user_years < service_length_years:
-                return False
-        except:
-            return False  # If can't parse, reject
+        # Years already extracted from the answer, Hebrew numbers included (e.g., "חמש" -> 5)
+        if features.service_years < service_length_years:
+            return False
     
     # Strict boolean criteria checks - must match exactly
     strict_boolean_checks = [
@@ -163,11 +261,10 @@ def check_eligibility_match(profile: dict, criteria: dict, right: dict = None):
     ]
     
     for profile_key, criteria_key in strict_boolean_checks:
-        profile_val = profile.get(profile_key)
         criteria_val = criteria.get(criteria_key)
         
         if criteria_val is not None:
-            profile_bool = str(profile_val).strip().lower() in ['כן', 'true', 'yes']
+            profile_bool = profile_key in features.affirmed
             if criteria_val != profile_bool:
                 return False
     
@@ -189,13 +286,9 @@ def check_eligibility_match(profile: dict, criteria: dict, right: dict = None):
     
     # Service length check for military pensions
     service_years_criteria = criteria.get('service_length_years')
-    user_service_years = profile.get('service_length_years')
-    if service_years_criteria and user_service_years:
-        try:
-            if int(user_service_years) < service_years_criteria:
-                return False
-        except:
-            pass
+    user_service_years = features.service_years_int
+    if service_years_criteria and user_service_years is not None and user_service_years < service_years_criteria:
+        return False
     
     # Paid courses check for tax deductions
     if criteria.get('paid_courses') == True and profile.get('paid_courses') != 'כן':
@@ -235,133 +328,61 @@ def check_eligibility_match(profile: dict, criteria: dict, right: dict = None):
         return False
     
     # Additional strict checks for common exclusions
+    # Name/keyword categories are precomputed per right at catalog load (Right.flags)
+    if flags is None:
+        flags = heuristic_flags(criteria, right or {})
+    
     # Don't give disability rights to non-disabled people
-    if ('נכות' in criteria.get('keywords', []) or 'נכה' in str(criteria) or 
-        'נכים' in str(right.get('name', '')) or 'נכות' in str(right.get('name', '')) or
-        'נפגעי' in str(right.get('name', '')) or 'מוגבלויות' in str(right.get('name', '')) or
-        'שיפוץ לבעלי מוגבלויות' in str(right.get('name', '')) or
-        criteria.get('recognized_disability') == True):
-        if profile.get('recognized_disability') != 'כן':
-            return False
+    if 'requires_disability' in flags and profile.get('recognized_disability') != 'כן':
+        return False
     
     # Don't give child-related rights to people without children
     if criteria.get('child_special_needs') == True and profile.get('has_children') != 'כן':
         return False
     
     # Don't give student rights to non-students
-    if ('סטודנט' in str(right.get('name', '')) or 'מלגה' in str(right.get('name', ''))):
-        # Only give to actual students
-        if profile.get('employment_status') not in ['סטודנט', 'לא עובד']:
-            return False
+    if 'student_only' in flags and profile.get('employment_status') not in ['סטודנט', 'לא עובד']:
+        return False
     
     # Don't give training courses to people over 45 unless unemployed
-    if ('קורס' in str(right.get('name', '')) or 'הכשר' in str(right.get('name', ''))):
-        age = profile.get('age')
-        if (age and age.isdigit() and int(age) > 45 and 
+    if 'course' in flags:
+        if (features.age is not None and features.age > 45 and 
             profile.get('employment_status') not in ['מובטל', 'לא עובד']):
             return False
     
     # Don't give unemployment benefits to employed people (but allow severance pay info)
-    if ('מובטל' in str(right.get('name', '')) or 
-        'הכנסה מבטחת' in str(right.get('name', '')) or 'מענקי עידוד' in str(right.get('name', '')) or
-        'שיקום תעסוקתי' in str(right.get('name', '')) or 'יציאה לעצמאות' in str(right.get('name', ''))):
-        if profile.get('employment_status') not in ['מובטל', 'לא עובד']:
-            return False
+    if 'unemployed_only' in flags and profile.get('employment_status') not in ['מובטל', 'לא עובד']:
+        return False
     
     # Special case: Severance pay is relevant for employed people to know their rights
     # (they don't get it now, but it's good to know for the future)
     
     # Don't give work injury benefits to people who haven't been injured
-    if ('תאונת עבודה' in str(right.get('name', '')) or 'מחלה מקצועית' in str(right.get('name', '')) or
-        'נפגע עבודה' in str(right.get('name', ''))):
+    if 'work_injury_only' in flags:
         if profile.get('injured_in_service') != 'כן' and profile.get('work_injury') != 'כן':
             return False
     
     # Only give medical expense rights to people with health issues or families
-    if ('הוצאות רפואיות' in str(right.get('name', '')) and 
+    if ('medical_expenses' in flags and 
         profile.get('health_issue') != 'כן' and 
         profile.get('has_children') != 'כן' and
         profile.get('recognized_disability') != 'כן'):
         return False
     
     # Only give travel reimbursement to people with ongoing medical treatment
-    if ('החזרי נסיעות' in str(right.get('name', '')) and 'טיפול' in str(right.get('name', ''))):
+    if 'treatment_travel' in flags:
         if (profile.get('health_issue') != 'כן' and 
             profile.get('recognized_disability') != 'כן'):
             return False
         
     return True
 
-def has_significant_value(amount_str: str, threshold: int):
-    """Check if the right has significant monetary value"""
-    if not amount_str or amount_str.lower() in ['משתנה', 'לא ידוע', '']:
-        return True  # Include unknown amounts for safety
-    
-    # Special handling for worker rights (always include)
-    if any(word in amount_str for word in ['ימי שכר', 'ימים', 'חודש שכר']):
-        return True
-        
-    # Extract numbers from amount string
-    import re
-    numbers = re.findall(r'\d+', amount_str.replace(',', ''))
-    if numbers:
-        # Take the highest number found
-        max_amount = max(int(num) for num in numbers)
-        return max_amount >= threshold
-    
-    return True  # Include if can't parse
-
-def extract_max_amount(amount_str: str) -> int:
-    """Extract maximum amount from amount string for sorting"""
-    if not amount_str:
-        return 0
-    
-    # Special handling for worker rights - estimate high value
-    if 'ימי שכר' in amount_str:
-        import re
-        numbers = re.findall(r'\d+', amount_str.replace(',', ''))
-        if numbers:
-            days = max(int(num) for num in numbers)
-            # Estimate: 28 days = ~30,000 NIS (average monthly salary)
-            return days * 1000  # Rough estimate
-    
-    if 'חודש שכר' in amount_str:
-        import re
-        numbers = re.findall(r'\d+', amount_str.replace(',', ''))
-        if numbers:
-            months = max(int(num) for num in numbers)
-            return months * 10000  # Average monthly salary estimate
-        else:
-            # If no number found but mentions "חודש שכר", assume 1 month per year of service (average 5 years)
-            return 50000  # Estimate for 5 months salary
-    
-    import re
-    numbers = re.findall(r'\d+', amount_str.replace(',', ''))
-    if numbers:
-        return max(int(num) for num in numbers)
-    return 0
-
-def parse_amount_range(amount_str: str) -> tuple:
-    """Parse amount string and return (min, max) tuple"""
-    if not amount_str or amount_str.lower() in ['משתנה', 'לא ידוע']:
-        return (0, 0)
-    
-    import re
-    numbers = re.findall(r'\d+', amount_str.replace(',', ''))
-    if numbers:
-        numbers = [int(num) for num in numbers]
-        if len(numbers) == 1:
-            return (numbers[0], numbers[0])
-        else:
-            return (min(numbers), max(numbers))
-    return (0, 0)
-
 def get_basic_rights_response(profile: dict) -> str:
     return "נמשיך לשאול מספר שאלות כדי שנוכל לבדוק את הזכויות שמגיעות לך."
 
-def get_detailed_rights_report(profile: dict, clarifications: list) -> str:
+def get_detailed_rights_report(profile: dict, clarifications: list, candidates: CandidateSet = None) -> str:
     # First, try to find matching rights in our catalog
-    matching_rights = filter_matching_rights(profile, min_value_threshold=500)
+    matching_rights = filter_matching_rights(profile, min_value_threshold=500, candidates=candidates)
     
     if len(matching_rights) > 0:
         # We found rights in catalog, use catalog data
@@ -374,14 +395,12 @@ def get_detailed_rights_report(profile: dict, clarifications: list) -> str:
 def generate_report_from_catalog(profile: dict, rights: list) -> str:
     """Generate clean and simple report based on catalog data"""
     
-    # Initialize validator
-    validator = RightsValidator()
-    
-    # Create validation report
-    validation_report = create_validation_report(rights, profile, validator)
+    # Parse the profile once for the validator and the per-right reasons
+    features = ProfileFeatures.of(profile)
     
-    # Sort by estimated value (highest first)
-    rights_sorted = sorted(rights, key=lambda x: extract_max_amount(x.get('amount_estimation', '0')), reverse=True)
+    # Create validation report (in display order, so entry i belongs to right i) - filter_matching_rights
+    # already returns the rights highest value first (rank_rights), so they are not sorted again
+    validation_report = create_validation_report(rights, features, validator)
     
     # Build clean report
     report_parts = []
@@ -391,7 +410,7 @@ def generate_report_from_catalog(profile: dict, rights: list) -> str:
     report_parts.append("")
     
     # Clean list of rights (max 3 for simplicity)
-    for i, right in enumerate(rights_sorted[:3], 1):
+    for i, right in enumerate(rights[:3], 1):
         amount = right.get('amount_estimation', 'לא ידוע')
         
         # Get validation confidence
@@ -405,7 +424,7 @@ def generate_report_from_catalog(profile: dict, rights: list) -> str:
             confidence_icon = "🔴"
         
         # Generate specific reason why this right applies to this user
-        reason = generate_eligibility_reason(profile, right)
+        reason = generate_eligibility_reason(features, right)
         
         # Simple, clean format with specific reason
         report_parts.append(f"{i}. {right['name']}")
@@ -416,7 +435,7 @@ def generate_report_from_catalog(profile: dict, rights: list) -> str:
         report_parts.append("")
     
     # Simple summary - use actual displayed count
-    displayed_count = min(len(rights_sorted), 3)
+    displayed_count = min(len(rights), 3)
     avg_confidence = validation_report['average_confidence']
     report_parts.append("📊 סיכום:")
     report_parts.append(f"נמצאו {displayed_count} זכויות רלוונטיות")
@@ -458,14 +477,15 @@ def get_right_emoji(right_name: str) -> str:
     else:
         return '💬'
 
-def generate_eligibility_reason(profile: dict, right: dict) -> str:
+def generate_eligibility_reason(profile, right: dict) -> str:
     """Generate specific reason why user is eligible for this right"""
+    features = ProfileFeatures.of(profile)
     reasons = []
     
     # Age-based reasons
     age = profile.get('age')
-    if age and age.isdigit():
-        age_num = int(age)
+    age_num = features.age
+    if age_num is not None:
         if age_num < 30:
             reasons.append(f"גיל צעיר ({age})")
         elif age_num > 60:
@@ -486,8 +506,8 @@ def generate_eligibility_reason(profile: dict, right: dict) -> str:
     
     # Income-based reasons
     income = profile.get('avg_monthly_income')
-    if income and income.replace(',', '').isdigit():
-        income_num = int(income.replace(',', ''))
+    income_num = features.income_exact
+    if income_num is not None:
         if income_num < 12000:
             reasons.append(f"הכנסה נמוכה ({income}₪)")
     
@@ -535,34 +555,6 @@ def generate_eligibility_reason(profile: dict, right: dict) -> str:
     else:
         return "עומד בתנאי הזכאות"
 
-def format_amount_nicely(amount_str: str) -> str:
-    """Format amount string nicely and concisely"""
-    if not amount_str or amount_str.lower() in ['משתנה', 'לא ידוע']:
-        return 'משתנה לפי מקרה'
-    
-    # Shorten very long descriptions
-    if len(amount_str) > 150:
-        # Extract key numbers and info
-        import re
-        numbers = re.findall(r'[\d,]+', amount_str)
-        if numbers:
-            main_amount = int(numbers[0].replace(',', ''))
-            if 'הלוואה' in amount_str:
-                return f"הלוואה עד {main_amount:,} ₪ בתנאים מועדפים"
-            elif 'הפקדה' in amount_str and 'מס' in amount_str:
-                return f"הטבת מס על הפקדות - חיסכון עד {main_amount:,} ₪"
-            elif 'פטור' in amount_str and 'מס' in amount_str:
-                return f"פטור ממס עד {main_amount:,} ₪ לשנה"
-            else:
-                return f"עד {main_amount:,} ₪"
-    
-    # Add currency symbol if missing
-    import re
-    if '₪' not in amount_str and 'ש"ח' not in amount_str and re.search(r'\d', amount_str):
-        amount_str += ' ₪'
-    
-    return amount_str
-
 def generate_report_with_web_search(profile: dict, clarifications: list, existing_rights: list) -> str:
     """Generate report using web search when catalog is insufficient"""
     clarifications_text = "\n".join(clarifications)
@@ -700,8 +692,8 @@ def generate_dynamic_questions(profile: dict) -> list:
             return [{"key": question["key"], "text": question["question"], "type": question.get("type"), "options": question.get("options")}]
 
     # שאלות מותנות
-    for block in CONDITIONAL_QUESTIONS:
-        if block["condition"](profile):
+    for block, active in zip(CONDITIONAL_CONDITIONS.blocks, CONDITIONAL_CONDITIONS.evaluate(profile)):
+        if active:
             for question in block["questions"]:
                 if isinstance(question, dict):
                     # New format: dictionary with key, question, type, options
@@ -720,8 +712,8 @@ def generate_dynamic_questions(profile: dict) -> list:
                         print(f"Error unpacking question: {question}, error: {e}")
                         continue
     # שאלות משניות
-    for block in SECONDARY_QUESTIONS:
-        if block["condition"](profile):
+    for block, active in zip(SECONDARY_CONDITIONS.blocks, SECONDARY_CONDITIONS.evaluate(profile)):
+        if active:
             for question in block["questions"]:
                 if isinstance(question, dict):
                     if not profile.get(question["key"]):
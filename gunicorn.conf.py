@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+"""
+Gunicorn settings - several workers sharing one copy of the rights catalog
+הגדרות gunicorn - כל ה-workers חולקים עותק אחד של קטלוג הזכויות
+
+    gunicorn app:app
+
+The app is imported once in the master (preload_app), which loads the
+compiled catalog, builds the index and matchers and freezes them
+(see preload_catalog in gpt_response.py). Workers are forked from it and
+share those pages copy-on-write; the full entries stay in the cold segment,
+a read-only mmap shared through the page cache. A catalog change after
+startup is picked up by each worker separately - restart the master to
+share the new one.
+"""
+
+import os
+
+bind = os.getenv("BIND", "127.0.0.1:5003")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+preload_app = True
+
+os.environ.setdefault("PRELOAD_CATALOG", "1")
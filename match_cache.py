@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Match result cache - LRU with TTL keyed by the eligibility-relevant answers
+מטמון תוצאות התאמה - LRU עם תפוגה, לפי התשובות שמשפיעות על הזכאות
+
+Sessions that differ only in fields no right reads (city, free text...)
+share one cache entry. The key also carries the catalog snapshot version,
+so a catalog reload never serves stale matches.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def profile_key(profile, fields) -> str:
+    """Canonical hash of the profile's answers for the given fields"""
+    projection = tuple((key, profile[key]) for key in fields if key in profile)
+    return hashlib.sha1(repr(projection).encode('utf-8')).hexdigest()
+
+
+class MatchCache:
+    """Bounded LRU of match results with a time-to-live and hit/miss/eviction counters"""
+
+    def __init__(self, maxsize=1024, ttl=600, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        """Return the cached value, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Counters for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
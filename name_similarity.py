@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Near-duplicate right names - computed once per catalog
+זיהוי שמות זכויות כמעט זהים - מחושב פעם אחת לכל קטלוג
+
+Two names are near-duplicates when one contains the other or their word
+sets overlap by more than 80% (Jaccard). The relation is not transitive
+('הנחה בארנונה' matches two longer names that do not match each other),
+so every right keeps its own set of near-duplicates rather than a single
+cluster id, and request-time dedup stays exactly first-kept-wins.
+"""
+
+import math
+from collections import Counter, defaultdict
+
+SIMILARITY_THRESHOLD = 0.8
+
+
+def name_tokens(name: str) -> frozenset:
+    return frozenset(name.split())
+
+
+def token_similarity(words1: frozenset, words2: frozenset) -> float:
+    """Jaccard similarity of two word sets"""
+    if not words1 or not words2:
+        return 0
+    return len(words1 & words2) / len(words1 | words2)
+
+
+def is_near_duplicate(name1: str, name2: str, words1=None, words2=None) -> bool:
+    if name1 in name2 or name2 in name1:
+        return True
+    if words1 is None:
+        words1 = name_tokens(name1)
+    if words2 is None:
+        words2 = name_tokens(name2)
+    return token_similarity(words1, words2) > SIMILARITY_THRESHOLD
+
+
+def _prefix_size(size: int) -> int:
+    """Words of a set (rarest first) that must include one shared word for Jaccard >= threshold"""
+    return size - math.ceil(SIMILARITY_THRESHOLD * size - 1e-9) + 1
+
+
+def near_duplicate_sets(names) -> tuple:
+    """For each name, the frozenset of positions of the other names it duplicates.
+
+    Only names that can qualify are compared. Jaccard > 0.8 needs a shared
+    word among the few rarest words of both names (prefix filtering), and
+    containing a name means containing its rarest three-character slice.
+    Names too short to slice are compared with everything (from their side).
+    """
+    names = [name.strip() for name in names]
+    tokens = [name_tokens(name) for name in names]
+    trigrams = [{name[k:k + 3] for k in range(len(name) - 2)} for name in names]
+    word_count = Counter(word for words in tokens for word in words)
+    prefixes = [sorted(words, key=lambda word: (word_count[word], word))[:_prefix_size(len(words))]
+                for words in tokens]
+
+    by_word, by_trigram = defaultdict(list), defaultdict(list)
+    for i in range(len(names)):
+        for word in prefixes[i]:
+            by_word[word].append(i)
+        for trigram in trigrams[i]:
+            by_trigram[trigram].append(i)
+
+    duplicates = [set() for _ in names]
+
+    def add(i, j):
+        duplicates[i].add(j)
+        duplicates[j].add(i)
+
+    for i, name in enumerate(names):
+        if not trigrams[i]:
+            for j, other in enumerate(names):
+                if j != i and is_near_duplicate(name, other, tokens[i], tokens[j]):
+                    add(i, j)
+            continue
+        # Names that contain this one
+        rarest = min(trigrams[i], key=lambda trigram: len(by_trigram[trigram]))
+        for j in by_trigram[rarest]:
+            if j != i and name in names[j]:
+                add(i, j)
+        # Word overlap - only sets of comparable size can pass the threshold
+        words, size = tokens[i], len(tokens[i])
+        for j in set().union(*(by_word[word] for word in prefixes[i])):
+            if (j != i and SIMILARITY_THRESHOLD * size < len(tokens[j]) < size / SIMILARITY_THRESHOLD
+                    and token_similarity(words, tokens[j]) > SIMILARITY_THRESHOLD):
+                add(i, j)
+    return tuple(frozenset(d) for d in duplicates)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Per-right predicate compiler for eligibility matching
+מהדר תנאי זכאות - פונקציית בדיקה ייעודית לכל זכות
+
+Each catalog entry's non-null criteria are turned into the source of one
+small Python function that contains only the checks that right needs, and
+the whole catalog is compiled with a single compile()/exec(). Predicates run
+against ProfileFeatures - the profile parsed once per request - and keep the
+semantics of gpt_response.check_eligibility_match.
+"""
+
+from eligibility_rules import STRICT_BOOLEAN_FIELDS, REQUIRED_YES_FIELDS, EXACT_VALUE_FIELDS, is_regular_criteria
+from profile_features import ProfileFeatures
+
+# Right.flags category -> ProfileFeatures test that must be true
+FLAG_REQUIREMENTS = {
+    'requires_disability': "'recognized_disability' in p.yes",
+    'student_only': 'p.student_ok',
+    'course': 'p.course_allowed',
+    'unemployed_only': 'p.unemployed_ok',
+    'work_injury_only': 'p.injury_reported',
+    'medical_expenses': 'p.medical_need',
+    'treatment_travel': 'p.treatment_need',
+}
+
+
+def _predicate_source(i: int, right, constants: dict) -> str:
+    """Return the source of the predicate for right number i"""
+    criteria = right.criteria
+    lines = []
+
+    def const(value):
+        name = f'K{len(constants)}'
+        constants[name] = value
+        return name
+
+    age_min, age_max = criteria.get('age_min'), criteria.get('age_max')
+    if age_min:
+        lines.append(f"if p.age is not None and p.age < {const(age_min)}: return False")
+    if age_max:
+        lines.append(f"if p.age is not None and p.age > {const(age_max)}: return False")
+    if criteria.get('income_max'):
+        lines.append(f"if p.income is not None and p.income > {const(criteria['income_max'])}: return False")
+
+    military = criteria.get('military_service')
+    if military and military != ['כל']:
+        lines.append(f"if p.military not in {const(tuple(military))}: return False")
+
+    service_min = criteria.get('service_length_years')
+    if service_min:
+        k = const(service_min)
+        lines.append(f"if p.service_missing or p.service_years < {k} or "
+                     f"(p.service_years_int is not None and p.service_years_int < {k}): return False")
+
+    for key in STRICT_BOOLEAN_FIELDS:
+        value = criteria.get(key)
+        if value is not None:
+            lines.append(f"if ({key!r} in p.affirmed) is not {value!r}: return False")
+
+    for key, attribute in [('employment_status', 'employment'), ('gender', 'gender')]:
+        value = criteria.get(key)
+        if value and value != ['כל']:
+            lines.append(f"if p.{attribute} is not None and p.{attribute} not in {const(tuple(value))}: return False")
+
+    for key, test in REQUIRED_YES_FIELDS.items():
+        if test(criteria.get(key)):
+            lines.append(f"if {key!r} not in p.yes: return False")
+    if criteria.get('receiving_business_grants') == False:
+        lines.append("if 'receiving_business_grants' in p.yes: return False")
+
+    for key in EXACT_VALUE_FIELDS:
+        value = criteria.get(key)
+        if value:
+            lines.append(f"if p.{key} is not None and p.{key} != {const(value)}: return False")
+
+    if criteria.get('child_special_needs') == True:
+        lines.append("if 'has_children' not in p.yes: return False")
+    for flag in sorted(right.flags):
+        lines.append(f"if not ({FLAG_REQUIREMENTS[flag]}): return False")
+
+    body = "".join(f"    {line}\n" for line in lines)
+    return f"def right_{i}(p):\n{body}    return True\n"
+
+
+class CompiledPredicates:
+    """One compiled predicate per right - built once per catalog snapshot"""
+
+    def __init__(self, records, fallback=None):
+        self.records = records
+        constants = {}
+        sources = []
+        fallback_ids = set()
+        for i, right in enumerate(records):
+            if is_regular_criteria(right.criteria):
+                sources.append(_predicate_source(i, right, constants))
+            else:
+                fallback_ids.add(i)
+        if fallback_ids and fallback is None:
+            raise ValueError(f"{len(fallback_ids)} rights need a scalar fallback predicate")
+
+        self.source = "\n".join(sources)
+        namespace = dict(constants)
+        exec(compile(self.source, '<rights predicates>', 'exec'), namespace)
+
+        self.predicates = []
+        for i, right in enumerate(records):
+            if i in fallback_ids:
+                self.predicates.append(_fallback_predicate(fallback, right))
+            else:
+                self.predicates.append(namespace[f'right_{i}'])
+
+    def match(self, profile) -> list:
+        """Return the records matching the profile, in catalog order"""
+        features = ProfileFeatures.of(profile)
+        return [r for r, predicate in zip(self.records, self.predicates) if predicate(features)]
+
+
+def _fallback_predicate(fallback, right):
+    def predicate(p):
+        return bool(fallback(p, right.criteria, right.data, right.flags))
+    return predicate
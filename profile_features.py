@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Profile normalization - parse the questionnaire answers once per request
+נרמול פרופיל - פענוח תשובות השאלון פעם אחת לכל בקשה
+"""
+
+import re
+
+from eligibility_rules import TRUE_ANSWERS, HEBREW_NUMBERS, first_number
+
+
+def parse_band(text):
+    """Parse a numeric answer or choice band into an inclusive (min, max) range.
+
+    'עד 4,000' -> (0, 4000), '4,000-8,000' -> (4000, 8000),
+    'מעל 20 שנים' -> (20, None), '5000' -> (5000, 5000), 'חמש' -> (5, 5)
+    """
+    if text is None:
+        return None
+    text = str(text).replace(',', '').strip()
+    numbers = [int(n) for n in re.findall(r'\d+', text)]
+    if not numbers:
+        if text in HEBREW_NUMBERS:
+            return (HEBREW_NUMBERS[text], HEBREW_NUMBERS[text])
+        return None
+    if 'עד' in text:
+        return (0, numbers[0])
+    if 'מעל' in text:
+        return (numbers[0], None)
+    if len(numbers) >= 2:
+        return (numbers[0], numbers[1])
+    return (numbers[0], numbers[0])
+
+
+class ProfileFeatures:
+    """Typed view of a profile - every matcher, the validator and the report use it.
+
+    Numeric fields keep the matcher's historic semantics (e.g. `income` is the
+    first number in the answer) while `income_range` / `service_range` give the
+    full band for code that needs it.
+    """
+
+    __slots__ = (
+        'profile', 'yes', 'affirmed',
+        'age', 'num_children', 'children_ages',
+        'income', 'income_exact', 'income_range',
+        'service_missing', 'service_years', 'service_years_int', 'service_range',
+        'employment', 'gender', 'military', 'children_school_type', 'disability_type',
+        'student_ok', 'unemployed_ok', 'course_allowed', 'injury_reported', 'medical_need', 'treatment_need',
+    )
+
+    def __init__(self, profile: dict):
+        self.profile = profile
+        # Answers given exactly as 'כן', and answers that read as yes in any form ('כן', 'true', 'Yes'...)
+        self.yes = frozenset(key for key, value in profile.items() if value == 'כן')
+        self.affirmed = frozenset(key for key, value in profile.items()
+                                  if str(value).strip().lower() in TRUE_ANSWERS)
+
+        age = profile.get('age')
+        self.age = int(age) if isinstance(age, str) and age.isdigit() else None
+        num_children = str(profile.get('num_children', '')).strip()
+        self.num_children = int(num_children) if num_children.isdigit() else None
+        try:
+            self.children_ages = [int(a.strip()) for a in profile['children_ages'].split(',')]
+        except (KeyError, AttributeError, ValueError):
+            self.children_ages = None
+
+        income = profile.get('avg_monthly_income')
+        self.income = first_number(str(income).replace(',', '')) if income else None
+        self.income_exact = None
+        if isinstance(income, str) and income.replace(',', '').isdigit():
+            self.income_exact = int(income.replace(',', ''))
+        self.income_range = parse_band(income) if income else None
+
+        service = profile.get('service_length_years', '')
+        self.service_missing = not service or str(service).strip() == ''
+        self.service_years = self.service_years_int = self.service_range = None
+        if not self.service_missing:
+            years = first_number(str(service))
+            if years is None:
+                if isinstance(service, str):
+                    years = HEBREW_NUMBERS.get(service.strip(), 0)
+                else:
+                    self.service_missing = True  # the matcher rejects values it cannot parse
+            self.service_years = years
+            try:
+                self.service_years_int = int(service)
+            except (TypeError, ValueError):
+                pass
+            self.service_range = parse_band(service)
+
+        self.employment = profile.get('employment_status') or None
+        self.gender = profile.get('gender') or None
+        self.military = profile.get('military_or_national_service', profile.get('military_service', ''))
+        self.children_school_type = profile.get('children_school_type') or None
+        self.disability_type = profile.get('disability_type') or None
+
+        # Derived answers used by the name-based exclusions
+        employment = profile.get('employment_status')
+        self.student_ok = employment in ['סטודנט', 'לא עובד']
+        self.unemployed_ok = employment in ['מובטל', 'לא עובד']
+        self.course_allowed = not (self.age is not None and self.age > 45 and not self.unemployed_ok)
+        self.injury_reported = 'injured_in_service' in self.yes or 'work_injury' in self.yes
+        self.medical_need = bool(self.yes & {'health_issue', 'has_children', 'recognized_disability'})
+        self.treatment_need = bool(self.yes & {'health_issue', 'recognized_disability'})
+
+    @classmethod
+    def of(cls, profile):
+        """Return the features for a raw profile dict, or the features themselves"""
+        return profile if isinstance(profile, cls) else cls(profile)
+
+    def get(self, key, default=None):
+        """Raw answer as given in the questionnaire"""
+        return self.profile.get(key, default)
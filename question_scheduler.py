@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Question scheduler - ask next whatever narrows the session's candidate rights most
+תזמון שאלות - השאלה הבאה היא זו שמצמצמת הכי הרבה את הזכויות האפשריות
+
+The questionnaire lists its questions in a fixed priority order. With a
+session's candidate set (candidate_sets.py) each pending question can be
+scored instead: every possible answer is tried against the gates that
+read the question's field, and the question with the largest expected drop
+in log2 of the set size comes first. Each answer is taken as equally likely.
+Numeric questions are tried with the PROBE_ANSWERS below.
+
+A question is skipped when no remaining right has a gate that reads its
+field and no answer changes which follow-up questions open. Its answer
+could not change any remaining right's eligibility. Questions that cannot
+be probed (free text) are always kept.
+"""
+
+import math
+
+from adaptive_questionnaire import FOLLOW_UP_CONDITIONS, pending_questions
+from profile_features import ProfileFeatures
+
+# Answers tried for questions without options - around the age and family-size limits the catalog uses
+PROBE_ANSWERS = {
+    'age': ['16', '22', '30', '45', '55', '64', '70', '80'],
+    'num_children': ['0', '1', '2', '3', '5'],
+}
+
+
+def probe_answers(question) -> list:
+    return question.get('options') or PROBE_ANSWERS.get(question['key'], [])
+
+
+def _remaining(gates, candidates, profile: dict, key: str) -> int:
+    """How many candidates survive the gates on key once the profile (which answers key) is given"""
+    features = ProfileFeatures(profile)
+    dropped = set()
+    for position, fields, gate in gates.by_field.get(key, ()):
+        if (position in candidates.positions and position not in dropped
+                and all(field in profile for field in fields) and not gate(features)):
+            dropped.add(position)
+    return len(candidates.positions) - len(dropped)
+
+
+def score_question(question, profile: dict, candidates, gates, active: list):
+    """Expected drop in log2 of the candidate count, or None when the answer cannot matter
+
+    active is FOLLOW_UP_CONDITIONS.evaluate(profile) - each answer only re-evaluates the blocks reading the field.
+    """
+    key = question['key']
+    answers = probe_answers(question)
+    if not answers:
+        return 0.0  # free text - cannot be tried, keep it
+    reads_key = any(position in candidates.positions for position, _, _ in gates.by_field.get(key, ()))
+
+    before = math.log2(len(candidates.positions) + 1)
+    after = 0.0
+    opened = set()
+    for answer in answers:
+        answered = {**profile, key: answer}
+        if reads_key:
+            after += math.log2(_remaining(gates, candidates, answered, key) + 1)
+        answered_active = FOLLOW_UP_CONDITIONS.reevaluate(active, answered, [key])
+        opened.add(frozenset(q['key'] for q in pending_questions(answered, answered_active)))
+    if not reads_key and len(opened) == 1:
+        return None
+    return before - after / len(answers) if reads_key else 0.0
+
+
+def schedule_questions(profile: dict, candidates, gates) -> list:
+    """Pending questions that can still matter, most informative first (ties keep questionnaire order)"""
+    if not candidates.positions:
+        return []
+    active = FOLLOW_UP_CONDITIONS.evaluate(profile)
+    scored = []
+    seen = set()
+    for order, question in enumerate(pending_questions(profile, active)):
+        if question['key'] in seen:
+            continue
+        seen.add(question['key'])
+        score = score_question(question, profile, candidates, gates, active)
+        if score is not None:
+            scored.append((-score, order, question))
+    scored.sort(key=lambda item: item[:2])
+    return [question for _, _, question in scored]
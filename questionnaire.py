@@ -1,3 +1,5 @@
+from conditions import CompiledConditions
+
 def has_children_under_18(profile):
     """Check if user has children under 18"""
     children_ages = profile.get('children_ages', '')
@@ -137,7 +139,7 @@ BASIC_QUESTIONS = [
 
 CONDITIONAL_QUESTIONS = [
     {
-        "condition": lambda p: str(p.get("has_children", "")).strip().lower() in ["כן", "yes", "true"],
+        "condition": {"field": "has_children", "read": "fold", "op": "in", "value": ["כן", "yes", "true"]},
         "questions": [
             {
                 "key": "num_children",
@@ -152,8 +154,12 @@ CONDITIONAL_QUESTIONS = [
         ]
     },
     {
-        "condition": lambda p: (str(p.get("has_children", "")).strip().lower() in ["כן", "yes", "true"] and 
-                                has_children_under_18(p)),
+        # Has children, and some child is under 18 (or the ages are not known yet - see has_children_under_18)
+        "condition": {"all": [
+            {"field": "has_children", "read": "fold", "op": "in", "value": ["כן", "yes", "true"]},
+            {"any": [{"not": {"field": "children_ages", "read": "int_list", "op": "answered"}},
+                     {"field": "children_ages", "read": "int_list", "op": "any_lt", "value": 18}]},
+        ]},
         "questions": [
             {
                 "key": "children_school_type",
@@ -176,7 +182,7 @@ CONDITIONAL_QUESTIONS = [
         ]
     },
     {
-        "condition": lambda p: str(p.get("has_children", "")).strip().lower() in ["כן", "yes", "true"],
+        "condition": {"field": "has_children", "read": "fold", "op": "in", "value": ["כן", "yes", "true"]},
         "questions": [
             {
                 "key": "child_special_needs",
@@ -187,7 +193,7 @@ CONDITIONAL_QUESTIONS = [
         ]
     },
     {
-        "condition": lambda p: str(p.get("recognized_disability", "")).strip().lower() == "כן",
+        "condition": {"field": "recognized_disability", "read": "fold", "op": "eq", "value": "כן"},
         "questions": [
             {
                 "key": "disability_percentage",
@@ -210,7 +216,8 @@ CONDITIONAL_QUESTIONS = [
         ]
     },
     {
-        "condition": lambda p: str(p.get("recognized_disability", "")).strip().lower() == "כן" or str(p.get("health_issue", "")).strip().lower() == "כן",
+        "condition": {"any": [{"field": "recognized_disability", "read": "fold", "op": "eq", "value": "כן"},
+                              {"field": "health_issue", "read": "fold", "op": "eq", "value": "כן"}]},
         "questions": [
             {
                 "key": "receiving_benefit",
@@ -221,7 +228,7 @@ CONDITIONAL_QUESTIONS = [
         ]
     },
     {
-        "condition": lambda p: str(p.get("military_or_national_service", "")).strip() == "שירות צבאי (צה\"ל)",
+        "condition": {"field": "military_or_national_service", "read": "strip", "op": "eq", "value": "שירות צבאי (צה\"ל)"},
         "questions": [
             {
                 "key": "service_length_years",
@@ -243,7 +250,7 @@ CONDITIONAL_QUESTIONS = [
         ]
     },
     {
-        "condition": lambda p: str(p.get("employment_status", "")) in ["שכיר", "עצמאי"],
+        "condition": {"field": "employment_status", "read": "str", "op": "in", "value": ["שכיר", "עצמאי"]},
         "questions": [
             {
                 "key": "avg_monthly_income",
@@ -271,7 +278,7 @@ CONDITIONAL_QUESTIONS = [
         ]
     },
     {
-        "condition": lambda p: str(p.get("employment_status", "")) == "עצמאי",
+        "condition": {"field": "employment_status", "read": "str", "op": "eq", "value": "עצמאי"},
         "questions": [
             {
                 "key": "business_type",
@@ -294,7 +301,7 @@ CONDITIONAL_QUESTIONS = [
         ]
     },
     {
-        "condition": lambda p: str(p.get("employment_status", "")) == "פנסיונר",
+        "condition": {"field": "employment_status", "read": "str", "op": "eq", "value": "פנסיונר"},
         "questions": [
             {
                 "key": "receives_old_age_pension",
@@ -314,7 +321,7 @@ CONDITIONAL_QUESTIONS = [
 
 SECONDARY_QUESTIONS = [
     {
-        "condition": lambda p: str(p.get("recognized_disability", "")).strip().lower() == "כן",
+        "condition": {"field": "recognized_disability", "read": "fold", "op": "eq", "value": "כן"},
         "questions": [
             {
                 "key": "disability_type",
@@ -325,7 +332,7 @@ SECONDARY_QUESTIONS = [
         ]
     },
     {
-        "condition": lambda p: str(p.get("paid_income_tax", "")) == "כן",
+        "condition": {"field": "paid_income_tax", "read": "str", "op": "eq", "value": "כן"},
         "questions": [
             {
                 "key": "medical_expense_receipts",
@@ -336,7 +343,7 @@ SECONDARY_QUESTIONS = [
         ]
     },
     {
-        "condition": lambda p: str(p.get("employment_status", "")) in ["שכיר", "עצמאי"],
+        "condition": {"field": "employment_status", "read": "str", "op": "in", "value": ["שכיר", "עצמאי"]},
         "questions": [
             {
                 "key": "work_experience_years",
@@ -353,7 +360,7 @@ SECONDARY_QUESTIONS = [
         ]
     },
     {
-        "condition": lambda p: str(p.get("has_children", "")) == "כן",
+        "condition": {"field": "has_children", "read": "str", "op": "eq", "value": "כן"},
         "questions": [
             {
                 "key": "single_parent",
@@ -364,7 +371,7 @@ SECONDARY_QUESTIONS = [
         ]
     },
     {
-        "condition": lambda p: str(p.get("paid_income_tax_6_years", "")) == "כן",
+        "condition": {"field": "paid_income_tax_6_years", "read": "str", "op": "eq", "value": "כן"},
         "questions": [
             {
                 "key": "has_medical_receipts",
@@ -393,7 +400,8 @@ SECONDARY_QUESTIONS = [
         ]
     },
     {
-        "condition": lambda p: str(p.get("had_work_accident", "")) == "כן" or str(p.get("had_car_accident", "")) == "כן",
+        "condition": {"any": [{"field": "had_work_accident", "read": "str", "op": "eq", "value": "כן"},
+                              {"field": "had_car_accident", "read": "str", "op": "eq", "value": "כן"}]},
         "questions": [
             {
                 "key": "accident_compensation_received",
@@ -410,7 +418,7 @@ SECONDARY_QUESTIONS = [
         ]
     },
     {
-        "condition": lambda p: str(p.get("miluim_days_yearly", "")) in ["מעל 20 ימים", "מילואימניק פעיל"],
+        "condition": {"field": "miluim_days_yearly", "read": "str", "op": "in", "value": ["מעל 20 ימים", "מילואימניק פעיל"]},
         "questions": [
             {
                 "key": "miluim_role",
@@ -426,4 +434,8 @@ SECONDARY_QUESTIONS = [
             }
         ]
     }
-]
\ No newline at end of file
+]
+
+# Compiled once - the conditions above are declarative (see conditions.py)
+CONDITIONAL_CONDITIONS = CompiledConditions(CONDITIONAL_QUESTIONS)
+SECONDARY_CONDITIONS = CompiledConditions(SECONDARY_QUESTIONS)
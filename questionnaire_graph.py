@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Precompiled questionnaire graph - the next question and the progress by one lookup
+גרף שאלון מהודר מראש - השאלה הבאה ואחוז ההשלמה בחיפוש אחד במילון
+
+What the adaptive questionnaire asks next depends only on which questions
+were answered, the age band (CORE_AGE_RANGES) and the class of each
+answer the follow-up conditions read. For example, a num_children of 1
+and a num_children of 2 open the same blocks. Those make a compact state
+signature. At import, every state reachable from the empty profile is
+walked once, one answer class at a time, and stored with its next
+questions and progress value. A request then costs one signature and one
+dict lookup.
+
+Answers the walk does not enumerate, such as free-text children ages or
+answers outside the options, only mark the question as answered. A
+profile whose signature is not in the graph (answers posted out of
+order, values of an unexpected type) falls back to scanning the
+questionnaire.
+"""
+
+from bisect import bisect_right
+
+from adaptive_questionnaire import (
+    MINIMAL_CORE_QUESTIONS, ADAPTIVE_FOLLOW_UPS, CORE_AGE_RANGES,
+    get_relevant_questions, estimate_completion_percentage,
+)
+from conditions import as_int, UNREADABLE
+
+# Ops the signature can classify answers for - read as given, or as a number
+VALUE_OPS = {
+    'eq': lambda v, value: v == value,
+    'ne': lambda v, value: v != value,
+    'in': lambda v, value: v in value,
+    'not_in': lambda v, value: v not in value,
+}
+NUMBER_OPS = {
+    'gt': lambda n, value: n > value,
+    'ge': lambda n, value: n >= value,
+    'lt': lambda n, value: n < value,
+    'le': lambda n, value: n <= value,
+}
+
+
+def _leaves(condition):
+    if 'field' in condition:
+        yield condition
+    elif 'not' in condition:
+        yield from _leaves(condition['not'])
+    else:
+        for part in condition.get('all', condition.get('any', [])):
+            yield from _leaves(part)
+
+
+class AnswerClasses:
+    """How the follow-up conditions split the answers of one field - by the condition leaves each answer satisfies"""
+
+    def __init__(self, field: str, leaves: list):
+        self.field = field
+        reads = {leaf.get('read', 'raw') for leaf in leaves}
+        ops = {leaf['op'] for leaf in leaves}
+        if reads == {'raw'} and ops <= set(VALUE_OPS):
+            self.number = False
+            self.tests = [(VALUE_OPS[leaf['op']], leaf['value']) for leaf in leaves]
+            self.sample_answers = ['']
+            for leaf in leaves:
+                value = leaf['value']
+                self.sample_answers += value if isinstance(value, list) else [value]
+        elif reads == {'int'} and ops <= set(NUMBER_OPS):
+            self.number = True
+            self.tests = [(NUMBER_OPS[leaf['op']], leaf['value']) for leaf in leaves]
+            self.sample_answers = [''] + [str(leaf['value'] + shift) for leaf in leaves for shift in (-1, 0, 1)]
+        else:
+            raise ValueError(f"Cannot classify answers to {field} for {sorted(reads)} / {sorted(ops)}")
+
+    def code(self, value) -> int:
+        """Bits of the leaves the answer satisfies"""
+        if self.number:
+            value = as_int(value)
+            if value is UNREADABLE:
+                return 0
+        bits = 0
+        for i, (test, expected) in enumerate(self.tests):
+            if test(value, expected):
+                bits |= 1 << i
+        return bits
+
+    def samples(self) -> list:
+        """Answers that together reach every class"""
+        return self.sample_answers
+
+
+class QuestionnaireGraph:
+    """Every questionnaire state reachable by answering, with its next questions and progress"""
+
+    def __init__(self, core=MINIMAL_CORE_QUESTIONS, follow_ups=ADAPTIVE_FOLLOW_UPS):
+        self.keys = list(dict.fromkeys(q['key'] for q in core + [q for block in follow_ups for q in block['questions']]))
+        self.bits = {key: 1 << i for i, key in enumerate(self.keys)}
+        leaves = {}
+        for block in follow_ups:
+            for leaf in _leaves(block['condition']):
+                leaves.setdefault(leaf['field'], []).append(leaf)
+        self.classes = [AnswerClasses(field, field_leaves) for field, field_leaves in leaves.items()]
+        # Ages where a core question starts or stops being asked
+        self.age_gated = sum(self.bits[key] for key in CORE_AGE_RANGES)
+        self.age_bounds = sorted({bound for low, high in CORE_AGE_RANGES.values() for bound in (low, high + 1)})
+        self.states = {}
+        self.hits = self.misses = 0
+        self._walk()
+
+    def signature(self, profile: dict):
+        """Compact state of the profile, or None when an answer cannot be classified"""
+        mask = 0
+        for key, bit in self.bits.items():
+            if key in profile:
+                mask |= bit
+        age = profile.get('age')
+        if mask & self.age_gated == self.age_gated:
+            age_band = None  # every question the age filters was answered
+        elif not age:
+            age_band = -1
+        elif isinstance(age, str):
+            try:
+                age_band = bisect_right(self.age_bounds, int(age) if age.isdigit() else 25)
+            except ValueError:
+                return None
+        else:
+            return None
+        return (mask, age_band) + tuple(answers.code(profile.get(answers.field)) for answers in self.classes)
+
+    def _walk(self):
+        samples = {answers.field: answers.samples() for answers in self.classes}
+        samples['age'] = [''] + [str(self.age_bounds[0] - 1)] + [str(bound) for bound in self.age_bounds]
+        pending = [{}]
+        while pending:
+            profile = pending.pop()
+            state = self.signature(profile)
+            if state in self.states:
+                continue
+            questions = get_relevant_questions(profile)
+            self.states[state] = (questions, estimate_completion_percentage(profile))
+            if questions:  # /chat asks the first one
+                key = questions[0]['key']
+                pending.extend({**profile, key: answer} for answer in samples.get(key, ['']))
+
+    def step(self, profile: dict):
+        """(next questions, progress) - as get_relevant_questions and estimate_completion_percentage return them"""
+        found = self.states.get(self.signature(profile))
+        if found is not None:
+            self.hits += 1
+            return found
+        self.misses += 1
+        return get_relevant_questions(profile), estimate_completion_percentage(profile)
+
+    def stats(self) -> dict:
+        return {'states': len(self.states), 'hits': self.hits, 'misses': self.misses}
+
+
+QUESTIONNAIRE_GRAPH = QuestionnaireGraph()
+questionnaire_step = QUESTIONNAIRE_GRAPH.step
@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Rights catalog loader - process-wide cached snapshot of rights_data.json
+טוען קטלוג הזכויות - תמונת מצב אחת לכל התהליך עם טעינה מחדש אוטומטית
+
+The catalog can be precompiled with `python catalog_build.py build` into
+rights_data.compiled - a pickle of slotted Right records (plus the prebuilt
+index) that is loaded instead of re-parsing and re-compiling the JSON when
+it is up to date.
+
+The artifact only holds the hot fields used for matching. The full entries
+(description, documents, contact info...) go to a cold segment,
+rights_data.<hash>.cold, which is memory-mapped and decoded per right the
+first time its `data` is needed - in practice only for the rights shown.
+
+With RIGHTS_CATALOG pointing at a .db file the catalog is read from the
+optional SQLite store instead (see catalog_store.py).
+
+RIGHTS_CATALOG_LAYERS lists files (separated by os.pathsep) merged over
+the base catalog in memory, in order - the base file is never rewritten:
+
+- a JSON array (e.g. new_rights_to_add.json) replaces the first right with
+  the same id in place and appends the rest
+- a JSON object of patches keyed by right id: each patch is merged into the
+  right (dict fields such as eligibility_criteria key by key), and a null
+  patch removes it
+
+    RIGHTS_CATALOG_LAYERS=new_rights_to_add.json:new_rights_to_add_workers.json
+
+On reload only the files whose stamp changed are read again.
+
+JSON is read as a stream (see catalog_stream.py), one right at a time, so
+neither the file text nor the whole parsed document is held in memory -
+without a current artifact the full entries go to a temporary cold segment.
+Each load prints how long it took and the peak memory of the process.
+"""
+
+import os
+import sys
+import json
+import mmap
+import pickle
+import hashlib
+import tempfile
+import threading
+import contextlib
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from amounts import parse_amount
+from eligibility_rules import heuristic_flags, is_constraining
+from name_similarity import near_duplicate_sets
+from catalog_stream import iter_catalog, file_sha1
+from catalog_schema import prepare_right
+
+CATALOG_PATH = os.getenv('RIGHTS_CATALOG', 'rights_data.json')
+CATALOG_LAYERS = tuple(filter(None, os.getenv('RIGHTS_CATALOG_LAYERS', '').split(os.pathsep)))
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+COMPILED_FORMAT = 7
+
+HOT_FIELDS = ('id', 'name', 'category', 'amount_estimation', 'criteria',
+              'amount', 'max_amount', 'value_floor', 'flags', 'position', 'duplicates')
+
+
+class Right:
+    """Compiled catalog entry - hot fields pre-parsed for matching"""
+
+    __slots__ = HOT_FIELDS + ('_data', '_cold')
+
+    def __init__(self, data: dict):
+        self.id = data.get('id')
+        self.name = sys.intern(data.get('name') or '')
+        self.category = sys.intern(data.get('category') or '')
+        self.amount_estimation = data.get('amount_estimation') or ''
+        # Only the criteria that can reject someone - most of the 33 keys are null or ['כל']
+        self.criteria = {
+            sys.intern(key): _intern_value(value)
+            for key, value in (data.get('eligibility_criteria') or {}).items()
+            if is_constraining(key, value)
+        }
+        # Parsed amount - min/max, unit, period and display text
+        self.amount = parse_amount(self.amount_estimation)
+        self.max_amount = self.amount.sort_key
+        self.value_floor = self.amount.value_floor
+        # Name/keyword heuristic categories, e.g. 'student_only' - see eligibility_rules
+        self.flags = heuristic_flags(self.criteria, data)
+        # Index in the catalog and positions of near-duplicate names - filled in by compile_rights
+        self.position = None
+        self.duplicates = frozenset()
+        self._data = data
+        self._cold = None
+
+    @property
+    def data(self) -> dict:
+        """The full catalog entry - read from the cold segment on first use"""
+        data = self._data
+        if data is None:
+            data = self._data = self._cold.load(self.position)
+        return data
+
+    def __getstate__(self):
+        # Pickled (compiled artifact) records carry the hot fields only
+        return {field: getattr(self, field) for field in HOT_FIELDS}
+
+    def __setstate__(self, state):
+        for field, value in state.items():
+            setattr(self, field, value)
+        self._data = self._cold = None
+
+    def __repr__(self):
+        return f"Right({self.id!r}, {self.name!r})"
+
+
+def _intern_value(value):
+    """Intern enum strings so equal criteria values share one object"""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return [sys.intern(v) if isinstance(v, str) else v for v in value]
+    return value
+
+
+def compile_rights(rights) -> tuple:
+    """Turn raw catalog dicts (any iterable, or already built Right records) into Right records"""
+    records = tuple(data if isinstance(data, Right) else Right(data) for data in rights)
+    for position, (record, duplicates) in enumerate(zip(records, near_duplicate_sets(r.name for r in records))):
+        record.position = position
+        record.duplicates = duplicates
+    return records
+
+
+def _untimed(stage):
+    return contextlib.nullcontext()
+
+
+def stream_records(f, cold, timer=_untimed, rejected=None) -> tuple:
+    """Read the JSON catalog in binary file f one entry at a time.
+
+    Each entry is normalized and checked (see catalog_schema), its full
+    text written to the binary file cold and only its hot record kept.
+    Returns (records not yet linked by compile_rights, cold offsets).
+    timer(stage) is a context manager the build uses to time each step,
+    and rejected collects the entries that failed the checks.
+    """
+    offsets = [0]
+    records = []
+    entries = iter_catalog(f)
+    while True:
+        with timer('read'):
+            right = next(entries, None)
+        if right is None:
+            break
+        with timer('check'):
+            right = prepare_right(right, rejected)
+        if right is None:
+            continue
+        with timer('compile'):
+            record = Right(right)
+        with timer('cold'):
+            cold.write(json.dumps(right, ensure_ascii=False).encode('utf-8'))
+            offsets.append(cold.tell())
+        record._data = None
+        record.position = len(records)  # its cold entry - compile_rights keeps the same order
+        records.append(record)
+    return records, offsets
+
+
+def stream_compile(f, cold, rejected=None) -> tuple:
+    """stream_records, linked into the final records. Returns (records, cold offsets)"""
+    records, offsets = stream_records(f, cold, rejected=rejected)
+    return compile_rights(records), offsets
+
+
+def attach_cold(records, cold):
+    for record in records:
+        record._cold = cold
+    return records
+
+
+class ColdStore:
+    """Full catalog entries in one memory-mapped file, decoded one right at a time"""
+
+    def __init__(self, path: str, offsets, file=None):
+        self.path = path
+        self.offsets = offsets  # entry i is bytes offsets[i]:offsets[i + 1]
+        self._file = file  # an open (temporary) file instead of a path
+        self._map = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Map the file now rather than on the first read. Returns self.
+
+        The mapping keeps the segment readable after its file is removed (a
+        later build deletes older segments), and forked workers inherit it.
+        """
+        if self._map is None:
+            with self._lock:
+                if self._map is None:
+                    if not self.offsets[-1]:
+                        self._map = b''  # no entries - an empty file cannot be mapped
+                    elif self._file is not None:
+                        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                    else:
+                        with open(self.path, 'rb') as f:
+                            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self
+
+    def load(self, position: int) -> dict:
+        if self._map is None:
+            self.open()
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return json.loads(self._map[start:end].decode('utf-8'))
+
+
+class _MovedCold:
+    """Cold lookups for base records that moved to another position when layers were merged"""
+
+    def __init__(self, cold, positions):
+        self.cold = cold
+        self.positions = positions  # merged position -> position in the base catalog
+
+    def load(self, position: int) -> dict:
+        return self.cold.load(self.positions[position])
+
+
+class CatalogSnapshot:
+    """Immutable view of the catalog as it was loaded at one point in time"""
+
+    __slots__ = ('records', '_rights', 'path', 'stamp', 'version', '_derived', 'load_stats')
+
+    def __init__(self, records, path, stamp, version, load_stats=None, derived=None):
+        self.records = tuple(records)
+        self._rights = None
+        self.path = path
+        self.stamp = stamp  # (mtime_ns, size) of the file that was parsed, None if missing
+        self.version = version
+        self._derived = dict(derived or {})  # prebuilt by the catalog build, or built on first use
+        self.load_stats = load_stats or {}  # source, build, seconds and peak_rss_kb of the load
+
+    @property
+    def rights(self) -> tuple:
+        """The full catalog dicts - loads every cold entry, so not for the matching path"""
+        if self._rights is None:
+            self._rights = tuple(record.data for record in self.records)
+        return self._rights
+
+    def derived(self, name: str, builder):
+        """Return a structure built from this snapshot's records, building it on first use.
+
+        Derived structures (indexes, compiled matchers) live and die with the
+        snapshot, so a reload rebuilds them and in-flight requests keep theirs.
+        """
+        value = self._derived.get(name)
+        if value is None:
+            value = self._derived.setdefault(name, builder(self.records))
+        return value
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.rights)
+
+
+_snapshots = {}  # (path, layers) -> snapshot
+_layers = {}  # layer path -> (stamp, parsed layer)
+_versions = 0
+_lock = threading.Lock()
+
+
+def is_sqlite_catalog(path: str) -> bool:
+    return os.path.splitext(path)[1] in SQLITE_SUFFIXES
+
+
+def compiled_path_for(path: str) -> str:
+    return os.path.splitext(path)[0] + '.compiled'
+
+
+def cold_path_for(path: str, digest: str) -> str:
+    # Named after the source hash so a rebuild never changes a file a running worker has mapped
+    return f"{os.path.splitext(path)[0]}.{digest[:12]}.cold"
+
+
+def _file_stamp(path):
+    """Return (mtime_ns, size) for the catalog file, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _peak_rss_kb():
+    """Peak resident memory of this process so far, None where unsupported"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # bytes on macOS, KB elsewhere
+
+
+def _new_snapshot(records, path, stamp, source, started, artifact=None, quarantined=(), derived=None):
+    global _versions
+    _versions += 1
+    stats = {'source': source, 'build': artifact and artifact['build'], 'quarantined': list(quarantined),
+             'seconds': time.perf_counter() - started, 'peak_rss_kb': _peak_rss_kb()}
+    snapshot = CatalogSnapshot(records, path, stamp, _versions, stats, derived or (artifact and artifact['derived']))
+    if stamp is not None:
+        peak = f"{stats['peak_rss_kb'] / 1024:.1f} MB" if stats['peak_rss_kb'] else "n/a"
+        build = f" (build {stats['build']})" if artifact else ""
+        print(f"Rights catalog: {len(records)} rights from {source}{build} in {stats['seconds'] * 1000:.1f} ms, peak memory {peak}")
+        if quarantined:
+            print(f"Rights catalog: {len(quarantined)} entries quarantined - see load_stats['quarantined']")
+    return snapshot
+
+
+def source_digest(digest: str, layers=()) -> str:
+    """Identity of what a catalog was built from - the base file's SHA-1, combined with its layers'"""
+    if not layers:
+        return digest
+    combined = hashlib.sha1(digest.encode())
+    for layer in layers:
+        with open(layer, 'rb') as f:
+            combined.update(file_sha1(f).encode())
+    return combined.hexdigest()
+
+
+def _load_compiled(path, digest):
+    """Return the compiled artifact, with its records ready, if it was built from this source"""
+    try:
+        with open(compiled_path_for(path), 'rb') as f:
+            artifact = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    if artifact.get('format') != COMPILED_FORMAT or artifact.get('source_sha1') != digest:
+        return None
+    cold_path = cold_path_for(path, digest)
+    offsets = artifact['cold_offsets']
+    try:
+        if os.path.getsize(cold_path) != offsets[-1]:
+            return None
+        cold = ColdStore(cold_path, offsets).open()
+    except OSError:
+        return None
+
+    attach_cold(artifact['records'], cold)
+    return artifact
+
+
+def _read_sqlite_snapshot(path):
+    """Load the catalog from a SQLite store - every committed edit changes the file stamp"""
+    started = time.perf_counter()
+    stamp = _file_stamp(path)  # taken first, so an edit during the read triggers another reload
+    records, quarantined, derived = (), [], None
+    if stamp is None:
+        print("Rights catalog file not found")
+    else:
+        from catalog_store import CatalogStore, StoreCandidates
+        with CatalogStore(path) as store, store.conn:
+            store.conn.execute("BEGIN")  # entries and version from the same commit
+            version, entries = store.version(), store.entries()
+        prepared = [(position, prepare_right(right, quarantined)) for position, right in entries]
+        prepared = [(position, right) for position, right in prepared if right is not None]
+        records = compile_rights(right for _, right in prepared)
+        # Candidate queries run on the store's indexes (see _match_rights in gpt_response)
+        derived = {'store_index': StoreCandidates(path, version, [position for position, _ in prepared])}
+    return _new_snapshot(records, path, stamp, 'sqlite', started, quarantined=quarantined, derived=derived)
+
+
+def _read_snapshot(path):
+    """Parse the catalog file into a new snapshot"""
+    if is_sqlite_catalog(path):
+        return _read_sqlite_snapshot(path)
+    started = time.perf_counter()
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        print("Rights catalog file not found")
+        return _new_snapshot((), path, None, 'json', started)
+
+    with f:
+        st = os.fstat(f.fileno())
+        stamp = (st.st_mtime_ns, st.st_size)
+        artifact = _load_compiled(path, file_sha1(f))
+        if artifact is not None:
+            return _new_snapshot(artifact['records'], path, stamp, 'compiled', started, artifact)
+        # No current artifact - spool the full entries to an unnamed cold segment
+        cold = tempfile.TemporaryFile()
+        quarantined = []
+        records, offsets = stream_compile(f, cold, quarantined)
+        cold.flush()
+        attach_cold(records, ColdStore(None, offsets, cold))
+    return _new_snapshot(records, path, stamp, 'json', started, quarantined=quarantined)
+
+
+def read_layer(path):
+    """Parse one layer file, reusing the last parse while its stamp is unchanged"""
+    stamp = _file_stamp(path)
+    cached = _layers.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    if stamp is None:
+        print(f"Catalog layer not found: {path}")
+        layer = []
+    else:
+        with open(path, encoding='utf-8') as f:
+            layer = json.load(f)
+        if not isinstance(layer, (list, dict)):
+            raise ValueError(f"Catalog layer {path} must be a list of rights or an object of patches")
+    _layers[path] = (stamp, layer)
+    return layer
+
+
+def apply_patch(right: dict, patch: dict) -> dict:
+    """A copy of right with the patch fields set - dict fields are merged key by key"""
+    patched = dict(right)
+    for key, value in patch.items():
+        if isinstance(value, dict) and isinstance(patched.get(key), dict):
+            patched[key] = {**patched[key], **value}
+        else:
+            patched[key] = value
+    return patched
+
+
+def merge_layers(base_records, layers, rejected=None) -> tuple:
+    """Merge overlay and patch layers over the base records (see the module docstring)"""
+    return compile_rights(merge_entries(base_records, layers, rejected))
+
+
+def merge_entries(base_records, layers, rejected=None) -> list:
+    """merge_layers without linking the result - entries that fail the checks are not applied"""
+    merged = list(base_records)  # Right records from the base, dicts from the layers, None when removed
+    by_id = {}
+    for position, record in enumerate(merged):
+        by_id.setdefault(record.id, position)
+
+    for layer in layers:
+        if isinstance(layer, list):
+            for right in layer:
+                right = prepare_right(right, rejected)
+                if right is None:
+                    continue
+                right_id = right.get('id')
+                position = by_id.get(right_id) if right_id is not None else None
+                if position is None:
+                    if right_id is not None:
+                        by_id[right_id] = len(merged)
+                    merged.append(right)
+                else:
+                    merged[position] = right
+        else:
+            for right_id, patch in layer.items():
+                position = by_id.get(right_id)
+                if position is None:
+                    print(f"Catalog patch for unknown right id: {right_id}")
+                elif patch is None:
+                    merged[position] = None
+                    del by_id[right_id]
+                else:
+                    current = merged[position]
+                    patched = prepare_right(apply_patch(current.data if isinstance(current, Right) else current, patch), rejected)
+                    if patched is not None:
+                        merged[position] = patched
+
+    # Base records are copied, never changed - the base snapshot may still be in use
+    entries = [entry for entry in merged if entry is not None]
+    moved = {}
+    cold = next((record._cold for record in base_records if record._cold is not None), None)
+    records = []
+    for position, entry in enumerate(entries):
+        if isinstance(entry, Right):
+            record = Right.__new__(Right)
+            for field in HOT_FIELDS:
+                setattr(record, field, getattr(entry, field))
+            record._data = entry._data
+            record._cold = None if entry._cold is None else _MovedCold(cold, moved)
+            record.position = position
+            moved[position] = entry.position
+            entry = record
+        records.append(entry if isinstance(entry, Right) else Right(entry))
+    return records
+
+
+def _catalog_stamp(path, layers):
+    if not layers:
+        return _file_stamp(path)
+    return (_file_stamp(path),) + tuple(_file_stamp(layer) for layer in layers)
+
+
+def _read_layered_snapshot(path, layers):
+    """The base snapshot (cached on its own) with the layers merged over it"""
+    started = time.perf_counter()
+    stamp = _catalog_stamp(path, layers)
+    # A build with exactly these layers is loaded as is
+    if not is_sqlite_catalog(path):
+        try:
+            with open(path, 'rb') as f:
+                artifact = _load_compiled(path, source_digest(file_sha1(f), layers))
+        except OSError:
+            artifact = None
+        if artifact is not None:
+            return _new_snapshot(artifact['records'], path, stamp, f"compiled + {len(layers)} layers", started, artifact)
+
+    base = _snapshots.get((path, ()))
+    if base is None or base.stamp != _file_stamp(path):
+        base = _snapshots[(path, ())] = _read_snapshot(path)
+    quarantined = list(base.load_stats.get('quarantined', ()))
+    records = merge_layers(base.records, [read_layer(layer) for layer in layers], quarantined)
+    return _new_snapshot(records, path, stamp, f"{base.load_stats.get('source')} + {len(layers)} layers", started,
+                         quarantined=quarantined)
+
+
+def _layers_for(path, layers):
+    if layers is None:
+        layers = CATALOG_LAYERS if path == CATALOG_PATH else ()
+    return tuple(layers)
+
+
+def get_catalog_snapshot(path: str = CATALOG_PATH, layers=None) -> CatalogSnapshot:
+    """Return the current snapshot, reloading it if the file (or a layer) changed on disk.
+
+    Callers should hold on to the returned snapshot for the whole request -
+    a concurrent reload swaps in a new object and never mutates the old one.
+    Layers default to RIGHTS_CATALOG_LAYERS for the configured catalog.
+    """
+    layers = _layers_for(path, layers)
+    key = (path, layers)
+    snapshot = _snapshots.get(key)
+    if snapshot is not None and snapshot.stamp == _catalog_stamp(path, layers):
+        return snapshot
+
+    with _lock:
+        # Another thread may have reloaded while we waited for the lock
+        snapshot = _snapshots.get(key)
+        if snapshot is None or snapshot.stamp != _catalog_stamp(path, layers):
+            snapshot = _read_layered_snapshot(path, layers) if layers else _read_snapshot(path)
+            _snapshots[key] = snapshot
+        return snapshot
+
+
+def reload_catalog(path: str = CATALOG_PATH, layers=None) -> CatalogSnapshot:
+    """Force a reload of the catalog (and its layers) regardless of the file stamps"""
+    layers = _layers_for(path, layers)
+    with _lock:
+        if layers:
+            _snapshots.pop((path, ()), None)
+            for layer in layers:
+                _layers.pop(layer, None)
+            snapshot = _read_layered_snapshot(path, layers)
+        else:
+            snapshot = _read_snapshot(path)
+        _snapshots[(path, layers)] = snapshot
+        return snapshot
+
+
+def build_compiled_catalog(path: str = CATALOG_PATH, layers=()) -> str:
+    """Compile the JSON catalog (and layers) into the artifact next to it - see catalog_build.py"""
+    from catalog_build import build_catalog
+    return build_catalog(path, layers)['target']
+
+
+if __name__ == "__main__":
+    # Build through the imported module so records are pickled as rights_catalog.Right, not __main__.Right
+    import rights_catalog
+    source = sys.argv[1] if len(sys.argv) > 1 else CATALOG_PATH
+    target = rights_catalog.build_compiled_catalog(source)
+    print(f"✅ קטלוג מקומפל נכתב ל-{target}")
@@ -6,50 +6,58 @@ Rights Validation System - מערכת אימות זכויות
 """
 
 import json
-import re
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 
+from profile_features import ProfileFeatures
+from amounts import parse_amount
+
+# Built once at import - in a pre-forked server the master's copy is shared by every worker
+VALIDATION_RULES = {
+    "income_thresholds": {
+        "2024": {
+            "minimum_wage": 5300,
+            "average_wage": 11500,
+            "tax_threshold": 6790,
+            "disability_allowance_max": 18000
+        }
+    },
+    "age_limits": {
+        "child_allowance_max": 18,
+        "retirement_age_men": 67,
+        "retirement_age_women": 62,
+        "military_service_min": 18
+    },
+    "amounts_ranges": {
+        "child_allowance": (150, 300),
+        "disability_allowance": (1500, 5000),
+        "unemployment_benefit": (1000, 3000),
+        "old_age_pension": (1500, 4000)
+    }
+}
+
+TRUSTED_SOURCES = (
+    "btl.gov.il",  # ביטוח לאומי
+    "misim.gov.il",  # מס הכנסה
+    "moed.gov.il",  # משרד החינוך
+    "health.gov.il",  # משרד הבריאות
+    "kolzchut.org.il"  # כל זכות - מוכר ומהימן
+)
+
 class RightsValidator:
     """מערכת אימות זכויות מול מקורות ממשלתיים"""
     
     def __init__(self):
         self.validation_rules = self._load_validation_rules()
-        self.trusted_sources = [
-            "btl.gov.il",  # ביטוח לאומי
-            "misim.gov.il",  # מס הכנסה
-            "moed.gov.il",  # משרד החינוך
-            "health.gov.il",  # משרד הבריאות
-            "kolzchut.org.il"  # כל זכות - מוכר ומהימן
-        ]
+        self.trusted_sources = TRUSTED_SOURCES
     
     def _load_validation_rules(self) -> Dict:
         """טעינת כללי אימות"""
-        return {
-            "income_thresholds": {
-                "2024": {
-                    "minimum_wage": 5300,
-                    "average_wage": 11500,
-                    "tax_threshold": 6790,
-                    "disability_allowance_max": 18000
-                }
-            },
-            "age_limits": {
-                "child_allowance_max": 18,
-                "retirement_age_men": 67,
-                "retirement_age_women": 62,
-                "military_service_min": 18
-            },
-            "amounts_ranges": {
-                "child_allowance": (150, 300),
-                "disability_allowance": (1500, 5000),
-                "unemployment_benefit": (1000, 3000),
-                "old_age_pension": (1500, 4000)
-            }
-        }
+        return VALIDATION_RULES
     
-    def validate_right(self, right: Dict, profile: Dict) -> Dict:
-        """אימות זכות ספציפית"""
+    def validate_right(self, right: Dict, profile) -> Dict:
+        """אימות זכות ספציפית (profile - מילון תשובות או ProfileFeatures)"""
+        profile = ProfileFeatures.of(profile)
         validation_result = {
             "is_valid": True,
             "confidence_score": 0,
@@ -90,29 +98,28 @@ class RightsValidator:
         
         return validation_result
     
-    def _check_internal_consistency(self, right: Dict, profile: Dict) -> Dict:
+    def _check_internal_consistency(self, right: Dict, profile: ProfileFeatures) -> Dict:
         """בדיקת עקביות פנימית"""
         issues = []
         score = 25  # ציון בסיס
         
         # בדיקה: אם זכות דורשת ילדים, המשתמש צריך להיות הורה
         criteria = right.get('eligibility_criteria', {})
-        if criteria.get('has_children') and profile.get('has_children') != 'כן':
+        if criteria.get('has_children') and 'has_children' not in profile.yes:
             issues.append("זכות דורשת ילדים אך המשתמש לא דיווח על ילדים")
             score -= 10
         
         # בדיקה: אם זכות דורשת נכות, המשתמש צריך להיות נכה
-        if criteria.get('recognized_disability') and profile.get('recognized_disability') != 'כן':
+        if criteria.get('recognized_disability') and 'recognized_disability' not in profile.yes:
             issues.append("זכות דורשת נכות מוכרת אך המשתמש לא דיווח על נכות")
             score -= 15
         
         # בדיקה: גיל הגיוני
         age_min = criteria.get('age_min')
         age_max = criteria.get('age_max')
-        user_age = profile.get('age')
+        age = profile.age
         
-        if user_age and user_age.isdigit():
-            age = int(user_age)
+        if age is not None:
             if age_min and age < age_min:
                 issues.append(f"גיל המשתמש ({age}) נמוך מהנדרש ({age_min})")
                 score -= 20
@@ -133,11 +140,10 @@ class RightsValidator:
             score -= 5
             return {"score": score, "issues": issues}
         
-        # חילוץ מספרים מתיאור הסכום
-        numbers = re.findall(r'\d+', amount_str.replace(',', ''))
-        if numbers:
-            amounts = [int(num) for num in numbers]
-            max_amount = max(amounts)
+        # מספרים מתיאור הסכום (מפוענח פעם אחת לכל מחרוזת)
+        amount = parse_amount(amount_str)
+        if amount.numbers:
+            max_amount = max(amount.numbers)
             
             # בדיקות סבירות
             right_name = right.get('name', '').lower()
@@ -241,33 +247,31 @@ class RightsValidator:
         
         return {"score": score, "issues": issues}
     
-    def validate_user_profile(self, profile: Dict) -> Dict:
+    def validate_user_profile(self, profile) -> Dict:
         """אימות תקינות פרופיל המשתמש"""
+        profile = ProfileFeatures.of(profile)
         issues = []
         
         # בדיקת גיל
-        age = profile.get('age')
-        if age and age.isdigit():
-            age_int = int(age)
-            if not (0 <= age_int <= 120):
+        if profile.age is not None:
+            if not (0 <= profile.age <= 120):
                 issues.append("גיל לא סביר")
-        elif age:
+        elif profile.get('age'):
             issues.append("גיל לא תקין")
         
-        # בדיקת הכנסה
-        income = profile.get('avg_monthly_income')
-        if income and income.isdigit():
-            income_int = int(income)
+        # בדיקת הכנסה (סכום מדויק, כולל "12,000")
+        income_int = profile.income_exact
+        if income_int is not None:
             if income_int > 100000:
                 issues.append("הכנסה גבוהה במיוחד - יש לוודא")
             elif income_int < 0:
                 issues.append("הכנסה שלילית")
         
         # בדיקות עקביות
-        if profile.get('has_children') == 'כן' and not profile.get('num_children'):
+        if 'has_children' in profile.yes and not profile.get('num_children'):
             issues.append("דווח על ילדים אבל לא נמסר מספרם")
         
-        if profile.get('recognized_disability') == 'כן' and not profile.get('disability_percentage'):
+        if 'recognized_disability' in profile.yes and not profile.get('disability_percentage'):
             issues.append("דווח על נכות אבל לא נמסר אחוז הנכות")
         
         return {
@@ -276,9 +280,12 @@ class RightsValidator:
             "confidence_score": max(0, 100 - len(issues) * 10)
         }
 
-def create_validation_report(rights: List[Dict], profile: Dict, validator: RightsValidator) -> Dict:
+def create_validation_report(rights: List[Dict], profile, validator: RightsValidator) -> Dict:
     """יצירת דוח אימות מקיף"""
     
+    # פענוח הפרופיל פעם אחת לכל הזכויות
+    profile = ProfileFeatures.of(profile)
+    
     # אימות פרופיל משתמש
     profile_validation = validator.validate_user_profile(profile)
     
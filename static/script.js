@@ -0,0 +1,260 @@
+// script.js - chat client: walks the questionnaire flow locally and posts only the final profile to /chat
+//
+// The flow (GET /questionnaire) holds the core questions, the follow-up blocks with their
+// declarative conditions and the progress weights - see adaptive_questionnaire.questionnaire_flow.
+// The functions below mirror get_relevant_questions, estimate_completion_percentage and
+// conditions.py, so the server is only called for the match. Without a flow (or when the
+// server still has a question) the client falls back to asking /chat for every question. When
+// /chat reports a newer flow version than the one walked, the flow is fetched again.
+
+const chatbox = document.getElementById('chatbox');
+const userInput = document.getElementById('userInput');
+
+const sessionId = window.crypto && crypto.randomUUID
+  ? crypto.randomUUID()
+  : Date.now().toString(36) + Math.random().toString(36).slice(2);
+
+let flow = null;
+let profile = {};
+let current = null;
+
+// ---- Conditions (conditions.py) ----
+
+const UNREADABLE = {};
+
+function pyStr(value) {
+  if (value === undefined) return '';
+  if (value === null) return 'None';
+  if (value === true) return 'True';
+  if (value === false) return 'False';
+  return String(value);
+}
+
+function asInt(value) {
+  if (typeof value === 'number') return Number.isFinite(value) ? Math.trunc(value) : UNREADABLE;
+  if (typeof value === 'boolean') return Number(value);
+  if (typeof value === 'string' && /^\s*[+-]?\d+\s*$/.test(value)) return parseInt(value, 10);
+  return UNREADABLE;
+}
+
+function asIntList(value) {
+  if (typeof value !== 'string') return UNREADABLE;
+  const items = value.split(',').map(asInt);
+  return items.includes(UNREADABLE) ? UNREADABLE : items;
+}
+
+const READS = {
+  raw: (p, field) => (p[field] === undefined ? null : p[field]),
+  str: (p, field) => pyStr(p[field]),
+  strip: (p, field) => pyStr(p[field]).trim(),
+  fold: (p, field) => pyStr(p[field]).trim().toLowerCase(),
+  int: (p, field) => asInt(p[field]),
+  int_list: (p, field) => asIntList(p[field]),
+};
+
+const OPS = {
+  eq: (v, value) => v === value,
+  ne: (v, value) => v !== value,
+  in: (v, value) => value.includes(v),
+  not_in: (v, value) => !value.includes(v),
+  gt: (v, value) => v > value,
+  ge: (v, value) => v >= value,
+  lt: (v, value) => v < value,
+  le: (v, value) => v <= value,
+  answered: v => (Array.isArray(v) ? v.length > 0 : Boolean(v)),
+  any_lt: (v, value) => v.some(x => x < value),
+};
+
+function holds(condition, p) {
+  if (condition.all) return condition.all.every(c => holds(c, p));
+  if (condition.any) return condition.any.some(c => holds(c, p));
+  if (condition.not) return !holds(condition.not, p);
+  const v = READS[condition.read || 'raw'](p, condition.field);
+  return v !== UNREADABLE && OPS[condition.op](v, condition.value);
+}
+
+// ---- Questionnaire (adaptive_questionnaire.py) ----
+
+function ruledOutByAge(question, p) {
+  if (!p.age || !question.age_range) return false;
+  const age = /^\d+$/.test(String(p.age)) ? parseInt(p.age, 10) : 25;
+  return age < question.age_range[0] || age > question.age_range[1];
+}
+
+function nextQuestion(p) {
+  const missing = flow.core.filter(q => !(q.key in p) && !ruledOutByAge(q, p));
+  if (missing.length) {
+    return missing.reduce((best, q) => (q.priority < best.priority ? q : best));
+  }
+  for (const block of flow.follow_ups) {
+    if (holds(block.condition, p)) {
+      const question = block.questions.find(q => !(q.key in p));
+      if (question) return question;
+    }
+  }
+  return null;
+}
+
+function progress(p) {
+  const answeredCore = flow.core.filter(q => q.key in p).length;
+  let total = 0;
+  let answered = 0;
+  for (const block of flow.follow_ups) {
+    if (holds(block.condition, p)) {
+      total += block.questions.length;
+      answered += block.questions.filter(q => q.key in p).length;
+    }
+  }
+  if (total === 0) return (answeredCore / flow.core.length) * 100;
+  const weights = flow.progress_weights;
+  return ((answeredCore / flow.core.length) * weights.core + (answered / total) * weights.follow_ups) * 100;
+}
+
+// ---- Chat ----
+
+function addMessage(text, sender) {
+  const div = document.createElement('div');
+  div.className = 'message ' + sender;
+  div.style.whiteSpace = 'pre-line';
+  div.textContent = text;
+  chatbox.appendChild(div);
+  chatbox.scrollTop = chatbox.scrollHeight;
+  return div;
+}
+
+function setProgress(value) {
+  const bar = document.getElementById('progressBar');
+  if (bar) bar.style.width = Math.round(value) + '%';
+}
+
+function ask(question) {
+  current = question;
+  addMessage(question.question, 'bot');
+  if (question.options && question.options.length) {
+    const choices = document.createElement('div');
+    choices.className = 'd-flex flex-wrap gap-2';
+    question.options.forEach(option => {
+      const button = document.createElement('button');
+      button.className = 'btn btn-outline-primary btn-sm';
+      button.textContent = option;
+      button.onclick = () => {
+        choices.remove();
+        answer(option);
+      };
+      choices.appendChild(button);
+    });
+    chatbox.appendChild(choices);
+    chatbox.scrollTop = chatbox.scrollHeight;
+  }
+}
+
+function isValidAnswer(question, value) {
+  if (question.type !== 'number') return value !== '';
+  if (!/^\d+$/.test(value)) return false;
+  const number = parseInt(value, 10);
+  return number >= (question.min || 0) && (question.max === undefined || number <= question.max);
+}
+
+function sendMessage() {
+  const value = userInput.value.trim();
+  if (!current || !value) return;
+  if (!isValidAnswer(current, value)) {
+    addMessage('נא להזין מספר תקין', 'bot');
+    return;
+  }
+  userInput.value = '';
+  answer(value);
+}
+
+function answer(value) {
+  addMessage(value, 'user');
+  profile[current.key] = value;
+  current = null;
+  step();
+}
+
+function step() {
+  if (!flow) {
+    postProfile();
+    return;
+  }
+  setProgress(progress(profile));
+  const question = nextQuestion(profile);
+  if (question) {
+    ask(question);
+  } else {
+    postProfile();
+  }
+}
+
+async function postProfile() {
+  const waiting = flow ? addMessage('בודק את הזכויות שלך...', 'bot') : null;
+  try {
+    const response = await fetch('/chat', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ profile, session_id: sessionId, flow_version: flow && flow.version }),
+    });
+    const data = await response.json();
+    if (waiting) waiting.remove();
+    if (data.flow_version && flow && data.flow_version !== flow.version) {
+      // The cached flow is older than the server's - fetch the new one and go on from the same answers
+      const stale = flow.version;
+      await loadFlow(true);
+      if (flow && flow.version === stale) flow = null; // still the old one - let the server ask
+      step();
+    } else if (data.done === false && data.field) {
+      // The server still has a question (no flow, or a newer one) - ask it the server's way
+      if (typeof data.progress === 'number') setProgress(data.progress);
+      flow = null;
+      ask({ key: data.field, question: data.reply, type: data.type, options: data.options });
+    } else if (data.done === true) {
+      setProgress(100);
+      addMessage(data.reply, 'bot');
+      localStorage.setItem('finalReport', data.reply);
+      document.getElementById('reportButton').style.display = 'block';
+    } else {
+      addMessage(data.reply, 'bot');
+    }
+  } catch (e) {
+    if (waiting) waiting.remove();
+    addMessage('שגיאה בחיבור לשרת, נסה שוב מאוחר יותר', 'bot');
+  }
+}
+
+function showFinalReport() {
+  const container = document.getElementById('rightsContainer');
+  const report = localStorage.getItem('finalReport') || '';
+  container.innerHTML = '';
+  report.split('\n').filter(line => /^\d+\./.test(line.trim())).forEach(line => {
+    const div = document.createElement('div');
+    div.textContent = line;
+    container.appendChild(div);
+  });
+  document.getElementById('leadForm').style.display = 'block';
+}
+
+userInput.addEventListener('keydown', event => {
+  if (event.key === 'Enter') sendMessage();
+});
+
+async function loadFlow(revalidate) {
+  try {
+    // no-cache revalidates the cached copy by its ETag (the flow version) instead of reusing it
+    const response = await fetch('/questionnaire', revalidate ? { cache: 'no-cache' } : {});
+    if (!response.ok) throw new Error(response.status);
+    flow = await response.json();
+  } catch (e) {
+    flow = null;
+  }
+}
+
+document.addEventListener('DOMContentLoaded', async () => {
+  await loadFlow(false);
+  if (flow) {
+    addMessage(flow.greeting, 'bot');
+    current = nextQuestion(profile);
+  } else {
+    postProfile();
+  }
+});
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test the shared amount parser
+"""
+
+from amounts import (
+    parse_amount, extract_max_amount, amount_value_floor, parse_amount_range, format_amount_nicely,
+    UNIT_SHEKEL, UNIT_SALARY_DAYS, UNIT_SALARY_MONTHS, UNIT_PERCENT,
+)
+
+def test_amount_spec_fields():
+    """Range, unit, period and the derived keys come from one parse"""
+    print("🧪 בדיקת פענוח סכומים")
+    print("="*50)
+
+    spec = parse_amount('500–1,200 ₪ לחודש')
+    assert (spec.min, spec.max, spec.unit, spec.period) == (500, 1200, UNIT_SHEKEL, 'month')
+    assert spec.sort_key == 1200 and spec.value_floor == 1200
+    assert parse_amount('500–1,200 ₪ לחודש') is spec  # memoized
+
+    assert parse_amount('עד 28 ימי שכר').unit == UNIT_SALARY_DAYS
+    assert extract_max_amount('עד 28 ימי שכר') == 28000
+    assert extract_max_amount('חודש שכר לכל שנת עבודה') == 50000
+    assert parse_amount('3 חודש שכר').unit == UNIT_SALARY_MONTHS
+    assert amount_value_floor('עד 28 ימי שכר') is None
+    assert parse_amount('מימון של 75%–90%').unit == UNIT_PERCENT
+
+    for unknown in [None, '', 'משתנה', 'לא ידוע']:
+        assert parse_amount_range(unknown) == (0, 0)
+        assert format_amount_nicely(unknown) == 'משתנה לפי מקרה'
+        assert amount_value_floor(unknown) is None
+    print("✅ כל השדות מחושבים מפענוח אחד")
+
+def test_display_text():
+    assert format_amount_nicely('1,500 לחודש') == '1,500 לחודש ₪'
+    assert format_amount_nicely('אלפי ₪') == 'אלפי ₪'
+    # Long text with a comma before the first number used to raise ValueError
+    long_text = 'תשלום חודשי, עד לסכום מקסימלי ' + 'א' * 150 + ' עד 3,954 ₪ בחודש'
+    assert format_amount_nicely(long_text) == 'עד 3,954 ₪'
+    print("✅ טקסט התצוגה תקין")
+
+if __name__ == "__main__":
+    test_amount_spec_fields()
+    test_display_text()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test the compiled catalog schema validation
+"""
+
+import os
+import json
+import tempfile
+
+from catalog_schema import check_right, prepare_right
+from rights_catalog import CATALOG_PATH, reload_catalog
+from eligibility_rules import is_regular_criteria
+
+def test_validator_reports_exact_problems():
+    """Each wrong field is named with what was expected and what was found"""
+    print("🧪 בדיקת סכימת הקטלוג")
+    print("="*50)
+    with open(CATALOG_PATH, encoding='utf-8') as f:
+        rights = json.load(f)
+    assert all(check_right(right) == [] for right in rights)
+
+    bad = {"id": "x", "keywords": "מילה", "eligibility_criteria": {
+        "income_max": "5000", "age_min": True, "has_children": ["כל"], "gender": ["זכר", 1],
+        "paid_courses": "כן", "paying_afterschool": True, "unknown_field": {"any": "thing"}}}
+    assert check_right(bad) == [
+        "name: missing",
+        "keywords: expected text list, got str 'מילה'",
+        "eligibility_criteria.age_min: expected number, got bool True",
+        "eligibility_criteria.income_max: expected number, got str '5000'",
+        "eligibility_criteria.has_children: expected boolean, got list ['כל']",
+        "eligibility_criteria.gender: expected text list, got list ['זכר', 1]",
+        "eligibility_criteria.paid_courses: expected boolean, got str 'כן'",
+        "eligibility_criteria.paying_afterschool: expected text, got bool True",
+    ]
+    assert check_right([1]) == ["not an object"]
+    assert check_right({"name": "זכות", "eligibility_criteria": "הכל"}) == [
+        "eligibility_criteria: expected object, got str 'הכל'"]
+    # A single enum value is normalized into a list rather than rejected
+    assert prepare_right({"name": "זכות", "eligibility_criteria": {"gender": "אישה"}})["eligibility_criteria"] == {"gender": ["אישה"]}
+    print("✅ כל הבעיות מדווחות במדויק")
+
+def test_bad_entries_quarantined_at_load():
+    """The loader keeps serving the valid entries and lists the rejected ones"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rights.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump([{"id": "a", "name": "זכות א", "eligibility_criteria": {"income_max": 6000}},
+                       {"id": "b", "name": "זכות ב", "eligibility_criteria": {"income_max": "6,000"}},
+                       "not a right"], f, ensure_ascii=False)
+        snapshot = reload_catalog(path)
+        assert [r.id for r in snapshot.records] == ["a"]
+        assert snapshot.load_stats['quarantined'] == [
+            ("'b'", ["eligibility_criteria.income_max: expected number, got str '6,000'"]),
+            ("'not a right'", ["not an object"]),
+        ]
+        # Everything that loads has the types the compiled matchers need - no scalar fallback
+        assert all(is_regular_criteria(r.criteria) for r in reload_catalog().records)
+    print("✅ רשומות פגומות מוסגרות בטעינה")
+
+if __name__ == "__main__":
+    test_validator_reports_exact_problems()
+    test_bad_entries_quarantined_at_load()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test the optional SQLite catalog store
+"""
+
+import os
+import json
+import tempfile
+
+from catalog_store import CatalogStore
+from rights_catalog import CATALOG_PATH, get_catalog_snapshot
+from gpt_response import _match_rights
+from test_matching_engines import all_profiles, expected_matches
+
+def load_json_catalog():
+    with open(CATALOG_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+def test_store_round_trip_and_candidates():
+    """The store returns the catalog unchanged and its indexed query never prunes a match"""
+    print("🧪 בדיקת קטלוג SQLite")
+    print("="*50)
+    rights = load_json_catalog()
+    with tempfile.TemporaryDirectory() as tmp:
+        with CatalogStore(os.path.join(tmp, 'rights.db')) as store:
+            store.replace_all(rights)
+            assert store.rights() == rights
+            assert store.version() == 1
+
+            snapshot = get_catalog_snapshot()
+            for profile in all_profiles:
+                candidates = set(store.candidate_positions(profile))
+                matches = expected_matches(snapshot, profile)
+                assert all(i in candidates for i, ok in enumerate(matches) if ok)
+            print(f"✅ {len(rights)} זכויות, אינדקסים לא מסננים התאמות")
+
+def test_transactional_edits_reload_snapshot():
+    """Edits bump the version and the loader picks them up without a JSON rewrite"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rights.db')
+        with CatalogStore(path) as store:
+            store.replace_all([{"id": "a", "name": "קצבת נכות כללית", "description": "תשלום חודשי"},
+                               {"id": "b", "name": "מענק לימודים", "keywords": ["סטודנט"]}])
+        first = get_catalog_snapshot(path)
+        assert [r.name for r in first.records] == ["קצבת נכות כללית", "מענק לימודים"]
+
+        with CatalogStore(path) as store:
+            assert store.upsert({"id": "b", "name": "מלגת לימודים"}) == 1
+            assert store.upsert({"id": "c", "name": "הנחה בארנונה"}) == 2
+            assert store.delete("a") == 1
+            assert store.version() == 4
+            assert [r['name'] for r in store.search("לימוד")] == ["מלגת לימודים"]
+            assert store.search("נכות") == []
+
+        second = get_catalog_snapshot(path)
+        assert second is not first
+        assert [r.name for r in second.records] == ["מלגת לימודים", "הנחה בארנונה"]
+        print("✅ עריכות נשמרות בטרנזקציה והקטלוג נטען מחדש")
+
+def test_snapshot_matches_through_store_indexes():
+    """A snapshot read from the store takes its candidates from the store's query, numbered like its records"""
+    rights = load_json_catalog()
+    with tempfile.TemporaryDirectory() as tmp:
+        path, json_path = os.path.join(tmp, 'rights.db'), os.path.join(tmp, 'rights.json')
+        with CatalogStore(path) as store:
+            store.replace_all(rights)
+            store.delete(rights[0]['id'])  # leaves a gap at position 0
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(rights[1:], f, ensure_ascii=False)
+
+        snapshot, reference = get_catalog_snapshot(path), get_catalog_snapshot(json_path)
+        assert snapshot.load_stats['source'] == 'sqlite'
+        store_index = snapshot.derived('store_index', None)
+        for profile in all_profiles:
+            candidates = store_index.candidate_ids(profile)
+            assert candidates is not None and len(candidates) < len(snapshot)
+            assert all(i in candidates for i, ok in enumerate(expected_matches(snapshot, profile)) if ok)
+            assert _match_rights(snapshot, profile, 500) == _match_rights(reference, profile, 500)
+
+        # After another edit the snapshot's numbers no longer fit the store - the matcher uses RightsIndex
+        with CatalogStore(path) as store:
+            store.upsert({"id": "new", "name": "זכות חדשה"})
+        assert store_index.candidate_ids(all_profiles[0]) is None
+        assert _match_rights(snapshot, all_profiles[0], 500) == _match_rights(reference, all_profiles[0], 500)
+        print("✅ מועמדים מאינדקסי SQLite ממוספרים כמו רשומות הקטלוג")
+
+if __name__ == "__main__":
+    test_store_round_trip_and_candidates()
+    test_transactional_edits_reload_snapshot()
+    test_snapshot_matches_through_store_indexes()
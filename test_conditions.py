@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test the declarative questionnaire conditions and the precompiled questionnaire graph
+"""
+
+import json
+import random
+
+from conditions import CompiledConditions, condition_fields, holds
+from adaptive_questionnaire import (
+    MINIMAL_CORE_QUESTIONS, ADAPTIVE_FOLLOW_UPS, FOLLOW_UP_CONDITIONS,
+    get_relevant_questions, estimate_completion_percentage, questionnaire_flow,
+)
+from questionnaire import (
+    BASIC_QUESTIONS, CONDITIONAL_QUESTIONS, SECONDARY_QUESTIONS, CONDITIONAL_CONDITIONS, SECONDARY_CONDITIONS,
+    has_children_under_18,
+)
+from questionnaire_graph import QUESTIONNAIRE_GRAPH
+
+def test_conditions_read_answers_like_the_old_lambdas():
+    """Reads and ops keep the semantics of the Python conditions they replaced"""
+    print("🧪 בדיקת תנאי שאלון הצהרתיים")
+    print("="*50)
+    children = {"field": "num_children", "read": "int", "op": "gt", "value": 0}
+    assert holds(children, {"num_children": "2"})
+    assert not holds(children, {"num_children": "0"})
+    assert not holds(children, {"num_children": "שניים"})  # unreadable - the old lambda raised
+    assert not holds(children, {})
+
+    yes = {"field": "recognized_disability", "read": "fold", "op": "eq", "value": "כן"}
+    assert holds(yes, {"recognized_disability": " כן "})
+    assert not holds({"field": "recognized_disability", "op": "eq", "value": "כן"}, {"recognized_disability": " כן "})
+    assert holds({"not": yes}, {})
+    assert holds({"any": [yes, children]}, {"num_children": "1"})
+    assert not holds({"all": [yes, children]}, {"num_children": "1"})
+
+    under_18 = CONDITIONAL_CONDITIONS.tests[1]
+    for ages in [None, "", "5, 8, 19", "19, 20", "x, 4", " 17 ", 12]:
+        profile = {"has_children": "כן"} if ages is None else {"has_children": "כן", "children_ages": ages}
+        assert under_18(profile) == has_children_under_18(profile), ages
+    print("✅ התנאים קוראים תשובות כמו התנאים הקודמים")
+
+def test_dependency_index_and_json_export():
+    """Only blocks reading a changed field are re-evaluated, and exported blocks compile to the same results"""
+    conditions = [FOLLOW_UP_CONDITIONS, CONDITIONAL_CONDITIONS, SECONDARY_CONDITIONS]
+    for compiled in conditions:
+        for field, blocks in compiled.depends.items():
+            assert all(field in condition_fields(compiled.blocks[i]['condition']) for i in blocks)
+
+    exported = CompiledConditions(json.loads(json.dumps(FOLLOW_UP_CONDITIONS.to_json(), ensure_ascii=False)))
+    assert [block['questions'][0]['key'] for block in exported.blocks] == \
+        [block['questions'][0]['key'] for block in ADAPTIVE_FOLLOW_UPS]
+
+    answers = {'num_children': ['0', '2', '4'], 'employment_status': ['שכיר', 'מובטל'],
+               'recognized_disability': ['כן', 'לא'], 'avg_monthly_income': ['עד 4,000', 'מעל 15,000'],
+               'disability_percentage': ['מעל 75%', 'עד 25%'], 'paid_income_tax_6_years': ['כן', 'לא'],
+               'military_or_national_service': ['שירות צבאי (צה"ל)', 'לא שירתתי'],
+               'service_length_years': ['מעל 20 שנים', 'עד 3 שנים']}
+    rng = random.Random(5)
+    for _ in range(200):
+        profile = {}
+        active = FOLLOW_UP_CONDITIONS.evaluate(profile)
+        for key in rng.sample(sorted(answers), len(answers)):
+            profile[key] = rng.choice(answers[key])
+            active = FOLLOW_UP_CONDITIONS.reevaluate(active, profile, [key])
+            assert active == FOLLOW_UP_CONDITIONS.evaluate(profile) == exported.evaluate(profile)
+    print(f"✅ {len(FOLLOW_UP_CONDITIONS.depends)} שדות באינדקס התלויות, הייצוא ל-JSON זהה")
+
+def test_dynamic_questions_use_compiled_conditions():
+    """generate_dynamic_questions asks what a scan of the blocks with holds() asks"""
+    from gpt_response import generate_dynamic_questions
+
+    def scan(profile):
+        for question in BASIC_QUESTIONS:
+            if not profile.get(question['key']):
+                return question['key']
+        for block in CONDITIONAL_QUESTIONS + SECONDARY_QUESTIONS:
+            if holds(block['condition'], profile):
+                for question in block['questions']:
+                    if not profile.get(question['key']):
+                        return question['key']
+        return None
+
+    questions = BASIC_QUESTIONS + [q for block in CONDITIONAL_QUESTIONS + SECONDARY_QUESTIONS for q in block['questions']]
+    rng = random.Random(3)
+    for _ in range(500):
+        # Basic questions answered most of the time, so the conditional blocks are reached
+        profile = {q['key']: rng.choice(q.get('options') or [str(rng.randint(0, 90)), '3, 17'])
+                   for q in questions if rng.random() < (0.98 if q in BASIC_QUESTIONS else 0.5)}
+        asked = generate_dynamic_questions(profile)
+        assert (asked[0]['key'] if asked else None) == scan(profile), profile
+    print("✅ שאלות דינמיות לפי התנאים המהודרים")
+
+def test_questionnaire_graph_matches_scan():
+    """Graph lookups give what scanning the questionnaire gives, in and out of the usual answer order"""
+    questions = MINIMAL_CORE_QUESTIONS + [q for block in ADAPTIVE_FOLLOW_UPS for q in block['questions']]
+    numbers = ['', '0', '1', '2', '3', '7', '15', '16', '17', '45', '70', '71', '75', '76', '90', 'abc']
+    rng = random.Random(8)
+    hits = QUESTIONNAIRE_GRAPH.hits
+    for _ in range(2000):
+        # One question at a time, as /chat asks them
+        profile = {}
+        while True:
+            step = QUESTIONNAIRE_GRAPH.step(profile)
+            assert step == (get_relevant_questions(profile), estimate_completion_percentage(profile)), profile
+            if not step[0]:
+                break
+            question = step[0][0]
+            profile[question['key']] = rng.choice((question.get('options') or numbers) + ['אחר'])
+
+        # Any subset of answers - unknown states fall back to the scan
+        profile = {q['key']: rng.choice((q.get('options') or numbers) + ['']) for q in questions if rng.random() < 0.5}
+        assert QUESTIONNAIRE_GRAPH.step(profile) == (get_relevant_questions(profile),
+                                                     estimate_completion_percentage(profile)), profile
+    assert QUESTIONNAIRE_GRAPH.hits > hits
+    print(f"✅ גרף השאלון ({len(QUESTIONNAIRE_GRAPH.states)} מצבים) זהה לסריקת השאלון")
+
+def walk_flow(flow, profile):
+    """The next question as a client following the exported flow picks it (static/script.js)"""
+    def ruled_out(q):
+        if not profile.get('age') or not q['age_range']:
+            return False
+        age = int(profile['age']) if profile['age'].isdigit() else 25
+        return not q['age_range'][0] <= age <= q['age_range'][1]
+
+    missing = [q for q in flow['core'] if q['key'] not in profile and not ruled_out(q)]
+    if missing:
+        return min(missing, key=lambda q: q['priority'])['key']
+    for block in flow['follow_ups']:
+        if holds(block['condition'], profile):
+            for q in block['questions']:
+                if q['key'] not in profile:
+                    return q['key']
+    return None
+
+def test_exported_flow_drives_the_same_questionnaire():
+    """The /questionnaire document is plain JSON, versioned by content, and gives the server's questions"""
+    from app import app
+
+    flow = json.loads(json.dumps(questionnaire_flow(), ensure_ascii=False))
+    assert flow == questionnaire_flow()
+    rng = random.Random(4)
+    for _ in range(500):
+        profile = {}
+        while True:
+            expected = get_relevant_questions(profile)
+            key = walk_flow(flow, profile)
+            assert key == (expected[0]['key'] if expected else None), profile
+            if key is None:
+                break
+            question = next(q for q in flow['core'] + [q for b in flow['follow_ups'] for q in b['questions']]
+                            if q['key'] == key)
+            profile[key] = rng.choice(question.get('options') or [str(rng.randint(0, 100))])
+
+    client = app.test_client()
+    response = client.get('/questionnaire')
+    assert response.json['version'] == flow['version']
+    assert client.get('/questionnaire', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    # A client that walked an older flow is told the current version instead of getting a question or a report
+    stale = client.post('/chat', json={'profile': {'age': '30'}, 'flow_version': 'old'}).json
+    assert stale == {'done': False, 'flow_version': flow['version']}
+    hits = QUESTIONNAIRE_GRAPH.hits
+    current = client.post('/chat', json={'profile': {'age': '30'}, 'session_id': 'flow-test',
+                                         'flow_version': flow['version']}).json
+    assert current['done'] is False and current['field']
+    assert current['progress'] == estimate_completion_percentage({'age': '30'})
+    assert QUESTIONNAIRE_GRAPH.hits == hits + 1  # the session's progress comes from the graph too
+    print(f"✅ זרימת השאלון מיוצאת ({len(response.data)} בתים, גרסה {flow['version']})")
+
+if __name__ == "__main__":
+    test_conditions_read_answers_like_the_old_lambdas()
+    test_dependency_index_and_json_export()
+    test_dynamic_questions_use_compiled_conditions()
+    test_questionnaire_graph_matches_scan()
+    test_exported_flow_drives_the_same_questionnaire()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test the memoized match results
+"""
+
+from match_cache import MatchCache, profile_key
+from gpt_response import filter_matching_rights, match_cache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_lru_ttl_and_counters():
+    """Entries expire after the TTL and the least recently used one is evicted first"""
+    print("🧪 בדיקת מטמון התאמות")
+    print("="*50)
+
+    clock = FakeClock()
+    cache = MatchCache(maxsize=2, ttl=10, clock=clock)
+    cache.put('a', [1])
+    cache.put('b', [2])
+    assert cache.get('a') == [1]  # 'b' is now the least recently used
+    cache.put('c', [3])
+    assert cache.get('b') is None
+    assert cache.get('c') == [3]
+
+    clock.now = 11
+    assert cache.get('a') is None
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['expirations']) == (2, 2, 1, 1)
+    print(f"✅ {stats}")
+
+def test_key_ignores_fields_no_right_reads():
+    """Profiles that differ only in irrelevant answers share one cache entry"""
+    fields = ('age', 'employment_status')
+    base = {'age': '40', 'employment_status': 'שכיר'}
+    assert profile_key(dict(base, city='חיפה'), fields) == profile_key(dict(base, city='אילת'), fields)
+    assert profile_key(base, fields) != profile_key(dict(base, age='41'), fields)
+    assert profile_key(base, fields) != profile_key(dict(base, gender='זכר'), fields + ('gender',))
+
+    match_cache.clear()
+    profile = {'age': '35', 'gender': 'זכר', 'employment_status': 'מובטל',
+               'recognized_disability': 'כן', 'avg_monthly_income': '3000'}
+    hits = match_cache.hits
+    first = filter_matching_rights(dict(profile, city='חיפה'))
+    second = filter_matching_rights(dict(profile, city='אילת'))
+    assert [r['name'] for r in first] == [r['name'] for r in second]
+    assert match_cache.hits == hits + 1
+    print("✅ פרופילים שנבדלים רק בעיר חולקים תוצאה אחת")
+
+if __name__ == "__main__":
+    test_lru_ttl_and_counters()
+    test_key_ignores_fields_no_right_reads()
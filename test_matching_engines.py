@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test that the fast matching paths agree with check_eligibility_match
+"""
+
+import gc
+import random
+
+from gpt_response import (
+    check_eligibility_match, rank_rights, remove_duplicate_rights, remove_duplicate_records,
+    filter_matching_rights, preload_catalog, match_cache, narrow_candidates, _match_rights,
+    schedule_next_questions,
+)
+from adaptive_questionnaire import get_relevant_questions, pending_questions
+from question_scheduler import probe_answers
+from amounts import extract_max_amount
+from name_similarity import is_near_duplicate, near_duplicate_sets
+from rights_catalog import get_catalog_snapshot
+from catalog_index import RightsIndex
+from bitset_matcher import BitsetMatcher
+from predicate_compiler import CompiledPredicates
+from profile_features import ProfileFeatures, parse_band
+from comprehensive_test import test_profiles
+
+# Profiles from test_enhanced_questionnaire.py
+enhanced_profiles = [
+    {'age': '30', 'gender': 'נקבה', 'employment_status': 'שכיר', 'avg_monthly_income': '4000',
+     'has_children': 'כן', 'num_children': '2', 'marital_status': 'גרוש', 'recognized_disability': 'לא'},
+    {'age': '45', 'gender': 'זכר', 'employment_status': 'שכיר', 'avg_monthly_income': '25000',
+     'has_children': 'כן', 'num_children': '2', 'marital_status': 'נשוי', 'recognized_disability': 'לא'},
+    {'age': '35', 'gender': 'זכר', 'employment_status': 'שכיר', 'recognized_disability': 'כן',
+     'disability_percentage': '30', 'avg_monthly_income': '8000'},
+    {'age': '35', 'gender': 'זכר', 'employment_status': 'מובטל', 'recognized_disability': 'כן',
+     'disability_percentage': '75', 'avg_monthly_income': '3000'},
+    {'age': '25', 'gender': 'זכר', 'employment_status': 'סטודנט',
+     'military_or_national_service': 'שירות צבאי (צה"ל)', 'service_length_years': '2',
+     'service_role': 'תומך', 'injured_in_service': 'לא'},
+    {'age': '30', 'gender': 'זכר', 'employment_status': 'שכיר',
+     'military_or_national_service': 'שירות צבאי (צה"ל)', 'service_length_years': '20',
+     'service_role': 'קרבי', 'injured_in_service': 'כן'},
+]
+
+# Questionnaire-style answers (ranges and words rather than plain numbers)
+adaptive_profiles = [
+    {'age': '52', 'num_children': '3', 'employment_status': 'עצמאי', 'recognized_disability': 'לא',
+     'military_or_national_service': 'שירות צבאי (צה"ל)', 'avg_monthly_income': '4,000-8,000',
+     'service_length_years': '10-20 שנים', 'housing_status': 'שכירות'},
+    {'age': '70', 'num_children': '0', 'recognized_disability': 'כן', 'disability_percentage': 'מעל 75%',
+     'need_daily_assistance': 'כן', 'employment_status': 'פנסיונר'},
+    {'age': '19', 'employment_status': 'לא עובד', 'military_service': 'שירות צבאי',
+     'service_length_years': 'שתיים', 'has_children': 'לא'},
+    {},
+]
+
+all_profiles = [case['profile'] for case in test_profiles] + enhanced_profiles + adaptive_profiles
+
+def expected_matches(snapshot, profile):
+    return [check_eligibility_match(profile, right.get('eligibility_criteria', {}), right)
+            for right in snapshot.rights]
+
+def test_index_never_prunes_a_match():
+    """Every right accepted by the full predicate survives index pruning"""
+    print("🧪 בדיקת אינדקס הפוך")
+    print("="*50)
+
+    snapshot = get_catalog_snapshot()
+    index = RightsIndex(snapshot.records)
+    for profile in all_profiles:
+        candidates = set(index.candidate_ids(profile))
+        expected = expected_matches(snapshot, profile)
+        missed = [snapshot.records[i].name for i, ok in enumerate(expected) if ok and i not in candidates]
+        assert not missed, missed
+        print(f"  מועמדים: {len(candidates)}/{len(snapshot)} | התאמות: {sum(expected)}")
+
+def test_bitset_matcher_agrees_with_predicate():
+    """Bitset-encoded criteria accept exactly the rights the predicate accepts, and the mask alone never rejects one"""
+    snapshot = get_catalog_snapshot()
+    matcher = BitsetMatcher(snapshot.records, check_eligibility_match)
+    print(f"\n🧪 בדיקת מנוע ביטים ({matcher._next_bit} ביטים)")
+    print("="*50)
+
+    for profile in all_profiles:
+        encoded = matcher.encode_profile(profile)
+        result = [matcher.matches(i, encoded, profile) for i in range(len(snapshot))]
+        expected = expected_matches(snapshot, profile)
+        assert result == expected
+        assert all(matcher.admits(i, encoded.bits) for i, ok in enumerate(expected) if ok)
+    print(f"  {len(all_profiles)} פרופילים - זהה")
+
+def test_compiled_predicates_agree_with_predicate():
+    """Generated per-right predicates accept exactly the rights the predicate accepts"""
+    print("\n🧪 בדיקת תנאים מהודרים")
+    print("="*50)
+
+    snapshot = get_catalog_snapshot()
+    compiled = CompiledPredicates(snapshot.records)
+    for profile in all_profiles:
+        matched = {id(r) for r in compiled.match(profile)}
+        assert [id(r) in matched for r in snapshot.records] == expected_matches(snapshot, profile)
+    print(f"  {len(all_profiles)} פרופילים - זהה ({len(compiled.source.splitlines())} שורות קוד)")
+
+def test_column_matcher_agrees_with_predicate():
+    """The numpy column store gives the same mask, one profile at a time and as a matrix"""
+    print("\n🧪 בדיקת מנוע עמודות")
+    print("="*50)
+
+    try:
+        from column_matcher import ColumnMatcher
+    except ImportError:
+        print("  numpy לא מותקן - מדלג")
+        return
+
+    snapshot = get_catalog_snapshot()
+    matcher = ColumnMatcher(snapshot.records, check_eligibility_match)
+    mask = matcher.match_many(all_profiles)
+    assert mask.shape == (len(all_profiles), len(snapshot))
+    for n, profile in enumerate(all_profiles):
+        expected = expected_matches(snapshot, profile)
+        assert mask[n].tolist() == expected
+        assert matcher.match(profile).tolist() == expected
+    print(f"  {mask.shape[0]} פרופילים x {mask.shape[1]} זכויות - זהה")
+
+def test_profile_features_normalize_answers():
+    """Bands, yes/no answers and service length are parsed once into typed fields"""
+    print("\n🧪 בדיקת נרמול פרופיל")
+    print("="*50)
+    assert parse_band('4,000-8,000') == (4000, 8000)
+    assert parse_band('עד 4,000') == (0, 4000)
+    assert parse_band('מעל 15,000') == (15000, None)
+    assert parse_band('חמש') == (5, 5)
+    assert parse_band('לא ידוע') is None
+
+    features = ProfileFeatures({'age': '52', 'avg_monthly_income': '4,000-8,000', 'has_children': 'כן',
+                                'recognized_disability': 'Yes', 'service_length_years': 'חמש',
+                                'employment_status': 'שכיר'})
+    assert features.age == 52
+    assert features.income == 4000 and features.income_range == (4000, 8000)
+    assert features.income_exact is None
+    assert 'has_children' in features.yes and 'recognized_disability' not in features.yes
+    assert 'recognized_disability' in features.affirmed
+    assert features.service_years == 5 and features.service_years_int is None
+    assert not features.course_allowed and features.medical_need
+    assert ProfileFeatures.of(features) is features
+
+    # The predicate gives the same answers for the raw dict and its features
+    snapshot = get_catalog_snapshot()
+    for profile in all_profiles:
+        features = ProfileFeatures(profile)
+        for right in snapshot.rights:
+            criteria = right.get('eligibility_criteria', {})
+            assert check_eligibility_match(features, criteria, right) == check_eligibility_match(profile, criteria, right)
+    print("✅ הפרופיל מנורמל פעם אחת ותוצאות ההתאמה זהות")
+
+def test_rank_rights_matches_full_sort():
+    """Heap top-k on pre-parsed amounts equals the old full sort, ties included"""
+    snapshot = get_catalog_snapshot()
+    rights = list(snapshot.rights) + [{'name': 'זכות חיצונית', 'amount_estimation': '7,500 ₪'}]
+    expected = sorted(rights, key=lambda x: extract_max_amount(x.get('amount_estimation', '0')), reverse=True)
+    for limit in [3, 5, len(rights)]:
+        assert rank_rights(rights, limit) == expected[:limit]
+    # Records rank by the amount parsed at load, in the same order as their entries
+    assert [r.data for r in rank_rights(list(snapshot.records), len(snapshot))] == rank_rights(list(snapshot.rights), len(snapshot))
+    print("✅ דירוג לפי סכום זהה למיון המלא")
+
+def test_precomputed_dedup_matches_pairwise_dedup():
+    """Dedup on precomputed near-duplicate sets keeps exactly what the pairwise scan keeps"""
+    records = get_catalog_snapshot().records
+    # 'הנחה בארנונה' duplicates two longer names that are not duplicates of each other
+    arnona = [r for r in records if r.name.startswith('הנחה בארנונה')]
+    samples = [list(records), arnona, arnona[1:]]
+    rng = random.Random(11)
+    samples += [sorted(rng.sample(records, 20), key=lambda r: r.position) for _ in range(200)]
+    for sample in samples:
+        expected = remove_duplicate_rights([r.data for r in sample])
+        assert [r.data for r in remove_duplicate_records(sample)] == expected
+    print("✅ סינון כפילויות מחושב מראש זהה לבדיקה הזוגית")
+
+def test_indexed_near_duplicates_match_all_pairs():
+    """The word/trigram candidate index finds every pair the all-pairs scan finds"""
+    names = [r.name for r in get_catalog_snapshot().records]
+    names += ['', 'א', 'בא', 'הנחה', 'נחה בארנ', 'קצבה', 'קצבת זקנה', 'זקנה קצבת', ' הנחה בארנונה ']
+    stripped = [name.strip() for name in names]
+    expected = tuple(frozenset(j for j, other in enumerate(stripped) if j != i and is_near_duplicate(name, other))
+                     for i, name in enumerate(stripped))
+    assert near_duplicate_sets(names) == expected
+
+def test_preload_builds_what_requests_use():
+    """Workers forked after preload_catalog reuse its structures instead of building their own"""
+    snapshot = preload_catalog()
+    try:
+        assert gc.get_freeze_count() > 0
+        built = dict(snapshot._derived)
+        assert {'profile_fields', 'index', 'bitsets', 'predicates', 'field_gates'} <= set(built)
+        match_cache.clear()
+        filter_matching_rights(test_profiles[0]['profile'])
+        assert all(snapshot._derived[name] is value for name, value in built.items())
+    finally:
+        gc.unfreeze()
+    print("✅ הקטלוג נטען מראש ומשותף לבקשות")
+
+def test_session_candidates_keep_every_match():
+    """Narrowing answer by answer never drops a right the full match accepts, and the survivors give the same report"""
+    snapshot = get_catalog_snapshot()
+    for n, profile in enumerate(all_profiles):
+        session = f'test-{n}'
+        expected = {i for i, ok in enumerate(expected_matches(snapshot, profile))
+                    if ok and not (snapshot.records[i].value_floor or 500) < 500}
+        answers = {}
+        candidates = narrow_candidates(session, answers)
+        for key, value in profile.items():
+            answers[key] = value
+            candidates = narrow_candidates(session, answers)
+            assert expected <= candidates.positions, key
+        assert _match_rights(snapshot, profile, 500, candidates) == _match_rights(snapshot, profile, 500)
+
+        # Changing an answer starts over instead of keeping rights dropped by the old one
+        if 'age' in profile:
+            changed = narrow_candidates(session, {**profile, 'age': '200'})
+            assert narrow_candidates(session, profile).positions == candidates.positions
+            assert changed is not candidates
+        print(f"  אפשריות בסוף השאלון: {len(candidates)}/{len(snapshot)} | התאמות: {len(expected)}")
+
+def run_questionnaire(truth, next_questions):
+    """Answer the questions in the order given from truth (the last option when truth has no answer)"""
+    profile = {}
+    while True:
+        questions = next_questions(profile)
+        if not questions:
+            return profile
+        key = questions[0]['key']
+        profile[key] = truth.get(key, (probe_answers(questions[0]) or [''])[-1])
+
+def test_scheduler_skips_only_questions_that_cannot_matter():
+    """Scheduled sessions ask fewer questions, and no skipped question could change the matches"""
+    snapshot = get_catalog_snapshot()
+    asked = fixed = 0
+    for n, truth in enumerate(all_profiles):
+        profile = run_questionnaire(
+            truth, lambda p: schedule_next_questions(p, narrow_candidates(f'scheduled-{n}', p)))
+        asked += len(profile)
+        fixed += len(run_questionnaire(truth, get_relevant_questions))
+
+        matches = _match_rights(snapshot, profile, 500)
+        for question in pending_questions(profile):
+            for answer in probe_answers(question):
+                assert _match_rights(snapshot, {**profile, question['key']: answer}, 500) == matches, question['key']
+    assert asked < fixed
+    print(f"✅ שאלות בסדר לפי צמצום: {asked} במקום {fixed}")
+
+if __name__ == "__main__":
+    test_index_never_prunes_a_match()
+    test_bitset_matcher_agrees_with_predicate()
+    test_compiled_predicates_agree_with_predicate()
+    test_column_matcher_agrees_with_predicate()
+    test_profile_features_normalize_answers()
+    test_rank_rights_matches_full_sort()
+    test_precomputed_dedup_matches_pairwise_dedup()
+    test_indexed_near_duplicates_match_all_pairs()
+    test_preload_builds_what_requests_use()
+    test_session_candidates_keep_every_match()
+    test_scheduler_skips_only_questions_that_cannot_matter()
+    print("\n✅ כל מנועי ההתאמה מסכימים עם check_eligibility_match")
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test the cached rights catalog loader
+"""
+
+import io
+import os
+import sys
+import json
+import pickle
+import tempfile
+import subprocess
+
+import rights_catalog
+from catalog_build import build_catalog, STAGES
+from rights_catalog import CATALOG_PATH, get_catalog_snapshot, reload_catalog, build_compiled_catalog, compiled_path_for
+from catalog_stream import iter_json_array, iter_catalog
+
+def write_catalog(path, rights):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(rights, f, ensure_ascii=False)
+
+def test_snapshot_cached_and_hot_reloaded():
+    """Snapshot is reused until the file changes, and old snapshots stay intact"""
+    print("🧪 בדיקת מטמון קטלוג")
+    print("="*50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rights.json')
+        write_catalog(path, [{"id": "a", "name": "זכות א"}])
+
+        first = get_catalog_snapshot(path)
+        assert get_catalog_snapshot(path) is first
+        assert [r['name'] for r in first.rights] == ["זכות א"]
+
+        write_catalog(path, [{"id": "a", "name": "זכות א"}, {"id": "b", "name": "זכות ב"}])
+        os.utime(path, ns=(first.stamp[0] + 10**9, first.stamp[0] + 10**9))
+
+        second = get_catalog_snapshot(path)
+        assert second is not first
+        assert second.version > first.version
+        assert len(second) == 2
+        assert len(first) == 1  # in-flight requests keep what they started with
+
+        forced = reload_catalog(path)
+        assert forced is not second and len(forced) == 2
+        print(f"  גרסאות: {first.version} → {second.version} → {forced.version}")
+
+def test_compiled_artifact_used_only_when_current():
+    """Compiled records are loaded from the artifact and ignored once the JSON changes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rights.json')
+        write_catalog(path, [{"id": "a", "name": "זכות א", "amount_estimation": "עד 1,200 ₪",
+                              "eligibility_criteria": {"age_min": 18, "has_children": None, "gender": ["כל"],
+                                                       "recognized_disability": False}}])
+        build_compiled_catalog(path)
+        assert os.path.exists(compiled_path_for(path))
+
+        record = reload_catalog(path).records[0]
+        # Sparse: null and "anyone" criteria are dropped, a false yes/no criterion still rejects
+        assert record.criteria == {"age_min": 18, "recognized_disability": False}
+        assert record.max_amount == 1200 and record.value_floor == 1200
+
+        write_catalog(path, [{"id": "b", "name": "זכות ב"}])
+        record = reload_catalog(path).records[0]
+        assert record.name == "זכות ב"
+        # Streamed from the JSON - the full entry waits in a temporary cold segment
+        assert record._data is None and record.data == {"id": "b", "name": "זכות ב"}
+
+def test_display_fields_loaded_lazily_from_cold_segment():
+    """The script-built artifact loads, and full entries are read only when asked for"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rights.json')
+        rights = [{"id": "a", "name": "זכות א", "description": "תיאור ארוך", "required_documents": ["ת.ז."]},
+                  {"id": "b", "name": "זכות ב", "description": "תיאור אחר"}]
+        write_catalog(path, rights)
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rights_catalog.py')
+        subprocess.run([sys.executable, script, path], check=True, capture_output=True)
+
+        snapshot = reload_catalog(path)
+        assert [record.name for record in snapshot.records] == ["זכות א", "זכות ב"]
+        assert all(record._data is None for record in snapshot.records)  # loaded from the artifact, hot fields only
+        assert snapshot.records[1].data == rights[1]
+        assert snapshot.records[0]._data is None
+        assert list(snapshot.rights) == rights
+
+def test_old_snapshot_reads_cold_entries_after_rebuild():
+    """A rebuild removes the previous cold segment - snapshots loaded from it still read their entries"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rights.json')
+        rights = [{"id": "a", "name": "זכות א", "description": "תיאור ראשון"}]
+        write_catalog(path, rights)
+        build_catalog(path)
+        first = reload_catalog(path)
+        old_segments = [name for name in os.listdir(tmp) if name.endswith('.cold')]
+
+        write_catalog(path, [{"id": "a", "name": "זכות א", "description": "תיאור שני"}])
+        build_catalog(path)
+        assert not any(os.path.exists(os.path.join(tmp, name)) for name in old_segments)
+        assert first.records[0]._data is None and first.records[0].data == rights[0]
+        assert reload_catalog(path).records[0].data["description"] == "תיאור שני"
+
+def test_streaming_reader_matches_json_load():
+    """Entries split across tiny chunks parse exactly as json.load would"""
+    with open(CATALOG_PATH, encoding='utf-8') as f:
+        text = f.read()
+    for chunk_size in (1, 7, 4096):
+        assert list(iter_json_array(io.StringIO(text), chunk_size)) == json.loads(text)
+    assert list(iter_json_array(io.StringIO(' [ 12345 , -1.5e3 ,"א", {"b": [1]} ] '), 2)) == [12345, -1500.0, "א", {"b": [1]}]
+    assert list(iter_json_array(io.StringIO('[]'))) == []
+    assert list(iter_catalog(io.BytesIO('[{"name": "זכות"}, 5]'.encode('utf-8')), 3)) == [{"name": "זכות"}, 5]
+    for broken in ('{"a": 1}', '[{"a": 1} {"b": 2}]', '[{"a": 1},'):
+        try:
+            list(iter_json_array(io.StringIO(broken), 4))
+        except ValueError:
+            continue
+        raise AssertionError(broken)
+    print("✅ קריאה בהזרמה זהה ל-json.load")
+
+def test_layers_merged_over_base_catalog():
+    """Overlays and id patches merge in memory - the base file is left alone and not re-read"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path, overlay, patches = (os.path.join(tmp, name) for name in ('rights.json', 'new.json', 'patch.json'))
+        base = [{"id": "a", "name": "קצבת זקנה", "description": "א", "eligibility_criteria": {"age_min": 67, "gender": ["כל"]}},
+                {"id": "b", "name": "מענק לימודים", "description": "ב"},
+                {"id": "c", "name": "הנחה בארנונה", "description": "ג"}]
+        write_catalog(path, base)
+        build_compiled_catalog(path)  # base records come from the artifact, full entries from the cold segment
+        write_catalog(overlay, [{"id": "b", "name": "מלגת לימודים"}, {"id": "d", "name": "דמי מחלה"}])
+        write_catalog(patches, {"a": {"eligibility_criteria": {"age_min": 62}}, "b": {"category": "חינוך"}, "z": {}})
+        with open(path, 'rb') as f:
+            original = f.read()
+
+        snapshot = get_catalog_snapshot(path, [overlay, patches])
+        assert [r.id for r in snapshot.records] == ["a", "b", "c", "d"]
+        assert snapshot.records[0].criteria == {"age_min": 62}
+        assert snapshot.records[0].data["eligibility_criteria"] == {"age_min": 62, "gender": ["כל"]}
+        assert snapshot.records[1].data == {"id": "b", "name": "מלגת לימודים", "category": "חינוך"}
+        assert snapshot.records[2].data == base[2]
+
+        base_snapshot = get_catalog_snapshot(path, [])
+        parsed_overlay = rights_catalog._layers[overlay][1]
+        write_catalog(patches, {"a": None})
+        os.utime(patches, ns=(10**18, 10**18))
+        second = get_catalog_snapshot(path, [overlay, patches])
+        assert second is not snapshot
+        assert [r.id for r in second.records] == ["b", "c", "d"]
+        assert second.records[1].data == base[2]  # moved from position 2 to 1, still read from the cold segment
+        assert [r.position for r in base_snapshot.records] == [0, 1, 2]  # base records are not touched
+        assert get_catalog_snapshot(path, []) is base_snapshot and rights_catalog._layers[overlay][1] is parsed_overlay
+        with open(path, 'rb') as f:
+            assert f.read() == original
+    print("✅ שכבות הקטלוג מתמזגות בזיכרון")
+
+def test_build_with_layers_matches_runtime_merge():
+    """One build applies the layers; the service loads it instead of merging, and bad entries stop the build"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path, overlay = os.path.join(tmp, 'rights.json'), os.path.join(tmp, 'new.json')
+        write_catalog(path, [{"id": "a", "name": " קצבת זקנה ", "eligibility_criteria": {"gender": "זכר"}},
+                             {"id": "b", "name": "מענק לימודים", "amount_estimation": "עד 2,000 ₪"}])
+        write_catalog(overlay, [{"id": "b", "name": "מלגת לימודים"}, {"id": "c", "name": "דמי מחלה"}])
+        merged = [r.data for r in get_catalog_snapshot(path, [overlay]).records]
+        assert merged[0] == {"id": "a", "name": "קצבת זקנה", "eligibility_criteria": {"gender": ["זכר"]}}  # normalized
+
+        summary = build_catalog(path, [overlay])
+        assert set(summary['stage_seconds']) == set(STAGES) and summary['rights'] == 3
+        assert get_catalog_snapshot(path).load_stats['source'] == 'json'  # built for the layers, not the bare base
+        snapshot = reload_catalog(path, [overlay])
+        assert snapshot.load_stats['source'] == 'compiled + 1 layers'
+        assert snapshot.load_stats['build'] == summary['build']
+        assert 'index' in snapshot._derived  # prebuilt by the build
+        assert [r.data for r in snapshot.records] == merged
+
+        write_catalog(overlay, [{"id": "d", "eligibility_criteria": {"age_min": "שמונה עשרה"}}])
+        try:
+            build_catalog(path, [overlay])
+        except ValueError as e:
+            assert "name: missing" in str(e) and "eligibility_criteria.age_min: expected number" in str(e)
+        else:
+            raise AssertionError("bad entry was built")
+        with open(compiled_path_for(path), 'rb') as f:
+            assert pickle.load(f)['build'] == summary['build']  # the previous build is untouched
+        assert not [name for name in os.listdir(tmp) if name.endswith('.tmp')]
+    print("✅ בניית הקטלוג עם שכבות זהה למיזוג בזמן טעינה")
+
+def test_missing_catalog_is_empty():
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = get_catalog_snapshot(os.path.join(tmp, 'missing.json'))
+        assert snapshot.rights == ()
+
+if __name__ == "__main__":
+    test_snapshot_cached_and_hot_reloaded()
+    test_compiled_artifact_used_only_when_current()
+    test_display_fields_loaded_lazily_from_cold_segment()
+    test_old_snapshot_reads_cold_entries_after_rebuild()
+    test_streaming_reader_matches_json_load()
+    test_layers_merged_over_base_catalog()
+    test_build_with_layers_matches_runtime_merge()
+    test_missing_catalog_is_empty()
+    print("\n✅ הקטלוג נטען פעם אחת ומתרענן כשהקובץ משתנה")